@@ -1,6 +1,15 @@
 from . import ui
+from . import registry
 from . import projector
 from . import operators
+from . import analysis
+from . import photometry
+from . import blending
+from . import proxies
+from . import sharing
+from . import rig_io
+from . import animation
+from . import profiling
 
 bl_info = {
     "name": "Projector",
@@ -16,12 +25,31 @@ bl_info = {
 
 
 def register():
+    registry.register()
     projector.register()
     operators.register()
+    analysis.register()
+    photometry.register()
+    blending.register()
+    proxies.register()
+    sharing.register()
+    rig_io.register()
+    animation.register()
     ui.register()
+    # Registered last, profiling wraps the classes of all other modules.
+    profiling.register()
 
 
 def unregister():
+    profiling.unregister()
     ui.unregister()
+    animation.unregister()
+    rig_io.unregister()
+    sharing.unregister()
+    proxies.unregister()
+    blending.unregister()
+    photometry.unregister()
+    analysis.unregister()
     operators.unregister()
     projector.unregister()
+    registry.unregister()
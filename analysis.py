@@ -0,0 +1,283 @@
+from collections import namedtuple
+
+import bpy
+import numpy as np
+from bpy.types import Operator
+from mathutils import Vector
+from mathutils.bvhtree import BVHTree
+
+from .helper import get_projectors
+from . import projection
+from .projector import _resolution
+
+# Face attributes written to the analysed mesh.
+COUNT_ATTRIBUTE = 'projector_count'
+DENSITY_ATTRIBUTE = 'projector_pixel_density'
+INCIDENCE_ATTRIBUTE = 'projector_incidence'
+
+# Generic mesh attributes exist since Blender 2.91, older versions only get the summary.
+HAS_FACE_ATTRIBUTES = bpy.app.version >= (2, 91, 0)
+# Appended to the report of the analysis operators when the face attributes could not be written.
+NO_ATTRIBUTES_NOTE = ' Face attributes need Blender 2.91 or newer.'
+
+# Offset of the occlusion rays from the surface, avoids hitting the face the ray starts on.
+RAY_OFFSET = 1e-4
+# Number of occlusion cells across the image of a projector, the faces in a cell share one ray.
+OCCLUSION_RESOLUTION = 128
+
+Frustum = namedtuple('Frustum', ['origin', 'world_to_local', 'throw_ratio', 'h_shift', 'v_shift', 'width', 'height'])
+Coverage = namedtuple('Coverage', ['count', 'pixel_density', 'incidence', 'projectors', 'total'])
+Occluder = namedtuple('Occluder', ['bvh', 'world_to_local', 'bounds_min', 'bounds_max'])
+
+
+def projector_frustum(projector):
+    """ Return the frustum of a projector from its settings, the same math which drives the camera and the spot. """
+    proj_settings = projector.proj_settings
+    width, height = _resolution(projector, proj_settings)
+    matrix = projector.matrix_world.normalized()
+    return Frustum(origin=np.array(matrix.translation),
+                   world_to_local=np.array(matrix.inverted().to_3x3()),
+                   throw_ratio=proj_settings.throw_ratio,
+                   h_shift=projection.shift_fraction(proj_settings.h_shift),
+                   v_shift=projection.shift_fraction(proj_settings.v_shift),
+                   width=width,
+                   height=height)
+
+
+def face_data(obj, depsgraph):
+    """ Return the world space centers, unit normals and areas of the faces of a mesh object with its modifiers
+    applied as arrays.
+    """
+    obj_eval = obj.evaluated_get(depsgraph)
+    mesh = obj_eval.to_mesh()
+    count = len(mesh.polygons)
+    centers = np.empty(count * 3)
+    normals = np.empty(count * 3)
+    areas = np.empty(count)
+    mesh.polygons.foreach_get('center', centers)
+    mesh.polygons.foreach_get('normal', normals)
+    mesh.polygons.foreach_get('area', areas)
+    obj_eval.to_mesh_clear()
+
+    matrix = np.array(obj_eval.matrix_world)
+    linear = matrix[:3, :3]
+    centers = centers.reshape(-1, 3) @ linear.T + matrix[:3, 3]
+    # Normals transform with the inverse transpose, the area scales with the determinant.
+    normals = normals.reshape(-1, 3) @ np.linalg.inv(linear)
+    lengths = np.linalg.norm(normals, axis=1)
+    areas = areas * abs(np.linalg.det(linear)) * lengths
+    normals /= np.where(lengths > 0, lengths, 1)[:, None]
+    return centers, normals, areas
+
+
+def image_coordinates(frustum, points):
+    """ Return the image coordinates u, v of world space points in a projector, both in [-0.5, 0.5] inside its image,
+    and their depth along the projector axis.
+    """
+    local = (points - frustum.origin) @ frustum.world_to_local.T
+    return projection.image_coordinates(local, frustum.throw_ratio, frustum.h_shift, frustum.v_shift,
+                                        projection.inverted_aspect_ratio(frustum.width, frustum.height))
+
+
+def frustum_hits(frustum, centers, normals):
+    """ Return the indices of the faces inside the frustum which face the projector,
+    their pixel density in px/m and their incidence angle in radians.
+    The density is the number of projector pixels per meter along the direction the face is tilted in.
+    """
+    u, v, depth = image_coordinates(frustum, centers)
+    inside = (depth > 0) & (np.abs(u) <= 0.5) & (np.abs(v) <= 0.5)
+    indices = np.flatnonzero(inside)
+
+    to_projector = frustum.origin - centers[indices]
+    distance = np.linalg.norm(to_projector, axis=1)
+    cos_incidence = np.einsum('ij,ij->i', normals[indices], to_projector) / distance
+    front = cos_incidence > 0
+    indices, distance, cos_incidence = indices[front], distance[front], cos_incidence[front]
+
+    density = frustum.throw_ratio * frustum.width * cos_incidence / distance
+    return indices, density, np.arccos(np.clip(cos_incidence, -1, 1))
+
+
+def occluders(depsgraph, objects):
+    """ Return an Occluder, a BVH tree with its world to local matrix and world space bounds, for every mesh object
+    that can block a projection.
+    """
+    result = []
+    for obj in objects:
+        if obj.type != 'MESH' or not obj.visible_get():
+            continue
+        obj_eval = obj.evaluated_get(depsgraph)
+        matrix = np.array(obj_eval.matrix_world)
+        corners = np.array(obj_eval.bound_box) @ matrix[:3, :3].T + matrix[:3, 3]
+        result.append(Occluder(BVHTree.FromObject(obj_eval, depsgraph), obj_eval.matrix_world.inverted(),
+                               corners.min(axis=0), corners.max(axis=0)))
+    return result
+
+
+def occlusion_cells(frustum, centers):
+    """ Return the index of the occlusion cell of the projector image each center falls in. """
+    u, v, _ = image_coordinates(frustum, centers)
+    columns = OCCLUSION_RESOLUTION
+    rows = max(1, round(columns * frustum.height / frustum.width))
+    column = np.clip(((u + 0.5) * columns).astype(np.int64), 0, columns - 1)
+    row = np.clip(((v + 0.5) * rows).astype(np.int64), 0, rows - 1)
+    return row * columns + column
+
+
+def visible(frustum, centers, blockers):
+    """ Return a boolean array, True for each center inside the frustum with a free line of sight to the projector.
+    Only occluders overlapping the bounds of the lines of sight are tested. The centers are sub-sampled by the cells
+    of the projector image, one ray per cell is cast in the local space of each of those occluders.
+    """
+    result = np.ones(len(centers), dtype=bool)
+    if not len(centers):
+        return result
+    low = np.minimum(centers.min(axis=0), frustum.origin)
+    high = np.maximum(centers.max(axis=0), frustum.origin)
+    blockers = [occluder for occluder in blockers
+                     if np.all(occluder.bounds_min <= high) and np.all(occluder.bounds_max >= low)]
+    if not blockers:
+        return result
+
+    _, first, cell_of_center = np.unique(occlusion_cells(frustum, centers), return_index=True, return_inverse=True)
+    starts = centers[first]
+    directions = frustum.origin - starts
+    distances = np.linalg.norm(directions, axis=1)
+    directions /= distances[:, None]
+    starts = starts + directions * RAY_OFFSET
+    distances -= RAY_OFFSET
+
+    blocked = np.zeros(len(first), dtype=bool)
+    for occluder in blockers:
+        linear = np.array(occluder.world_to_local)
+        local_starts = starts @ linear[:3, :3].T + linear[:3, 3]
+        local_directions = directions @ linear[:3, :3].T
+        local_distances = distances * np.linalg.norm(local_directions, axis=1)
+        ray_cast = occluder.bvh.ray_cast
+        rays = np.flatnonzero(~blocked)
+        for i, start, direction, distance in zip(rays.tolist(), local_starts[rays].tolist(),
+                                                 local_directions[rays].tolist(), local_distances[rays].tolist()):
+            if ray_cast(start, direction, distance)[0] is not None:
+                blocked[i] = True
+    result[blocked[cell_of_center.ravel()]] = False
+    return result
+
+
+def analyze_coverage(target, projectors, depsgraph=None, occlusion=True, write_attributes=True):
+    """ Compute which projectors hit each face of the target mesh object, at what pixel density and incidence angle.
+    All faces are tested against each projector frustum at once, only the faces in a frustum are checked for occlusion.
+    Per face it returns the number of projectors, the best pixel density and the incidence angle of that projector
+    in degrees, plus a summary per projector and for the whole mesh.
+    """
+    if depsgraph is None:
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+    centers, normals, areas = face_data(target, depsgraph)
+    face_count = len(areas)
+    count = np.zeros(face_count, dtype=np.int32)
+    best_density = np.zeros(face_count)
+    best_incidence = np.zeros(face_count)
+    blockers = occluders(depsgraph, depsgraph.scene.objects) if occlusion else []
+
+    summaries = []
+    for projector in projectors:
+        frustum = projector_frustum(projector)
+        indices, density, incidence = frustum_hits(frustum, centers, normals)
+        if blockers and len(indices):
+            unblocked = visible(frustum, centers[indices], blockers)
+            indices, density, incidence = indices[unblocked], density[unblocked], incidence[unblocked]
+
+        count[indices] += 1
+        better = density > best_density[indices]
+        best_density[indices[better]] = density[better]
+        best_incidence[indices[better]] = np.degrees(incidence[better])
+
+        hit_areas = areas[indices]
+        area = float(hit_areas.sum())
+        summaries.append({
+            'projector': projector.name,
+            'faces': len(indices),
+            'area': area,
+            'min_density': float(density.min()) if len(indices) else 0.0,
+            'mean_density': float((density * hit_areas).sum() / area) if area else 0.0,
+            'max_density': float(density.max()) if len(indices) else 0.0,
+            'mean_incidence': float(np.degrees((incidence * hit_areas).sum() / area)) if area else 0.0,
+        })
+
+    total_area = float(areas.sum())
+    total = {
+        'faces': face_count,
+        'area': total_area,
+        'covered_area': float(areas[count > 0].sum()),
+        'overlap_area': float(areas[count > 1].sum()),
+    }
+    # Modifiers which change the faces leave no face of the mesh to store the results on.
+    if write_attributes and len(target.data.polygons) == face_count:
+        write_face_attribute(target.data, COUNT_ATTRIBUTE, 'INT', count)
+        write_face_attribute(target.data, DENSITY_ATTRIBUTE, 'FLOAT', best_density)
+        write_face_attribute(target.data, INCIDENCE_ATTRIBUTE, 'FLOAT', best_incidence)
+    return Coverage(count, best_density, best_incidence, summaries, total)
+
+
+def write_face_attribute(mesh, name, data_type, values):
+    """ Write values to a face attribute of the mesh, (re)creating it with the right type and domain.
+    Skipped on Blender versions without generic attributes.
+    """
+    if not HAS_FACE_ATTRIBUTES:
+        return
+    attribute = mesh.attributes.get(name)
+    if attribute and (attribute.data_type != data_type or attribute.domain != 'FACE'):
+        mesh.attributes.remove(attribute)
+        attribute = None
+    if attribute is None:
+        attribute = mesh.attributes.new(name, data_type, 'FACE')
+    attribute.data.foreach_set('value', values.astype(np.int32 if data_type == 'INT' else np.float32))
+    mesh.update()
+
+
+def format_summary(coverage):
+    """ Return the summary of a coverage analysis as lines of a table. """
+    lines = [f'{"Projector":<24}{"Faces":>8}{"Area m²":>10}{"Min px/m":>10}{"Mean px/m":>11}{"Max px/m":>10}{"Incidence":>11}']
+    for row in coverage.projectors:
+        lines.append(f'{row["projector"]:<24}{row["faces"]:>8}{row["area"]:>10.2f}{row["min_density"]:>10.1f}'
+                     f'{row["mean_density"]:>11.1f}{row["max_density"]:>10.1f}{row["mean_incidence"]:>10.1f}°')
+    total = coverage.total
+    covered = total['covered_area'] / total['area'] * 100 if total['area'] else 0
+    lines.append(f'Covered: {covered:.1f}% of {total["area"]:.2f} m², overlapping: {total["overlap_area"]:.2f} m²')
+    return lines
+
+
+class PROJECTOR_OT_analyze_coverage(Operator):
+    """ Analyze which faces of the active mesh the selected projectors (or all projectors) hit,
+    with which pixel density and incidence angle. The results are stored as face attributes (Blender 2.91+). """
+    bl_idname = 'projector.analyze_coverage'
+    bl_label = 'Analyze Projector Coverage'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    occlusion: bpy.props.BoolProperty(
+        name='Occlusion',
+        description='Ray cast every hit face to exclude faces blocked by other geometry',
+        default=True)
+
+    @classmethod
+    def poll(cls, context):
+        return context.active_object is not None and context.active_object.type == 'MESH'
+
+    def execute(self, context):
+        projectors = get_projectors(context, only_selected=True) or get_projectors(context)
+        if not projectors:
+            self.report({'WARNING'}, 'There are no projectors to analyze.')
+            return {'CANCELLED'}
+        coverage = analyze_coverage(context.active_object, projectors,
+                                    depsgraph=context.evaluated_depsgraph_get(),
+                                    occlusion=self.occlusion)
+        lines = format_summary(coverage)
+        self.report({'INFO'}, lines[-1] if HAS_FACE_ATTRIBUTES else lines[-1] + NO_ATTRIBUTES_NOTE)
+        return {'FINISHED'}
+
+
+def register():
+    bpy.utils.register_class(PROJECTOR_OT_analyze_coverage)
+
+
+def unregister():
+    bpy.utils.unregister_class(PROJECTOR_OT_analyze_coverage)
@@ -0,0 +1,168 @@
+import time
+
+import bpy
+from bpy.app.handlers import persistent
+
+from .helper import scene_projectors
+from .projector import Dirty, Textures, batch_updates, mark_projector_dirty, projector_nodes
+
+# Outputs to recompute when the value at the same position of a snapshot changed.
+SNAPSHOT_DIRTY = (Dirty.FOV | Dirty.MAPPING_SCALE,
+                  Dirty.CAMERA_SHIFT | Dirty.MAPPING_TRANSLATION,
+                  Dirty.CAMERA_SHIFT | Dirty.MAPPING_TRANSLATION,
+                  Dirty.POWER,
+                  Dirty.POWER,
+                  Dirty.CHECKER_COLOR,
+                  Dirty.TEXTURE_IMAGE | Dirty.RESOLUTION,
+                  Dirty.LINK_TOPOLOGY | Dirty.TEXTURE_IMAGE | Dirty.RESOLUTION)
+# Outputs of driven projectors written here. The settings are stored in the camera object, which depends on its
+# camera data, so drivers on the camera data reading them form a dependency cycle.
+DRIVEN_DIRTY = Dirty.FOV | Dirty.CAMERA_SHIFT
+# Custom textures whose frame follows the frame of the scene, Blender advances them itself.
+MOVIE_SOURCES = ('MOVIE', 'SEQUENCE')
+
+# Last applied values of the animated projectors: projector pointer -> snapshot.
+# Pointers are not stable across undo and file loading, the snapshots are dropped then.
+_snapshots = {}
+
+
+class FrameStats:
+    """ Timing of the frame change handler. """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.frames = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+        self.checked = 0
+        self.updated = 0
+
+    def record(self, duration, checked, updated):
+        self.frames += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+        self.last = duration
+        self.checked += checked
+        self.updated += updated
+
+    @property
+    def mean(self):
+        return self.total / self.frames if self.frames else 0.0
+
+    def summary(self):
+        return {'frames': self.frames, 'mean_ms': self.mean * 1000, 'max_ms': self.max * 1000,
+                'last_ms': self.last * 1000, 'checked': self.checked, 'updated': self.updated}
+
+
+frame_stats = FrameStats()
+
+
+def is_animated(projector):
+    """ Return True if keyframes or drivers can change the settings of the projector. """
+    animation_data = projector.animation_data
+    return animation_data is not None and (animation_data.action is not None or len(animation_data.drivers) > 0)
+
+
+def enable_auto_refresh(projector, proj_settings):
+    """ Let a movie or an image sequence projected as custom texture follow the frame of the scene.
+    Blender only advances their frame with auto refresh, no output of the projector depends on it.
+    """
+    if proj_settings.projected_texture != Textures.CUSTOM_TEXTURE.value:
+        return
+    nodes = projector_nodes(projector, repair=False)
+    if nodes is None:
+        return
+    node = nodes.image_texture
+    if node.image is not None and node.image.source in MOVIE_SOURCES and not node.image_user.use_auto_refresh:
+        node.image_user.use_auto_refresh = True
+
+
+def snapshot(proj_settings):
+    """ Return the values of the settings which keyframes or drivers can change. """
+    return (proj_settings.throw_ratio, proj_settings.h_shift, proj_settings.v_shift,
+            proj_settings.power, proj_settings.lumens,
+            tuple(proj_settings.projected_color), proj_settings.resolution, proj_settings.projected_texture)
+
+
+def changed_outputs(previous, current, proj_settings):
+    """ Return the outputs which have to be recomputed between two snapshots. """
+    if previous is None:
+        return Dirty.ALL
+    dirty = Dirty.NONE
+    for old, new, outputs in zip(previous, current, SNAPSHOT_DIRTY):
+        if old != new:
+            dirty |= outputs
+    # The ID color pattern is generated in the checker color.
+    if dirty & Dirty.CHECKER_COLOR and proj_settings.projected_texture == Textures.ID_COLOR.value:
+        dirty |= Dirty.TEXTURE_IMAGE
+    return dirty
+
+
+def update_animated_projectors(scene):
+    """ Recompute the projectors of the scene whose animated settings changed since they were last applied.
+    Blender evaluates the drivers of driven projectors itself, only their camera is followed.
+    Return the numbers of checked and updated projectors.
+    """
+    checked = 0
+    updated = 0
+    projectors = scene_projectors(scene)
+    # Snapshots of deleted projectors.
+    for key in _snapshots.keys() - {projector.as_pointer() for projector in projectors}:
+        del _snapshots[key]
+    with batch_updates(bpy.context):
+        for projector in projectors:
+            proj_settings = projector.proj_settings
+            enable_auto_refresh(projector, proj_settings)
+            if not is_animated(projector):
+                continue
+            checked += 1
+            key = projector.as_pointer()
+            current = snapshot(proj_settings)
+            dirty = changed_outputs(_snapshots.get(key), current, proj_settings)
+            if proj_settings.use_drivers:
+                dirty &= DRIVEN_DIRTY
+            if dirty:
+                _snapshots[key] = current
+                mark_projector_dirty(projector, proj_settings, dirty)
+                updated += 1
+    return checked, updated
+
+
+def is_rendering():
+    """ Return True while a render job runs. Older Blender versions can not tell, they have no bpy.app.is_job_running. """
+    is_job_running = getattr(bpy.app, 'is_job_running', None)
+    return is_job_running is not None and is_job_running('RENDER')
+
+
+@persistent
+def _on_frame_change(scene, depsgraph=None):
+    """ Keyframed settings are written without their update callbacks, apply them after every frame change.
+    Renders evaluate the scene in their own thread, no data is written while they run.
+    """
+    if is_rendering():
+        return
+    start = time.perf_counter()
+    checked, updated = update_animated_projectors(scene)
+    frame_stats.record(time.perf_counter() - start, checked, updated)
+
+
+@persistent
+def _drop_snapshots(*args):
+    _snapshots.clear()
+
+
+def register():
+    bpy.app.handlers.frame_change_post.append(_on_frame_change)
+    for handlers in (bpy.app.handlers.load_post, bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+        handlers.append(_drop_snapshots)
+
+
+def unregister():
+    if _on_frame_change in bpy.app.handlers.frame_change_post:
+        bpy.app.handlers.frame_change_post.remove(_on_frame_change)
+    for handlers in (bpy.app.handlers.load_post, bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+        if _drop_snapshots in handlers:
+            handlers.remove(_drop_snapshots)
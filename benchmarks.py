@@ -0,0 +1,286 @@
+import argparse
+import importlib
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+import bpy
+
+
+def addon_module(name):
+    """ Return a submodule of the add-on, independent of the name of the add-on directory. """
+    for module_name, module in list(sys.modules.items()):
+        if getattr(module, '__dict__', {}).get('bl_info', {}).get('name') == 'Projector':
+            return importlib.import_module(f'{module_name}.{name}')
+
+
+def ensure_addon():
+    """ Register the add-on when the benchmarks run with the bpy module instead of inside Blender. """
+    if addon_module('projector') is None:
+        addon_dir = Path(__file__).resolve().parent
+        sys.path.insert(0, str(addon_dir.parent))
+        importlib.import_module(addon_dir.name).register()
+
+
+def clear_scene():
+    """ Remove all objects and the data the projectors leave behind. """
+    for obj in list(bpy.data.objects):
+        bpy.data.objects.remove(obj)
+    for collection in (bpy.data.cameras, bpy.data.lights, bpy.data.meshes):
+        for data in list(collection):
+            collection.remove(data)
+    bpy.context.scene.projector_registry.clear()
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def create_grid(count, spacing=1.0, instanced=False):
+    """ Create count projectors on a grid with 20 columns and return them. """
+    projector = addon_module('projector')
+    specs = [{'location': (i % 20 * spacing, i // 20 * spacing, 0)} for i in range(count)]
+    return projector.create_projectors(specs, instanced=instanced)
+
+
+def bench_create(counts=(10, 100, 1000), max_operator_count=1000):
+    """ Time the creation of count projectors with create_projectors and with the operator.
+    The operator gets slower with every projector in the scene, it is only timed up to max_operator_count.
+    """
+    projector = addon_module('projector')
+    results = {}
+    for count in counts:
+        clear_scene()
+        specs = [{'location': (i % 20, i // 20, 0)} for i in range(count)]
+        batch = timed(projector.create_projectors, specs)
+        results[count] = {'create_projectors_ms_per_projector': batch / count * 1000}
+
+        if count <= max_operator_count:
+            clear_scene()
+            operator = timed(lambda: [bpy.ops.projector.create() for _ in range(count)])
+            results[count]['operator_ms_per_projector'] = operator / count * 1000
+        clear_scene()
+    return results
+
+
+def bench_update(counts=(1, 100), repeat=20):
+    """ Time a throw ratio change on a single projector and on all projectors of a scene with count projectors.
+    The cost of the single update should not depend on the number of projectors in the scene.
+    """
+    results = {}
+    for count in counts:
+        clear_scene()
+        projectors = create_grid(count)
+        settings = projectors[0].proj_settings
+        single = timed(lambda: [setattr(settings, 'throw_ratio', 0.5 + i % 2) for i in range(repeat)])
+        every = timed(lambda: [setattr(p.proj_settings, 'throw_ratio', 0.5 + i % 2)
+                               for i in range(repeat) for p in projectors])
+        results[count] = {'single_update_ms': single / repeat * 1000,
+                          'update_all_ms': every / repeat * 1000}
+    clear_scene()
+    return results
+
+
+def bench_frame_change(count=200, frames=50):
+    """ Time frame changes in a scene with count projectors of which every tenth has a keyframed power.
+    The frame change handler only writes the projectors whose animated values changed.
+    """
+    clear_scene()
+    projectors = create_grid(count)
+    for projector in projectors[::10]:
+        settings = projector.proj_settings
+        settings.keyframe_insert('power', frame=1)
+        settings.power *= 2
+        settings.keyframe_insert('power', frame=frames // 2)
+    animation = addon_module('animation')
+    scene = bpy.context.scene
+    animation.frame_stats.reset()
+    frame_set = timed(lambda: [scene.frame_set(frame) for frame in range(1, frames + 1)])
+    results = {'frame_set_ms': frame_set / frames * 1000}
+    results.update(animation.frame_stats.summary())
+    clear_scene()
+    return results
+
+
+def bench_lookup(object_counts=(1000, 10000), projector_count=10, repeat=100):
+    """ Time the projector lookups the panel does on every redraw in a scene with many other objects.
+    All objects are selected, which is the worst case for the lookup of the selected projectors.
+    """
+    helper = addon_module('helper')
+    context = bpy.context
+    results = {}
+    for count in object_counts:
+        clear_scene()
+        create_grid(projector_count)
+        for i in range(count):
+            obj = bpy.data.objects.new(f'Empty.{i}', None)
+            context.scene.collection.objects.link(obj)
+        for obj in context.scene.objects:
+            obj.select_set(True)
+        selected = timed(lambda: [helper.get_projectors(context, only_selected=True) for _ in range(repeat)])
+        scene = timed(lambda: [helper.get_projectors(context) for _ in range(repeat)])
+        results[count] = {'selected_projectors_ms': selected / repeat * 1000,
+                          'scene_projectors_ms': scene / repeat * 1000}
+    clear_scene()
+    return results
+
+
+def bench_file(counts=(10, 100)):
+    """ Time saving and loading a .blend file with count projectors and measure its size. """
+    results = {}
+    with tempfile.TemporaryDirectory() as tempdir:
+        for count in counts:
+            clear_scene()
+            create_grid(count)
+            filepath = os.path.join(tempdir, f'projectors_{count}.blend')
+            save = timed(bpy.ops.wm.save_as_mainfile, filepath=filepath, copy=True)
+            load = timed(bpy.ops.wm.open_mainfile, filepath=filepath)
+            results[count] = {'save_ms': save * 1000,
+                              'load_ms': load * 1000,
+                              'size_kb': os.path.getsize(filepath) / 1024}
+    clear_scene()
+    return results
+
+
+def setup_render(samples, resolution):
+    scene = bpy.context.scene
+    scene.render.engine = 'CYCLES'
+    scene.cycles.device = 'CPU'
+    scene.cycles.samples = samples
+    scene.render.resolution_x, scene.render.resolution_y = resolution
+    scene.render.resolution_percentage = 100
+    scene.render.filepath = os.path.join(tempfile.gettempdir(), 'projector_bench.png')
+
+
+def lit_wall(count, instanced=False):
+    """ Create count projectors above a wall and a camera looking at it. Return the projectors. """
+    scene = bpy.context.scene
+    projectors = create_grid(count, spacing=0.1, instanced=instanced)
+    for projector in projectors:
+        projector.location.z = 2
+    bpy.ops.mesh.primitive_plane_add(size=20)
+    camera = bpy.data.objects.new('Render Camera', bpy.data.cameras.new('Render Camera'))
+    camera.location = (1, 0.5, 12)
+    scene.collection.objects.link(camera)
+    scene.camera = camera
+    return projectors
+
+
+def bench_render(counts=(1, 10, 100), samples=4, resolution=(160, 90)):
+    """ Time a small CPU Cycles render of a wall lit by count projectors. """
+    setup_render(samples, resolution)
+    results = {}
+    for count in counts:
+        clear_scene()
+        lit_wall(count)
+        results[count] = {'render_ms': timed(bpy.ops.render.render, write_still=False) * 1000}
+    clear_scene()
+    return results
+
+
+def bench_pixel_grid(count=50, samples=16, resolution=(320, 180)):
+    """ Time a render of count projectors showing their pixel grid, procedural and baked. """
+    setup_render(samples, resolution)
+    clear_scene()
+    projectors = lit_wall(count)
+    results = {}
+    for baked in (False, True):
+        for projector in projectors:
+            projector.proj_settings.show_pixel_grid = True
+            projector.proj_settings.bake_pixel_grid = baked
+        key = 'baked_render_ms' if baked else 'procedural_render_ms'
+        results[key] = timed(bpy.ops.render.render, write_still=False) * 1000
+    clear_scene()
+    return results
+
+
+def bench_instancing(count=64, repeat=20, samples=1, resolution=(160, 90)):
+    """ Compare count unique projectors with count instanced ones: the creation, an edit of one projector,
+    which changes all instances, the data in the file and a render, whose light and shader sync
+    grows with the number of light datablocks.
+    """
+    setup_render(samples, resolution)
+    results = {}
+    with tempfile.TemporaryDirectory() as tempdir:
+        for instanced in (False, True):
+            clear_scene()
+            create = timed(lit_wall, count, instanced)
+            settings = addon_module('helper').scene_projectors(bpy.context.scene)[0].proj_settings
+            edit = timed(lambda: [setattr(settings, 'throw_ratio', 0.5 + i % 2) for i in range(repeat)])
+            filepath = os.path.join(tempdir, f'instanced_{instanced}.blend')
+            bpy.ops.wm.save_as_mainfile(filepath=filepath, copy=True)
+            results['instanced' if instanced else 'unique'] = {
+                'create_ms': create * 1000,
+                'edit_ms': edit / repeat * 1000,
+                'lights': len(bpy.data.lights),
+                'cameras': len(bpy.data.cameras),
+                'size_kb': os.path.getsize(filepath) / 1024,
+                'render_ms': timed(bpy.ops.render.render, write_still=False) * 1000}
+    clear_scene()
+    return results
+
+
+def bench_warp(grids=(4, 16), repeat=20, count=10, samples=4, resolution=(160, 90)):
+    """ Time the edit of one control point of a grid warp, which bakes only the cells around it, against a full
+    bake of the warp map, and a render of count projectors without warp and with each grid.
+    The render does one lookup per shading sample, its cost does not depend on the number of control points.
+    """
+    projector = addon_module('projector')
+    warp = addon_module('warp')
+    setup_render(samples, resolution)
+    clear_scene()
+    projectors = lit_wall(count)
+    for proj in projectors:
+        proj.proj_settings.projected_texture = projector.Textures.COLOR_GRID.value
+    results = {'none': {'render_ms': timed(bpy.ops.render.render, write_still=False) * 1000}}
+    for size in grids:
+        for proj in projectors:
+            proj.proj_settings.warp_mode = 'GRID'
+            proj.proj_settings.warp_columns = size
+            proj.proj_settings.warp_rows = size
+        settings = projectors[0].proj_settings
+        point = settings.warp_points[size * size // 2]
+        edit = timed(lambda: [setattr(point, 'offset', (0.01 * (i % 2), 0)) for i in range(repeat)])
+        offsets = projector.warp_offsets(settings)
+        results[f'{size}x{size}'] = {
+            'edit_ms': edit / repeat * 1000,
+            'full_bake_ms': timed(warp.bake, offsets) * 1000,
+            'render_ms': timed(bpy.ops.render.render, write_still=False) * 1000}
+    clear_scene()
+    return results
+
+
+def run_benchmarks():
+    return {'blender': bpy.app.version_string,
+            'create': bench_create(),
+            'update': bench_update(),
+            'frame_change': bench_frame_change(),
+            'lookup': bench_lookup(),
+            'render': bench_render(),
+            'pixel_grid': bench_pixel_grid(),
+            'instancing': bench_instancing(),
+            'warp': bench_warp(),
+            # Loading a file replaces the scene, so this runs last.
+            'file': bench_file()}
+
+
+def parse_args():
+    """ Parse the arguments after '--', Blender keeps the ones before for itself. """
+    argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else sys.argv[1:]
+    parser = argparse.ArgumentParser(description='Benchmark the Projectors add-on.')
+    parser.add_argument('--output', help='Write the results to this JSON file instead of printing them.')
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    ensure_addon()
+    results = json.dumps(run_benchmarks(), indent=2)
+    if args.output:
+        Path(args.output).write_text(results)
+    else:
+        print(results)
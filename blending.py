@@ -0,0 +1,208 @@
+import math
+
+import bpy
+import numpy as np
+from bpy.types import Operator
+from mathutils import Vector
+
+from . import projection
+from .analysis import image_coordinates, occluders, projector_frustum, visible
+from .helper import get_projectors
+from .projector import BLEND_MASK_NODE, TEXTURE_PREFIX, projector_nodes, set_blend_mask
+from .sharing import make_single_projectors
+
+BLEND_PREFIX = TEXTURE_PREFIX + 'blend.'
+
+RAMPS = [('LINEAR', 'Linear', 'Blend linearly, the projections add up to the original brightness in the render'),
+         ('GAMMA', 'Gamma', 'Compensate the gamma of a physical projector, for masks used outside of Blender'),
+         ('COSINE', 'Cosine', 'Smooth S-shaped blend, the projections add up to the original brightness')]
+
+
+def surface_samples(frustum, target_bvh, columns, rows):
+    """ Cast a grid of rays through the image of a projector onto the target.
+    Return the world space hit points of shape (rows, columns, 3) and a boolean array of the hits.
+    """
+    s = (np.arange(columns) + 0.5) / columns - 0.5
+    t = (np.arange(rows) + 0.5) / rows - 0.5
+    local = projection.image_directions(s, t, frustum.throw_ratio, frustum.h_shift, frustum.v_shift,
+                                        projection.inverted_aspect_ratio(frustum.width, frustum.height)).reshape(-1, 3)
+    directions = local @ np.linalg.inv(frustum.world_to_local).T
+    directions /= np.linalg.norm(directions, axis=1)[:, None]
+
+    bvh, world_to_local = target_bvh.bvh, target_bvh.world_to_local
+    origin = world_to_local @ Vector(frustum.origin)
+    linear = world_to_local.to_3x3()
+    points = np.zeros((len(directions), 3))
+    hits = np.zeros(len(directions), dtype=bool)
+    for i, direction in enumerate(directions):
+        location = bvh.ray_cast(origin, (linear @ Vector(direction)).normalized())[0]
+        if location is not None:
+            points[i] = location
+            hits[i] = True
+    # The BVH tree works in the local space of the target.
+    local_to_world = np.array(world_to_local.inverted())
+    points = points @ local_to_world[:3, :3].T + local_to_world[:3, 3]
+    return points.reshape(rows, columns, 3), hits.reshape(rows, columns)
+
+
+def edge_distance(frustum, points, bvh_trees):
+    """ Return the distance in pixels of world space points to the closest image edge of a projector,
+    0 for points the projector does not reach.
+    """
+    u, v, depth = image_coordinates(frustum, points)
+    distance = np.minimum((0.5 - np.abs(u)) * frustum.width, (0.5 - np.abs(v)) * frustum.height)
+    distance = np.where((depth > 0) & (distance > 0), distance, 0)
+    inside = np.flatnonzero(distance)
+    if bvh_trees and len(inside):
+        distance[inside[~visible(frustum, points[inside], bvh_trees)]] = 0
+    return distance
+
+
+def apply_ramp(alpha, ramp, gamma=2.2):
+    """ Shape the blend weights, which rise from 0 at the image edge to 1 where no other projector overlaps. """
+    if ramp == 'GAMMA':
+        return alpha ** (1 / gamma)
+    if ramp == 'COSINE':
+        return 0.5 - 0.5 * np.cos(math.pi * alpha)
+    return alpha
+
+
+def upsample(grid, width, height):
+    """ Bilinearly interpolate a grid of samples at pixel centers to an image of width x height. """
+    rows, columns = grid.shape
+    x = np.clip((np.arange(width) + 0.5) * columns / width - 0.5, 0, columns - 1)
+    y = np.clip((np.arange(height) + 0.5) * rows / height - 0.5, 0, rows - 1)
+    x0 = np.minimum(x.astype(np.int32), columns - 2) if columns > 1 else np.zeros(width, np.int32)
+    y0 = np.minimum(y.astype(np.int32), rows - 2) if rows > 1 else np.zeros(height, np.int32)
+    fx = (x - x0).astype(np.float32)
+    fy = (y - y0).astype(np.float32)[:, None]
+    x1 = np.minimum(x0 + 1, columns - 1)
+    y1 = np.minimum(y0 + 1, rows - 1)
+    grid = grid.astype(np.float32)
+    top = grid[y0][:, x0] * (1 - fx) + grid[y0][:, x1] * fx
+    bottom = grid[y1][:, x0] * (1 - fx) + grid[y1][:, x1] * fx
+    return top * (1 - fy) + bottom * fy
+
+
+def blend_weights(projectors, target, depsgraph, samples=128, ramp='COSINE', gamma=2.2, occlusion=True):
+    """ Return for each projector a grid of blend weights in its image space.
+    Each weight is the distance of the surface point to the image edge of the projector,
+    divided by the sum of these distances for all projectors reaching the point.
+    """
+    frustums = [projector_frustum(projector) for projector in projectors]
+    target_bvh = occluders(depsgraph, [target])[0]
+    bvh_trees = occluders(depsgraph, depsgraph.scene.objects) if occlusion else []
+    weights = []
+    for i, frustum in enumerate(frustums):
+        rows = max(1, round(samples * frustum.height / frustum.width))
+        points, hits = surface_samples(frustum, target_bvh, samples, rows)
+        points = points[hits]
+        own = edge_distance(frustum, points, [])
+        total = own.copy()
+        for j, other in enumerate(frustums):
+            if j != i:
+                total += edge_distance(other, points, bvh_trees)
+        alpha = np.ones(hits.shape)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            alpha[hits] = np.where(total > 0, own / total, 1)
+        weights.append(apply_ramp(alpha, ramp, gamma))
+    return weights
+
+
+def write_mask(name, weights, width, height):
+    """ Write a grid of blend weights as a gray image of width x height and return the image. """
+    image = bpy.data.images.get(name)
+    if image and tuple(image.size) != (width, height):
+        bpy.data.images.remove(image)
+        image = None
+    if image is None:
+        image = bpy.data.images.new(name, width=width, height=height, alpha=False)
+        image.colorspace_settings.name = 'Non-Color'
+    mask = upsample(weights, width, height)
+    pixels = np.empty((height, width, 4), dtype=np.float32)
+    pixels[..., :3] = mask[..., None]
+    pixels[..., 3] = 1
+    image.pixels.foreach_set(pixels.ravel())
+    # Generated pixels are lost on save unless the image is packed.
+    image.pack()
+    return image
+
+
+def edge_blend(projectors, target, depsgraph=None, samples=128, ramp='COSINE', gamma=2.2, occlusion=True):
+    """ Generate an edge blend mask at the resolution of each projector and multiply it into its projection.
+    Instanced projectors get their own light data first, every projector needs its own mask.
+    Return the mask images.
+    """
+    if depsgraph is None:
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+    make_single_projectors(projectors)
+    images = []
+    for projector, weights in zip(projectors, blend_weights(projectors, target, depsgraph,
+                                                            samples, ramp, gamma, occlusion)):
+        frustum = projector_frustum(projector)
+        image = write_mask(BLEND_PREFIX + projector.name, weights, int(frustum.width), int(frustum.height))
+        set_blend_mask(projector_nodes(projector).spot, image)
+        images.append(image)
+    return images
+
+
+def clear_edge_blend(projectors):
+    """ Remove the edge blend masks of the projectors. """
+    for projector in projectors:
+        spot = projector_nodes(projector).spot
+        node = spot.data.node_tree.nodes.get(BLEND_MASK_NODE)
+        image = node.image if node else None
+        set_blend_mask(spot, None)
+        if image and image.users == 0:
+            bpy.data.images.remove(image)
+
+
+class PROJECTOR_OT_edge_blend(Operator):
+    """ Blend the overlapping projections of the selected projectors on the active mesh with feathered masks. """
+    bl_idname = 'projector.edge_blend'
+    bl_label = 'Edge Blend Projectors'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    ramp: bpy.props.EnumProperty(name='Ramp', items=RAMPS, default='COSINE')
+    gamma: bpy.props.FloatProperty(name='Gamma', default=2.2, min=1, max=4)
+    samples: bpy.props.IntProperty(
+        name='Samples',
+        description='Number of surface samples across the width of each projector image',
+        default=128, min=8, max=1024)
+    occlusion: bpy.props.BoolProperty(
+        name='Occlusion',
+        description='Exclude overlaps which are blocked by other geometry',
+        default=True)
+
+    @classmethod
+    def poll(cls, context):
+        return (context.active_object is not None and context.active_object.type == 'MESH'
+                and len(get_projectors(context, only_selected=True)) > 1)
+
+    def execute(self, context):
+        projectors = get_projectors(context, only_selected=True)
+        edge_blend(projectors, context.active_object, context.evaluated_depsgraph_get(),
+                   self.samples, self.ramp, self.gamma, self.occlusion)
+        self.report({'INFO'}, f'Blended {len(projectors)} projectors.')
+        return {'FINISHED'}
+
+
+class PROJECTOR_OT_clear_edge_blend(Operator):
+    """ Remove the edge blend masks of the selected projectors. """
+    bl_idname = 'projector.clear_edge_blend'
+    bl_label = 'Clear Edge Blend'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        clear_edge_blend(get_projectors(context, only_selected=True))
+        return {'FINISHED'}
+
+
+def register():
+    bpy.utils.register_class(PROJECTOR_OT_edge_blend)
+    bpy.utils.register_class(PROJECTOR_OT_clear_edge_blend)
+
+
+def unregister():
+    bpy.utils.unregister_class(PROJECTOR_OT_clear_edge_blend)
+    bpy.utils.unregister_class(PROJECTOR_OT_edge_blend)
@@ -1,31 +1,142 @@
 import fire
+import json
 import re
+import tarfile
 import zipfile
 import os
 from pathlib import Path
+import shutil
 import subprocess
+import sys
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from loguru import logger as log
 import tempfile
-from distutils.dir_util import copy_tree
-from typing import Dict
-
-blender_versions_dir = Path('/Applications/Blender Versions/')
-
-
-def blender_binaries(directory: Path) -> Dict:
-    """Return the names of the Blender .app and the paths to the blender binaries inside the .app directory."""
-    assert directory.is_dir()
-    app_binaries = {}
-    for app in directory.glob('Blender*.app'):
-        log.debug(f'found {app.name}')
+from typing import Dict, List
+
+# Directory with Blender builds: extracted directories or the official linux tarballs.
+blender_versions_dir = Path(os.environ.get('BLENDER_VERSIONS_DIR', '~/blender-versions')).expanduser()
+# Tarballs are extracted once into this subdirectory of the versions directory.
+EXTRACTED_DIR = '.extracted'
+TARBALL_SUFFIXES = ('.tar.xz', '.tar.bz2', '.tar.gz')
+# Minutes after which a hanging Blender is killed and its test cases count as errors.
+TEST_TIMEOUT = 30
+
+
+def _tarball_name(path: Path) -> str:
+    for suffix in TARBALL_SUFFIXES:
+        if path.name.endswith(suffix):
+            return path.name[:-len(suffix)]
+    return ''
+
+
+def extract_blender(tarball: Path, target: Path) -> Path:
+    """Extract a Blender tarball into target unless it was extracted before. Return the extracted directory."""
+    directory = target / _tarball_name(tarball)
+    if not directory.exists():
+        log.info(f'Extracting {tarball.name}')
+        partial = target / (directory.name + '.partial')
+        shutil.rmtree(partial, ignore_errors=True)
+        with tarfile.open(tarball) as tar:
+            # The data filter refuses members outside the target, Pythons without extraction filters trust the tarball.
+            if hasattr(tarfile, 'data_filter'):
+                tar.extractall(partial, filter='data')
+            else:
+                tar.extractall(partial)
+        # The tarballs contain one top level directory named like the tarball.
+        contents = list(partial.iterdir())
+        (contents[0] if len(contents) == 1 else partial).rename(directory)
+        shutil.rmtree(partial, ignore_errors=True)
+    return directory
+
+
+def blender_binaries(directory: Path, workers: int = None) -> Dict:
+    """Return the names and the blender binaries of the Blender builds in a directory.
+    Extracted linux builds, linux tarballs, which are extracted in parallel, and macOS .app bundles are found.
+    """
+    assert directory.is_dir(), f'Not a directory: {directory}'
+    tarballs = [path for path in sorted(directory.iterdir()) if _tarball_name(path)]
+    target = directory / EXTRACTED_DIR
+    target.mkdir(exist_ok=True)
+    with ThreadPoolExecutor(workers) as pool:
+        extracted = list(pool.map(lambda tarball: extract_blender(tarball, target), tarballs))
+
+    binaries = {}
+    for build in sorted(set(directory.glob('blender-*')) | set(extracted)):
+        binary = build / 'blender'
+        if binary.is_file():
+            binaries[build.name] = binary
+    for app in sorted(directory.glob('Blender*.app')):
         binary = app / 'Contents/MacOS/blender'
         if binary.exists():
-            app_binaries[app.name] = binary
+            binaries[app.name] = binary
         else:
             log.error(f'Binary does not exist: {binary}')
-
-    else:
-        return app_binaries
+    for name in binaries:
+        log.debug(f'found {name}')
+    return binaries
+
+
+@contextmanager
+def addon_scripts_dir():
+    """Mimic a Blender user scripts directory in a temp dir and copy the addon into it.
+    Yield the path of the scripts directory, Blender finds it with the BLENDER_USER_SCRIPTS environment variable.
+    """
+    with tempfile.TemporaryDirectory() as tempdir:
+        scripts_dir = Path(tempdir) / 'scripts'
+        addon_dir = scripts_dir / 'addons' / 'Projectors'
+        shutil.copytree(Path(__file__).parent, addon_dir,
+                        ignore=shutil.ignore_patterns('.git', 'builds', '__pycache__', EXTRACTED_DIR))
+        yield scripts_dir
+
+
+def run_tests(name: str, binary: Path, shard: int, shards: int) -> List[Dict]:
+    """Run one shard of the test cases with one Blender binary in its own user scripts directory.
+    Return the records of the test cases. A Blender that crashes or hangs is recorded as one error.
+    """
+    with addon_scripts_dir() as scripts_dir:
+        addon_dir = scripts_dir / 'addons' / 'Projectors'
+        output = scripts_dir / 'results.json'
+        args = [str(binary.resolve()), '--addons', 'Projectors', '--factory-startup', '-noaudio', '-b',
+                '-P', str(addon_dir / 'tests.py'), '--', '--shard', f'{shard}/{shards}', '--output', str(output)]
+        env = dict(os.environ, BLENDER_USER_SCRIPTS=str(scripts_dir))
+        try:
+            process = subprocess.run(args, env=env, cwd=addon_dir, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                     universal_newlines=True, timeout=TEST_TIMEOUT * 60)
+            log_text = process.stdout
+        except subprocess.TimeoutExpired as e:
+            log_text = f'Timed out after {TEST_TIMEOUT} minutes.\n{e.output or ""}'
+        if output.exists():
+            return json.loads(output.read_text())['tests']
+    log.error(f'{name} shard {shard}/{shards} did not finish:\n{log_text}')
+    return [{'id': f'tests.shard{shard}', 'outcome': 'error', 'message': log_text[-5000:], 'time': 0.0}]
+
+
+def count_outcomes(records: List[Dict]) -> Dict:
+    counts = {'passed': 0, 'failed': 0, 'error': 0, 'skipped': 0}
+    for record in records:
+        counts[record['outcome']] += 1
+    return counts
+
+
+def write_junit(path: Path, results: Dict):
+    """Write the test records of all Blender versions as one JUnit XML file, one test suite per version."""
+    testsuites = ET.Element('testsuites')
+    for name, records in results.items():
+        counts = count_outcomes(records)
+        suite = ET.SubElement(testsuites, 'testsuite', name=name, tests=str(len(records)),
+                              failures=str(counts['failed']), errors=str(counts['error']),
+                              skipped=str(counts['skipped']), time=f'{sum(r["time"] for r in records):.3f}')
+        for record in records:
+            classname, _, test_name = record['id'].rpartition('.')
+            case = ET.SubElement(suite, 'testcase', classname=f'{name}.{classname}', name=test_name,
+                                 time=f'{record["time"]:.3f}')
+            tag = {'failed': 'failure', 'error': 'error', 'skipped': 'skipped'}.get(record['outcome'])
+            if tag:
+                element = ET.SubElement(case, tag, message=record['message'].strip().split('\n')[-1][:200])
+                element.text = record['message']
+    ET.ElementTree(testsuites).write(str(path), encoding='utf-8', xml_declaration=True)
 
 
 class CMD(object):
@@ -54,41 +165,61 @@ class CMD(object):
             zf.write('LICENSE')
         return f'A realease zipfile was created: {zip_file}'
 
-    def test(self, versions_dir=None):
-        """ This function allows running the test suite agains different version of Blender.
-        !!MacOS only!!
+    def test(self, versions_dir=None, blenders=None, shards=2, workers=None,
+             output='test-results.json', junit='test-results.xml'):
+        """ Run the test suite against several versions of Blender at the same time.
+        The Blender builds are found in versions_dir, see blender_binaries, or given as a comma separated
+        list of binaries. The test cases of every version are split into shards, every shard runs in its own
+        Blender process with its own user scripts directory. The results are written as JSON and JUnit XML.
         """
-        versions_dir = versions_dir if versions_dir else blender_versions_dir
-        binaries = blender_binaries(versions_dir)
-
-        # 1) Mimic the Blender User Script directory.
-        # 2) Copy the addon into the temporally created structure.
-        # 3) Use the BLENDER_USER_SCRIPTS environment variable to point Blender to the created scripts directory.
-        with tempfile.TemporaryDirectory() as tempdir:
-            tempdir = Path(tempdir)
-            addon_dir = tempdir / 'scripts' / 'addons' / 'Projectors'
-            addon_dir.mkdir(parents=True)
-            scripts_dir = addon_dir.parent.parent
-            # Copy addon into temp dir.
-            copy_tree(str(Path(__file__).parent), str(addon_dir))
-
-            # Set the environment variable to the temp scripts dir.
-            os.environ['BLENDER_USER_SCRIPTS'] = str(scripts_dir)
-            log.debug(
-                f'BLENDER_USER_SCRIPTS: {os.environ.get("BLENDER_USER_SCRIPTS")}')
-
-            # Run the tests against all Blender versions.
-            for name, path in binaries.items():
-                print('\n'*3)
-                log.info(f'Testing against: {name}')
-                print('=='*50)
-                subprocess.run([str(path.resolve()), '--addons',
-                                'Projectors', '--factory-startup', '-noaudio', '-b', '-P', 'tests.py'])
-
-        log.debug(f'Temp dir { tempdir } was deleted: {not tempdir.exists()}')
-
+        if blenders:
+            paths = blenders.split(',') if isinstance(blenders, str) else blenders
+            binaries = {Path(path).resolve().parent.name: Path(path) for path in paths}
+        else:
+            binaries = blender_binaries(Path(versions_dir) if versions_dir else blender_versions_dir, workers)
+        if not binaries:
+            return 'No Blender builds found.'
+
+        jobs = [(name, binary, shard) for name, binary in binaries.items() for shard in range(shards)]
+        log.info(f'Testing {len(binaries)} Blender version(s) in {len(jobs)} processes.')
+        # Every job is a separate Blender process, the threads only wait for them.
+        with ThreadPoolExecutor(workers if workers else os.cpu_count()) as pool:
+            shard_records = pool.map(lambda job: run_tests(job[0], job[1], job[2], shards), jobs)
+            results = {name: [] for name in binaries}
+            for (name, _, _), records in zip(jobs, shard_records):
+                results[name].extend(records)
+
+        Path(output).write_text(json.dumps(results, indent=2))
+        write_junit(Path(junit), results)
+        failed = False
+        for name, records in results.items():
+            counts = count_outcomes(records)
+            failed = failed or counts['failed'] or counts['error']
+            log.info(f'{name}: ' + ', '.join(f'{count} {outcome}' for outcome, count in counts.items()))
+        if failed:
+            sys.exit(1)
         return 'Finished Testing'
 
+    def bench(self, blender=None, output='bench.json'):
+        """Run benchmarks.py headless and write the results as JSON to output.
+        Uses the given Blender binary, the blender on the PATH or, without either, the bpy module of this Python.
+        """
+        output = Path(output).resolve()
+        blender = blender if blender else shutil.which('blender')
+        with addon_scripts_dir() as scripts_dir:
+            script = scripts_dir / 'addons' / 'Projectors' / 'benchmarks.py'
+            if blender:
+                log.info(f'Benchmarking with: {blender}')
+                args = [blender, '--addons', 'Projectors', '--factory-startup', '-noaudio', '-b',
+                        '-P', str(script), '--', '--output', str(output)]
+            else:
+                log.info('No Blender binary found, benchmarking with the bpy module.')
+                args = [sys.executable, str(script), '--output', str(output)]
+            env = dict(os.environ, BLENDER_USER_SCRIPTS=str(scripts_dir))
+            subprocess.run(args, env=env, check=True)
+
+        return f'Benchmark results were written to: {output}'
+
 
 if __name__ == '__main__':
     fire.Fire(CMD)
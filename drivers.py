@@ -0,0 +1,129 @@
+import re
+
+from .helper import ADDON_ID, find_spot
+from .projection import LUMINOUS_EFFICACY
+
+# Driver variable name -> property of the projector settings.
+VARIABLES = {
+    'tr': 'throw_ratio',
+    'hs': 'h_shift',
+    'vs': 'v_shift',
+    'w': 'resolution_x',
+    'h': 'resolution_y',
+    'power': 'power',
+    'lm': 'lumens',
+}
+
+
+# Custom properties of the spot light holding the signed solid angles between the horizontal plane of the projector
+# and the top and the bottom edge of its image, driven by the settings. The lumens conversion is split into
+# several drivers, a driver expression has at most 255 characters.
+SOLID_ANGLE_KEYS = {'top': ADDON_ID.format('solid_angle_top'), 'bottom': ADDON_ID.format('solid_angle_bottom')}
+LUMENS_EXPRESSION = f'lm * 4 * pi / {LUMINOUS_EFFICACY} / (top - bottom)'
+
+
+def _solid_angle_expression(edge):
+    """ Return the simple expression of the solid angle up to an image edge, the shifts are in percent.
+    It is the difference of two corners of projection.image_solid_angle.
+    """
+    def corner(side):
+        return (f'atan({side} * {edge} * h / w / tr / 100 / '
+                f'sqrt(pow(100 * tr, 2) + pow({side}, 2) + pow({edge} * h / w, 2)))')
+    return f'{corner("(hs + 50)")} - {corner("(hs - 50)")}'
+
+
+def _lumens_values(spot):
+    """ Return (struct, data path, expression) for the drivers of the solid angle and the energy of a spot light
+    in lumens mode.
+    """
+    return [
+        (spot.data, f'["{SOLID_ANGLE_KEYS["top"]}"]', _solid_angle_expression('(vs + 50)')),
+        (spot.data, f'["{SOLID_ANGLE_KEYS["bottom"]}"]', _solid_angle_expression('(vs - 50)')),
+        (spot.data, 'energy', LUMENS_EXPRESSION),
+    ]
+
+
+def _driven_values(projector):
+    """ Return (struct, data path, expression) for every value of a projector that can be driven.
+    Only the spot light is driven, it does the actual projection. The settings are a property group of the camera
+    object, which depends on its camera data, so drivers on the camera data reading them form a dependency cycle.
+    The frame change handler of the animation module writes the camera instead.
+    """
+    spot = find_spot(projector)
+    nodes = spot.data.node_tree.nodes
+    group = nodes['Group']
+    pixel_grid = nodes['pixel_grid']
+    values = [
+        (group.inputs['Throw Ratio'], 'default_value', 'tr'),
+        (group.inputs['H Shift'], 'default_value', 'hs / 100'),
+        (group.inputs['V Shift'], 'default_value', 'vs / 100'),
+        (group.inputs['Inverted Aspect Ratio'], 'default_value', 'h / w'),
+        (pixel_grid.inputs['Width'], 'default_value', 'w'),
+        (pixel_grid.inputs['Height'], 'default_value', 'h'),
+    ]
+    if projector.proj_settings.use_lumens:
+        return values + _lumens_values(spot)
+    return values + [(spot.data, 'energy', 'power')]
+
+
+def _add_variable(driver, name, id_type, target, data_path):
+    var = driver.variables.new()
+    var.name = name
+    var.type = 'SINGLE_PROP'
+    var.targets[0].id_type = id_type
+    var.targets[0].id = target
+    var.targets[0].data_path = data_path
+
+
+def add_drivers(projector):
+    """ Drive the spot light and the node inputs of a projector by its settings.
+    The drivers only use simple expressions, Blender evaluates them without Python.
+    So animated settings work during playback and in renders with auto-run scripts disabled.
+    """
+    remove_drivers(projector)
+    spot = find_spot(projector)
+    if projector.proj_settings.use_lumens:
+        for key in SOLID_ANGLE_KEYS.values():
+            spot.data[key] = 0.0
+    for struct, data_path, expression in _driven_values(projector):
+        driver = struct.driver_add(data_path).driver
+        driver.type = 'SCRIPTED'
+        names = re.findall(r'[a-z_]+', expression)
+        for name, prop in VARIABLES.items():
+            if name in names:
+                _add_variable(driver, name, 'OBJECT', projector, f'proj_settings.{prop}')
+        for name, key in SOLID_ANGLE_KEYS.items():
+            if name in names:
+                _add_variable(driver, name, 'LIGHT', spot.data, f'["{key}"]')
+        driver.expression = expression
+
+
+def remove_drivers(projector):
+    """ Remove the drivers added by add_drivers, in both the power and the lumens mode. """
+    spot = find_spot(projector)
+    for struct, data_path, _ in _driven_values(projector) + _lumens_values(spot):
+        struct.driver_remove(data_path)
+    for key in SOLID_ANGLE_KEYS.values():
+        if key in spot.data:
+            del spot.data[key]
+
+
+def retarget_drivers(projector):
+    """ Let the drivers of the spot light of a projector read its settings.
+    Instanced projectors share the driven light, it has to read a projector which still exists.
+    """
+    for driver in get_drivers(projector):
+        for var in driver.variables:
+            target = var.targets[0]
+            if target.id_type == 'OBJECT' and target.id != projector:
+                target.id = projector
+
+
+def get_drivers(projector):
+    """ Return the drivers of a projector which exist. """
+    drivers = []
+    spot = find_spot(projector)
+    for id_data in (spot.data, spot.data.node_tree):
+        if id_data.animation_data:
+            drivers.extend(fcurve.driver for fcurve in id_data.animation_data.drivers)
+    return drivers
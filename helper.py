@@ -8,6 +8,8 @@ import colorsys
 
 FALLBACK_WARNING = 'Falling back to pre 2.8 Blender Python API: {}'
 ADDON_ID = 'protor_{}'
+PROJECTOR_TAG = ADDON_ID.format('projector')
+SPOT_TAG = ADDON_ID.format('spot')
 
 
 def random_color(alpha=False):
@@ -21,18 +23,41 @@ def random_color(alpha=False):
     return rgb
 
 
+def is_projector(obj):
+    """ Return True if the object is a projector camera.
+    Constant time check on the tag set at creation, independent of the object name.
+    """
+    return obj is not None and obj.type == 'CAMERA' and bool(obj.get(PROJECTOR_TAG))
+
+
+def find_spot(projector):
+    """ Return the spot light of a projector, None if it has none.
+    Projectors can have other children, e.g. objects the user parented to them, so the spot is found by its tag.
+    """
+    spot = None
+    for child in projector.children:
+        if child.get(SPOT_TAG):
+            return child
+        # Spot lights of older projectors may lack the tag.
+        if spot is None and child.type == 'LIGHT' and child.data.type == 'SPOT':
+            spot = child
+    return spot
+
+
 def get_projectors(context, only_selected=False):
-    """ Get all or only the selected projectors from the scene. """
-    objs = context.selected_objects if only_selected else context.scene.objects
-    projectors = []
-    for obj in objs:
-        if obj.type == 'CAMERA' and obj.name.startswith('Projector'):
-            if only_selected:
-                if obj.select_get():
-                    projectors.append(obj)
-            else:
-                projectors.append(obj)
-    return projectors
+    """ Get all or only the selected projectors from the scene.
+    All projectors are enumerated from the scene registry instead of scanning every object.
+    """
+    if only_selected:
+        return [obj for obj in context.selected_objects if is_projector(obj)]
+    return scene_projectors(context.scene)
+
+
+def scene_projectors(scene):
+    """ Return all projectors of a scene from its registry. """
+    # The registry module imports this one.
+    from .registry import registered_projectors
+    return registered_projectors(scene)
 
 
 def get_projector(context):
@@ -44,6 +69,14 @@ def get_projector(context):
         return None
 
 
+def new_group_socket(node_group, name, socket_type, in_out='INPUT'):
+    """ Add an input or output socket to a node group. The node group API changed with Blender 4.0. """
+    if bpy.app.version >= (4, 0):
+        return node_group.interface.new_socket(name, in_out=in_out, socket_type=socket_type)
+    sockets = node_group.inputs if in_out == 'INPUT' else node_group.outputs
+    return sockets.new(socket_type, name)
+
+
 def auto_offset():
     offset = 0
 
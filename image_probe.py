@@ -0,0 +1,161 @@
+import ctypes
+import io
+import os
+import struct
+
+# Image dimensions by filepath: filepath -> ((modification time, file size), dimensions).
+_size_cache = {}
+# Dimensions of packed images: (packed file pointer, data size) -> dimensions.
+# Packing an image again allocates a new packed file, the size guards against a reused pointer.
+_packed_size_cache = {}
+
+# Bytes of a packed image probed for its header, bpy copies the whole packed file on every access of its data.
+HEADER_SIZE = 64 * 1024
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+EXR_MAGIC = b'\x76\x2f\x31\x01'
+# JPEG start of frame markers, they hold the image dimensions.
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+                    0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def _png_size(f):
+    f.seek(16)
+    return struct.unpack('>II', f.read(8))
+
+
+def _jpeg_size(f):
+    f.seek(2)
+    while True:
+        byte = f.read(1)
+        while byte and byte != b'\xff':
+            byte = f.read(1)
+        while byte == b'\xff':
+            byte = f.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        if marker in (0x01, 0xD8) or 0xD0 <= marker <= 0xD7:
+            continue
+        if marker == 0xD9:
+            return None
+        length = struct.unpack('>H', f.read(2))[0]
+        if marker in JPEG_SOF_MARKERS:
+            height, width = struct.unpack('>xHH', f.read(5))
+            return width, height
+        f.seek(length - 2, io.SEEK_CUR)
+
+
+def _read_string(f):
+    chars = bytearray()
+    while True:
+        char = f.read(1)
+        if not char:
+            return None
+        if char == b'\x00':
+            return chars.decode('latin-1')
+        chars += char
+
+
+def _exr_size(f):
+    f.seek(8)
+    while True:
+        name = _read_string(f)
+        if not name:
+            return None
+        attr_type = _read_string(f)
+        size = struct.unpack('<i', f.read(4))[0]
+        if name == 'dataWindow' and attr_type == 'box2i':
+            xmin, ymin, xmax, ymax = struct.unpack('<iiii', f.read(16))
+            return xmax - xmin + 1, ymax - ymin + 1
+        f.seek(size, io.SEEK_CUR)
+
+
+def _tiff_size(f):
+    f.seek(0)
+    endian = '<' if f.read(2) == b'II' else '>'
+    if struct.unpack(endian + 'H', f.read(2))[0] != 42:
+        return None  # BigTIFF
+    ifd_offset = struct.unpack(endian + 'I', f.read(4))[0]
+    f.seek(ifd_offset)
+    count = struct.unpack(endian + 'H', f.read(2))[0]
+    dimensions = {}
+    for _ in range(count):
+        tag, field_type, _, value = struct.unpack(endian + 'HHI4s', f.read(12))
+        if tag in (256, 257):
+            fmt = 'H' if field_type == 3 else 'I'
+            dimensions[tag] = struct.unpack(endian + fmt, value[:struct.calcsize(fmt)])[0]
+    if 256 in dimensions and 257 in dimensions:
+        return dimensions[256], dimensions[257]
+    return None
+
+
+def read_size(f):
+    """ Return (width, height) from the header of a PNG, JPEG, EXR or TIFF file object, None for other formats. """
+    head = f.read(8)
+    try:
+        if head.startswith(PNG_SIGNATURE):
+            return tuple(_png_size(f))
+        if head.startswith(b'\xff\xd8'):
+            return _jpeg_size(f)
+        if head.startswith(EXR_MAGIC):
+            return _exr_size(f)
+        if head[:4] in (b'II*\x00', b'MM\x00*'):
+            return _tiff_size(f)
+    except (struct.error, ValueError):
+        return None
+    return None
+
+
+def probe_bytes(data):
+    """ Return (width, height) from the header of an image in memory. """
+    return read_size(io.BytesIO(data))
+
+
+def probe_file(filepath):
+    """ Return (width, height) from the header of an image file. Cached until the file changes. """
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return None
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cached = _size_cache.get(filepath)
+    if cached is None or cached[0] != stamp:
+        with open(filepath, 'rb') as f:
+            cached = (stamp, read_size(f))
+        _size_cache[filepath] = cached
+    return cached[1]
+
+
+class _PackedFile(ctypes.Structure):
+    """ The leading fields of Blender's PackedFile struct. """
+    _fields_ = [('size', ctypes.c_int), ('seek', ctypes.c_int), ('data', ctypes.c_void_p)]
+
+
+def packed_data(packed_file, length=None):
+    """ Return a read-only view of the data of a packed file, or of its first length bytes, without copying it.
+    Falls back to a copy of the data if the struct does not match the RNA of the packed file.
+    """
+    fields = _PackedFile.from_address(packed_file.as_pointer())
+    if not fields.data or fields.size != packed_file.size:
+        return memoryview(packed_file.data)[:length]
+    length = fields.size if length is None else min(length, fields.size)
+    return memoryview((ctypes.c_char * length).from_address(fields.data)).cast('B').toreadonly()
+
+
+def probe_packed(packed_file):
+    """ Return (width, height) from the header of a packed image. Cached until the packed file changes.
+    Only the first HEADER_SIZE bytes are read unless the header is longer, e.g. a JPEG with a large thumbnail.
+    """
+    key = (packed_file.as_pointer(), packed_file.size)
+    if key not in _packed_size_cache:
+        size = probe_bytes(packed_data(packed_file, HEADER_SIZE))
+        if size is None and packed_file.size > HEADER_SIZE:
+            size = probe_bytes(packed_data(packed_file))
+        _packed_size_cache[key] = size
+    return _packed_size_cache[key]
+
+
+def clear_cache():
+    _size_cache.clear()
+    _packed_size_cache.clear()
@@ -0,0 +1,153 @@
+""" Calibration test patterns generated with NumPy.
+Every generator returns an array of shape (height, width, 4) with float32 RGBA values,
+its rows ordered bottom to top like the pixels of a Blender image.
+"""
+import numpy as np
+
+BLACK = (0, 0, 0)
+WHITE = (1, 1, 1)
+
+# 3x5 pixel digits, one string of five rows per digit.
+DIGITS = ['111101101101111', '010110010010111', '111001111100111', '111001111001111', '101101111001001',
+          '111100111001111', '111100111101111', '111001001001001', '111101111101111', '111101111001111']
+
+# 75% color bars and the rows below them, colors in display space.
+SMPTE_BARS = [(.75, .75, .75), (.75, .75, 0), (0, .75, .75), (0, .75, 0), (.75, 0, .75), (.75, 0, 0), (0, 0, .75)]
+SMPTE_CASTELLATIONS = [(0, 0, .75), BLACK, (.75, 0, .75), BLACK, (0, .75, .75), BLACK, (.75, .75, .75)]
+SMPTE_PLUGE = [((0, .13, .29), 5 / 28), (WHITE, 5 / 28), ((.2, 0, .42), 5 / 28), (BLACK, 5 / 28),
+               ((.035,) * 3, 1 / 21), ((.075,) * 3, 1 / 21), ((.115,) * 3, 1 / 21), (BLACK, 1 / 7)]
+
+
+def _canvas(width, height, color=BLACK):
+    canvas = np.empty((height, width, 4), dtype=np.float32)
+    canvas[..., :3] = color
+    canvas[..., 3] = 1
+    return canvas
+
+
+def _finish(canvas):
+    """ Patterns are drawn top to bottom, Blender images start with the bottom row. """
+    return np.ascontiguousarray(canvas[::-1])
+
+
+def _lines(canvas, positions, thickness, axis, color=WHITE):
+    """ Draw lines of a thickness centered on pixel positions, vertical for axis 1 and horizontal for axis 0. """
+    size = canvas.shape[1 - axis]
+    offsets = np.arange(thickness) - thickness // 2
+    indices = np.clip(np.add.outer(np.asarray(positions, dtype=int), offsets).ravel(), 0, size - 1)
+    if axis:
+        canvas[:, indices, :3] = color
+    else:
+        canvas[indices, :, :3] = color
+
+
+def text_mask(text, scale=1):
+    """ Return a boolean array with the digits of text, each digit 3x5 pixels times scale. """
+    glyphs = []
+    for char in text:
+        glyph = np.array([c == '1' for c in DIGITS[int(char)]]).reshape(5, 3)
+        glyphs.extend([glyph, np.zeros((5, 1), dtype=bool)])
+    mask = np.hstack(glyphs[:-1])
+    return np.kron(mask, np.ones((scale, scale), dtype=bool))
+
+
+def crosshair(width, height, thickness=2, ticks=10):
+    """ A centered crosshair with diagonals, a border and tick marks at every tenth of the image. """
+    canvas = _canvas(width, height)
+    _lines(canvas, [width // 2], thickness, axis=1)
+    _lines(canvas, [height // 2], thickness, axis=0)
+    _lines(canvas, [thickness // 2, width - 1 - thickness // 2], thickness, axis=1)
+    _lines(canvas, [thickness // 2, height - 1 - thickness // 2], thickness, axis=0)
+    rows = np.arange(height)
+    columns = np.add.outer(rows * width // height, np.arange(thickness) - thickness // 2).clip(0, width - 1)
+    canvas[rows[:, None], columns, :3] = WHITE
+    canvas[rows[:, None], width - 1 - columns, :3] = WHITE
+    tick = max(height, width) // 50
+    for i in range(1, ticks):
+        x_tick, y_tick = width * i // ticks, height * i // ticks
+        canvas[height // 2 - tick:height // 2 + tick, x_tick - thickness // 2:x_tick + thickness - thickness // 2, :3] = WHITE
+        canvas[y_tick - thickness // 2:y_tick + thickness - thickness // 2, width // 2 - tick:width // 2 + tick, :3] = WHITE
+    return _finish(canvas)
+
+
+def numbered_grid(width, height, cell=100, thickness=1):
+    """ Grid lines every cell pixels, every cell labeled with its number, counted row by row from the top left. """
+    canvas = _canvas(width, height)
+    _lines(canvas, np.arange(0, width, cell), thickness, axis=1)
+    _lines(canvas, np.arange(0, height, cell), thickness, axis=0)
+    scale = max(1, cell // 25)
+    columns = -(-width // cell)
+    for row, y in enumerate(range(0, height, cell)):
+        for column, x in enumerate(range(0, width, cell)):
+            mask = text_mask(str(row * columns + column), scale)
+            y0, x0 = y + 2 * scale, x + 2 * scale
+            region = canvas[y0:y0 + mask.shape[0], x0:x0 + mask.shape[1], :3]
+            region[mask[:region.shape[0], :region.shape[1]]] = WHITE
+    return _finish(canvas)
+
+
+def id_color(width, height, color=WHITE, border=8):
+    """ The identification color of a projector with a white border to find its edges. """
+    canvas = _canvas(width, height, color)
+    _lines(canvas, [border // 2, width - 1 - border // 2], border, axis=1)
+    _lines(canvas, [border // 2, height - 1 - border // 2], border, axis=0)
+    return _finish(canvas)
+
+
+def gray_ramp(width, height, steps=11):
+    """ A continuous black to white ramp in the upper half, the same ramp in steps in the lower half. """
+    canvas = _canvas(width, height)
+    ramp = np.linspace(0, 1, width, dtype=np.float32)
+    stepped = np.minimum(np.floor(ramp * steps), steps - 1) / (steps - 1)
+    canvas[:height // 2, :, :3] = ramp[None, :, None]
+    canvas[height // 2:, :, :3] = stepped[None, :, None]
+    return _finish(canvas)
+
+
+def smpte_bars(width, height):
+    """ SMPTE style color bars: 75% bars, the reversed castellations and the -I, white, +Q and pluge row. """
+    canvas = _canvas(width, height)
+    bar_edges = np.linspace(0, width, len(SMPTE_BARS) + 1).astype(int)
+    top, middle = int(height * 2 / 3), int(height * 3 / 4)
+    for i, (start, end) in enumerate(zip(bar_edges[:-1], bar_edges[1:])):
+        canvas[:top, start:end, :3] = SMPTE_BARS[i]
+        canvas[top:middle, start:end, :3] = SMPTE_CASTELLATIONS[i]
+    start = 0
+    for color, fraction in SMPTE_PLUGE:
+        end = min(width, start + int(round(width * fraction)))
+        canvas[middle:, start:end, :3] = color
+        start = end
+    return _finish(canvas)
+
+
+def circle_grid(width, height, spacing=100, radius=0.25):
+    """ Filled white circles on a black background, spacing pixels apart and centered on the image. """
+    canvas = _canvas(width, height)
+    x = (np.arange(width) - width / 2 + 0.5) % spacing - spacing / 2
+    y = (np.arange(height) - height / 2 + 0.5) % spacing - spacing / 2
+    inside = (x[None, :] ** 2 + y[:, None] ** 2) <= (radius * spacing) ** 2
+    canvas[inside, :3] = WHITE
+    return _finish(canvas)
+
+
+PATTERNS = {
+    'crosshair': crosshair,
+    'numbered_grid': numbered_grid,
+    'id_color': id_color,
+    'gray_ramp': gray_ramp,
+    'smpte_bars': smpte_bars,
+    'circle_grid': circle_grid,
+}
+
+
+def generate(pattern, width, height, **params):
+    """ Return the pixels of a pattern at a resolution. """
+    return PATTERNS[pattern](width, height, **params)
+
+
+def cache_key(pattern, width, height, params):
+    """ Return a name unique for the pattern, the resolution and the parameters. """
+    key = f'{pattern}.{width}x{height}'
+    if params:
+        key += '.' + '_'.join(f'{name}={value}' for name, value in sorted(params.items()))
+    return key
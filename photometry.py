@@ -0,0 +1,157 @@
+from collections import namedtuple
+
+import bpy
+import numpy as np
+from bpy.types import Operator
+
+from . import projection
+from .analysis import (HAS_FACE_ATTRIBUTES, NO_ATTRIBUTES_NOTE, face_data, frustum_hits, occluders, projector_frustum,
+                       visible, write_face_attribute)
+from .helper import get_projectors
+from .projector import projector_nodes
+
+# Face attributes written to the estimated mesh.
+ILLUMINANCE_ATTRIBUTE = 'projector_illuminance'
+LUMINANCE_ATTRIBUTE = 'projector_luminance'
+EXPOSURE_ATTRIBUTE = 'projector_exposure'
+
+# Values of the exposure attribute.
+UNLIT, UNDER, GOOD, OVER = range(4)
+
+Photometry = namedtuple('Photometry', ['illuminance', 'luminance', 'exposure', 'projectors', 'total'])
+
+
+def projector_intensity(projector):
+    """ Return the luminous intensity in candela of a projector showing a full white image. """
+    return projection.luminous_intensity(projector_nodes(projector).spot.data.energy)
+
+
+def estimate_illuminance(target, projectors, depsgraph=None, occlusion=True, reflectance=0.8,
+                         min_lux=0.0, max_lux=np.inf, write_attributes=True):
+    """ Predict the illuminance in lux on each face of the target mesh object without rendering.
+    Each projector is a point light showing a full white image, its illuminance follows the inverse square
+    and the cosine law and adds up where projectors overlap. Textures and edge blend masks are not taken into account.
+    Per face it returns the illuminance, the luminance in nits of a diffuse surface with the reflectance
+    and the exposure: UNLIT, UNDER min_lux, GOOD or OVER max_lux. Plus a summary per projector and for the whole mesh.
+    """
+    if depsgraph is None:
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+    centers, normals, areas = face_data(target, depsgraph)
+    lux = np.zeros(len(areas))
+    blockers = occluders(depsgraph, depsgraph.scene.objects) if occlusion else []
+
+    summaries = []
+    for projector in projectors:
+        frustum = projector_frustum(projector)
+        indices, _, incidence = frustum_hits(frustum, centers, normals)
+        if blockers and len(indices):
+            unblocked = visible(frustum, centers[indices], blockers)
+            indices, incidence = indices[unblocked], incidence[unblocked]
+
+        distance = np.linalg.norm(frustum.origin - centers[indices], axis=1)
+        projector_lux = projection.illuminance(projector_intensity(projector), distance, np.cos(incidence))
+        lux[indices] += projector_lux
+
+        hit_areas = areas[indices]
+        area = float(hit_areas.sum())
+        summaries.append({
+            'projector': projector.name,
+            'faces': len(indices),
+            'area': area,
+            # The flux the target receives from the projector.
+            'lumens': float((projector_lux * hit_areas).sum()),
+            'min_lux': float(projector_lux.min()) if len(indices) else 0.0,
+            'max_lux': float(projector_lux.max()) if len(indices) else 0.0,
+        })
+
+    lit = lux > 0
+    exposure = np.full(len(areas), UNLIT, dtype=np.int32)
+    exposure[lit] = GOOD
+    exposure[lit & (lux < min_lux)] = UNDER
+    exposure[lit & (lux > max_lux)] = OVER
+    luminance = projection.luminance(lux, reflectance)
+
+    lit_area = float(areas[lit].sum())
+    total = {
+        'faces': len(areas),
+        'area': float(areas.sum()),
+        'lit_area': lit_area,
+        'under_area': float(areas[exposure == UNDER].sum()),
+        'over_area': float(areas[exposure == OVER].sum()),
+        'min_lux': float(lux[lit].min()) if lit_area else 0.0,
+        'mean_lux': float((lux * areas).sum() / lit_area) if lit_area else 0.0,
+        'max_lux': float(lux.max()) if len(lux) else 0.0,
+    }
+    if write_attributes and len(target.data.polygons) == len(areas):
+        write_face_attribute(target.data, ILLUMINANCE_ATTRIBUTE, 'FLOAT', lux)
+        write_face_attribute(target.data, LUMINANCE_ATTRIBUTE, 'FLOAT', luminance)
+        write_face_attribute(target.data, EXPOSURE_ATTRIBUTE, 'INT', exposure)
+    return Photometry(lux, luminance, exposure, summaries, total)
+
+
+def format_summary(photometry, reflectance=0.8):
+    """ Return the summary of an illuminance estimate as lines of a table. """
+    lines = [f'{"Projector":<24}{"Faces":>8}{"Area m²":>10}{"Lumens":>10}{"Min lx":>10}{"Max lx":>10}']
+    for row in photometry.projectors:
+        lines.append(f'{row["projector"]:<24}{row["faces"]:>8}{row["area"]:>10.2f}{row["lumens"]:>10.0f}'
+                     f'{row["min_lux"]:>10.1f}{row["max_lux"]:>10.1f}')
+    total = photometry.total
+    lit = total['lit_area']
+    under = total['under_area'] / lit * 100 if lit else 0
+    over = total['over_area'] / lit * 100 if lit else 0
+    nits = projection.luminance(total['mean_lux'], reflectance)
+    lines.append(f'{total["min_lux"]:.0f}-{total["max_lux"]:.0f} lx, mean {total["mean_lux"]:.0f} lx '
+                 f'({nits:.0f} nits), lit {lit:.2f} m², under: {under:.1f}%, over: {over:.1f}%')
+    return lines
+
+
+class PROJECTOR_OT_estimate_illuminance(Operator):
+    """ Estimate the illuminance of a full white image of the selected projectors (or all projectors)
+    on the active mesh and flag under- and overexposed faces. The results are stored as face attributes. """
+    bl_idname = 'projector.estimate_illuminance'
+    bl_label = 'Estimate Illuminance'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    min_lux: bpy.props.FloatProperty(
+        name='Min Illuminance',
+        description='Faces lit with less lux are underexposed',
+        default=100, min=0)
+    max_lux: bpy.props.FloatProperty(
+        name='Max Illuminance',
+        description='Faces lit with more lux are overexposed',
+        default=2000, min=0)
+    reflectance: bpy.props.FloatProperty(
+        name='Reflectance',
+        description='Diffuse reflectance of the surface, converts the illuminance to luminance',
+        default=0.8, min=0, max=1, subtype='FACTOR')
+    occlusion: bpy.props.BoolProperty(
+        name='Occlusion',
+        description='Ray cast every hit face to exclude faces blocked by other geometry',
+        default=True)
+
+    @classmethod
+    def poll(cls, context):
+        return context.active_object is not None and context.active_object.type == 'MESH'
+
+    def execute(self, context):
+        projectors = get_projectors(context, only_selected=True) or get_projectors(context)
+        if not projectors:
+            self.report({'WARNING'}, 'There are no projectors to estimate.')
+            return {'CANCELLED'}
+        photometry = estimate_illuminance(context.active_object, projectors,
+                                          depsgraph=context.evaluated_depsgraph_get(),
+                                          occlusion=self.occlusion, reflectance=self.reflectance,
+                                          min_lux=self.min_lux, max_lux=self.max_lux)
+        lines = format_summary(photometry, self.reflectance)
+        total = photometry.total
+        message = lines[-1] if HAS_FACE_ATTRIBUTES else lines[-1] + NO_ATTRIBUTES_NOTE
+        self.report({'WARNING'} if total['under_area'] or total['over_area'] else {'INFO'}, message)
+        return {'FINISHED'}
+
+
+def register():
+    bpy.utils.register_class(PROJECTOR_OT_estimate_illuminance)
+
+
+def unregister():
+    bpy.utils.unregister_class(PROJECTOR_OT_estimate_illuminance)
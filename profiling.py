@@ -0,0 +1,214 @@
+import cProfile
+import functools
+import json
+import os
+import time
+
+import bpy
+from bpy.props import BoolProperty
+from bpy.types import AddonPreferences, Operator, Panel
+from bpy_extras.io_utils import ExportHelper
+
+from .projector import ProjectorSettings
+
+ADDON_PACKAGE = __name__.rpartition('.')[0]
+# Set to 1 to profile from the start of the session, e.g. before the preferences can be changed.
+ENV_VAR = 'PROJECTORS_PROFILE'
+# The debug panel and the profiling operators are not profiled, they would show up in their own results.
+DEBUG_PANEL = 'PROJECTOR_PT_profiling'
+
+
+class Timing:
+    """ Call count, cumulative and max wall time of one profiled function. """
+    __slots__ = ('calls', 'total', 'max')
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+
+
+class Profiler:
+    """ Times the wrapped operators, update callbacks and panels and collects a cProfile of everything they call. """
+
+    def __init__(self):
+        self._depth = 0
+        self.reset()
+
+    def reset(self):
+        self.timings = {}
+        self.profile = cProfile.Profile()
+
+    def wrap(self, key, func):
+        """ Return func timed under key. Calls nested in other profiled calls are timed but profiled only once.
+        Blender checks the argument count of callbacks, all wrapped functions take two: (self, context).
+        """
+        @functools.wraps(func)
+        def wrapper(self_, context):
+            outermost = not self._depth
+            if outermost:
+                self.profile.enable()
+            self._depth += 1
+            start = time.perf_counter()
+            try:
+                return func(self_, context)
+            finally:
+                self.record(key, time.perf_counter() - start)
+                self._depth -= 1
+                if outermost:
+                    self.profile.disable()
+        return wrapper
+
+    def record(self, key, duration):
+        timing = self.timings.get(key)
+        if timing is None:
+            timing = self.timings[key] = Timing()
+        timing.calls += 1
+        timing.total += duration
+        timing.max = max(timing.max, duration)
+
+    def report(self):
+        """ Return the timings sorted by their cumulative time, times in milliseconds. """
+        rows = [{'name': key, 'calls': t.calls, 'total_ms': t.total * 1000, 'max_ms': t.max * 1000}
+                for key, t in self.timings.items()]
+        return sorted(rows, key=lambda row: row['total_ms'], reverse=True)
+
+    def dump_json(self, filepath):
+        with open(filepath, 'w') as f:
+            json.dump({'blender': bpy.app.version_string, 'timings': self.report()}, f, indent=2)
+
+    def dump_stats(self, filepath):
+        """ Write the collected profile in the pstats format, e.g. for snakeviz. """
+        self.profile.dump_stats(filepath)
+
+
+profiler = Profiler()
+
+# Replaced attributes while profiling is enabled: (owner, attribute name, original value).
+_originals = []
+
+
+def is_profiling():
+    return bool(_originals)
+
+
+def addon_classes(base):
+    """ Return all subclasses of a bpy type defined by the add-on. """
+    classes = []
+    pending = [base]
+    while pending:
+        cls = pending.pop()
+        for subclass in cls.__subclasses__():
+            pending.append(subclass)
+            if subclass.__module__.startswith(ADDON_PACKAGE + '.') and subclass.__module__ != __name__:
+                classes.append(subclass)
+    return classes
+
+
+def _replace(owner, name, original, value):
+    _originals.append((owner, name, original))
+    setattr(owner, name, value)
+
+
+def enable_profiling():
+    """ Wrap the operators, the update callbacks of the projector settings and the panels of the add-on.
+    The originals are restored by disable_profiling, nothing is timed while profiling is disabled.
+    """
+    if is_profiling():
+        return
+    try:
+        _wrap_addon()
+    except Exception:
+        disable_profiling()
+        raise
+
+
+def _wrap_addon():
+    for cls in addon_classes(Operator):
+        if 'execute' in cls.__dict__:
+            original = cls.__dict__['execute']
+            _replace(cls, 'execute', original, profiler.wrap(f'operator {cls.bl_idname}', original))
+    for cls in addon_classes(Panel):
+        if 'draw' in cls.__dict__ and cls.__name__ != DEBUG_PANEL:
+            original = cls.__dict__['draw']
+            _replace(cls, 'draw', original, profiler.wrap(f'draw {cls.bl_label}', original))
+    # Update callbacks are stored in the registered properties, they are wrapped by redefining the properties.
+    # The values are kept, they are stored by property name.
+    for name, prop in list(ProjectorSettings.__annotations__.items()):
+        update = prop.keywords.get('update')
+        if update is not None:
+            keywords = dict(prop.keywords, update=profiler.wrap(f'update {name}', update))
+            _replace(ProjectorSettings, name, prop, prop.function(**keywords))
+
+
+def disable_profiling():
+    while _originals:
+        owner, name, original = _originals.pop()
+        setattr(owner, name, original)
+
+
+def update_use_profiling(preferences, context):
+    if preferences.use_profiling:
+        enable_profiling()
+    else:
+        disable_profiling()
+
+
+class ProjectorPreferences(AddonPreferences):
+    bl_idname = ADDON_PACKAGE
+
+    use_profiling: BoolProperty(
+        name='Profiling',
+        description='Time the operators, property updates and panels of the add-on. '
+                    f'The results are shown in the Profiling panel. Can also be enabled with {ENV_VAR}=1',
+        default=False,
+        update=update_use_profiling)
+
+    def draw(self, context):
+        self.layout.prop(self, 'use_profiling')
+
+
+class PROJECTOR_OT_reset_profile(Operator):
+    """ Discard the collected timings. """
+    bl_idname = 'projector.reset_profile'
+    bl_label = 'Reset Profile'
+
+    def execute(self, context):
+        profiler.reset()
+        return {'FINISHED'}
+
+
+class PROJECTOR_OT_dump_profile(Operator, ExportHelper):
+    """ Write the collected timings to a JSON file or the collected profile to a pstats file. """
+    bl_idname = 'projector.dump_profile'
+    bl_label = 'Dump Profile'
+
+    filename_ext = '.json'
+    use_pstats: BoolProperty(name='pstats', description='Write the cProfile statistics instead of JSON timings',
+                             default=False)
+
+    def execute(self, context):
+        if self.use_pstats:
+            filepath = os.path.splitext(self.filepath)[0] + '.pstats'
+            profiler.dump_stats(filepath)
+        else:
+            filepath = self.filepath
+            profiler.dump_json(filepath)
+        self.report({'INFO'}, f'Wrote {filepath}')
+        return {'FINISHED'}
+
+
+def register():
+    bpy.utils.register_class(ProjectorPreferences)
+    bpy.utils.register_class(PROJECTOR_OT_reset_profile)
+    bpy.utils.register_class(PROJECTOR_OT_dump_profile)
+    addon = bpy.context.preferences.addons.get(ADDON_PACKAGE)
+    if os.environ.get(ENV_VAR, '0') not in ('', '0') or (addon and addon.preferences.use_profiling):
+        enable_profiling()
+
+
+def unregister():
+    disable_profiling()
+    bpy.utils.unregister_class(PROJECTOR_OT_dump_profile)
+    bpy.utils.unregister_class(PROJECTOR_OT_reset_profile)
+    bpy.utils.unregister_class(ProjectorPreferences)
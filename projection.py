@@ -0,0 +1,137 @@
+""" Projection math of the projectors, without bpy so it can be tested outside of Blender.
+Shifts are fractions of the image width here, the projector settings store them in percent.
+The *_array functions compute the outputs of many projectors at once from NumPy arrays.
+tests.TestProjector checks these functions against the outputs the projectors compute in Blender.
+"""
+import math
+
+import numpy as np
+
+# The camera of a projector is set up for this distance, the image is as wide as distance / throw ratio.
+DISTANCE = 1
+# The projector settings store the lens shift in percent.
+SHIFT_PERCENT = 100
+# Lumens per watt of the lights in Blender, the luminous efficacy of light at 555 nm.
+LUMINOUS_EFFICACY = 683
+
+
+def parse_resolution(resolution):
+    """ Return the width and height of a resolution like '1920x1080' as floats. """
+    width, height = resolution.split('x')
+    return float(width), float(height)
+
+
+def inverted_aspect_ratio(width, height):
+    return height / width
+
+
+def shift_fraction(shift_percent):
+    """ Return a lens shift in percent of the image width as a fraction. """
+    return shift_percent / SHIFT_PERCENT
+
+
+def fov(throw_ratio, distance=DISTANCE):
+    """ Return the horizontal field of view of the camera in radians for a throw ratio. """
+    return math.atan((distance / throw_ratio) * .5) * 2
+
+
+def camera_shift(h_shift, v_shift, inverted_aspect_ratio):
+    """ Return the shift x and y of the camera. Blender measures both in fractions of the image width. """
+    return h_shift, v_shift * inverted_aspect_ratio
+
+
+def texture_scale(throw_ratio, inverted_aspect_ratio):
+    """ Return the x and y scale of the texture mapping, as the shared projector node group computes it. """
+    scale_x = 1 / throw_ratio
+    return scale_x, scale_x * inverted_aspect_ratio
+
+
+def texture_translation(h_shift, v_shift, throw_ratio, inverted_aspect_ratio):
+    """ Return the x and y translation of the texture mapping, as the shared projector node group computes it. """
+    scale_x, scale_y = texture_scale(throw_ratio, inverted_aspect_ratio)
+    return h_shift * scale_x, v_shift * scale_y
+
+
+def image_coordinates(local, throw_ratio, h_shift, v_shift, inverted_aspect_ratio):
+    """ Return the image coordinates u, v of points in the local space of a projector, both in [-0.5, 0.5] inside
+    its image, and their depth along the projector axis. local is an array of shape (n, 3).
+    """
+    # The projector looks along its negative z axis.
+    depth = -local[:, 2]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        image_width = depth / throw_ratio
+        u = local[:, 0] / image_width - h_shift
+        v = local[:, 1] / (image_width * inverted_aspect_ratio) - v_shift
+    return u, v, depth
+
+
+def image_directions(u, v, throw_ratio, h_shift, v_shift, inverted_aspect_ratio):
+    """ Return the local space directions of shape (len(v), len(u), 3) through image coordinates u and v,
+    the inverse of image_coordinates() at depth 1.
+    """
+    x = (np.asarray(u) + h_shift) / throw_ratio
+    y = (np.asarray(v) + v_shift) / throw_ratio * inverted_aspect_ratio
+    return np.stack(np.broadcast_arrays(x[None, :], y[:, None], -1.0), axis=-1)
+
+
+def image_solid_angle(throw_ratio, h_shift, v_shift, inverted_aspect_ratio):
+    """ Return the solid angle in steradians covered by the image of a projector, including its lens shift.
+    Takes floats or arrays.
+    """
+    left, right = (-0.5 + h_shift) / throw_ratio, (0.5 + h_shift) / throw_ratio
+    bottom = (-0.5 + v_shift) / throw_ratio * inverted_aspect_ratio
+    top = (0.5 + v_shift) / throw_ratio * inverted_aspect_ratio
+
+    def corner(x, y):
+        # Solid angle of the rectangle between the axis and (x, y) on the plane at distance 1.
+        return np.arctan(x * y / np.sqrt(1 + x * x + y * y))
+    return corner(right, top) - corner(left, top) - corner(right, bottom) + corner(left, bottom)
+
+
+def lumens_energy(lumens, throw_ratio, h_shift, v_shift, inverted_aspect_ratio):
+    """ Return the energy in watts of the spot light of a projector whose full white image has a flux in lumens.
+    The flux spreads over the solid angle of the image, a Blender spot light emits energy / 4 pi watts per steradian.
+    Takes floats or arrays.
+    """
+    intensity = lumens / image_solid_angle(throw_ratio, h_shift, v_shift, inverted_aspect_ratio)
+    return intensity * 4 * math.pi / LUMINOUS_EFFICACY
+
+
+def luminous_intensity(energy):
+    """ Return the luminous intensity in candela of a spot light with an energy in watts. """
+    return energy * LUMINOUS_EFFICACY / (4 * math.pi)
+
+
+def illuminance(intensity, distance, cos_incidence):
+    """ Return the illuminance in lux a point light with an intensity in candela casts on a surface,
+    by the inverse square and the cosine law. Takes floats or arrays.
+    """
+    return intensity * cos_incidence / distance ** 2
+
+
+def luminance(illuminance, reflectance):
+    """ Return the luminance in nits of a diffuse surface with a reflectance between 0 and 1. """
+    return illuminance * reflectance / math.pi
+
+
+def fov_array(throw_ratios, distance=DISTANCE):
+    return np.arctan((distance / np.asarray(throw_ratios, dtype=float)) * .5) * 2
+
+
+def projector_outputs_array(throw_ratios, h_shifts, v_shifts, widths, heights):
+    """ Return the outputs of many projectors at once as arrays, keyed like the attributes they are written to.
+    Shifts are fractions, widths and heights the resolutions of the projectors.
+    """
+    throw_ratios = np.asarray(throw_ratios, dtype=float)
+    h_shifts = np.asarray(h_shifts, dtype=float)
+    v_shifts = np.asarray(v_shifts, dtype=float)
+    inverted = np.asarray(heights, dtype=float) / np.asarray(widths, dtype=float)
+    scale_x = 1 / throw_ratios
+    scale_y = scale_x * inverted
+    return {'angle': fov_array(throw_ratios),
+            'shift_x': h_shifts,
+            'shift_y': v_shifts * inverted,
+            'scale_x': scale_x,
+            'scale_y': scale_y,
+            'translation_x': h_shifts * scale_x,
+            'translation_y': v_shifts * scale_y}
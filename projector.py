@@ -1,13 +1,26 @@
 import logging
 import math
 import os
+import re
+import uuid
 
-from enum import Enum
+from collections import Counter
+from contextlib import contextmanager
+from enum import Enum, IntFlag
 import bpy
+import numpy as np
+from bpy.app.handlers import persistent
 from bpy.types import Operator
+from mathutils import Vector
 
-from .helper import (ADDON_ID, auto_offset,
-                     get_projectors, get_projector, random_color)
+from .helper import (ADDON_ID, PROJECTOR_TAG, SPOT_TAG, auto_offset, new_group_socket,
+                     find_spot, get_projectors, is_projector, random_color, scene_projectors)
+from .registry import _is_legacy_projector, register_projector, unregister_projectors
+from .drivers import add_drivers, remove_drivers, retarget_drivers
+from . import image_probe
+from . import patterns
+from . import projection
+from . import warp
 
 logging.basicConfig(
     format='[Projectors Addon]: %(name)s - %(levelname)s - %(message)s')
@@ -18,6 +31,12 @@ class Textures(Enum):
     CHECKER = 'checker_texture'
     COLOR_GRID = 'color_grid_texture'
     CUSTOM_TEXTURE = 'custom_texture'
+    CROSSHAIR = 'crosshair_pattern'
+    NUMBERED_GRID = 'numbered_grid_pattern'
+    ID_COLOR = 'id_color_pattern'
+    GRAY_RAMP = 'gray_ramp_pattern'
+    SMPTE_BARS = 'smpte_bars_pattern'
+    CIRCLE_GRID = 'circle_grid_pattern'
 
 
 RESOLUTIONS = [
@@ -42,7 +61,21 @@ RESOLUTIONS = [
 
 PROJECTED_OUTPUTS = [(Textures.CHECKER.value, 'Checker', '', 1),
                      (Textures.COLOR_GRID.value, 'Color Grid', '', 2),
-                     (Textures.CUSTOM_TEXTURE.value, 'Custom Texture', '', 3)]
+                     (Textures.CUSTOM_TEXTURE.value, 'Custom Texture', '', 3),
+                     (Textures.CROSSHAIR.value, 'Crosshair', 'Crosshair with diagonals and ticks', 4),
+                     (Textures.NUMBERED_GRID.value, 'Numbered Grid', 'Grid with numbered cells', 5),
+                     (Textures.ID_COLOR.value, 'ID Color', 'The color of the projector with a border', 6),
+                     (Textures.GRAY_RAMP.value, 'Gray Ramp', 'Continuous and stepped gray ramp', 7),
+                     (Textures.SMPTE_BARS.value, 'SMPTE Bars', 'SMPTE style color bars', 8),
+                     (Textures.CIRCLE_GRID.value, 'Circle Grid', 'Grid of circles', 9)]
+
+# Projected textures generated by the patterns module.
+PATTERN_TEXTURES = {Textures.CROSSHAIR.value: 'crosshair',
+                    Textures.NUMBERED_GRID.value: 'numbered_grid',
+                    Textures.ID_COLOR.value: 'id_color',
+                    Textures.GRAY_RAMP.value: 'gray_ramp',
+                    Textures.SMPTE_BARS.value: 'smpte_bars',
+                    Textures.CIRCLE_GRID.value: 'circle_grid'}
 
 
 class PROJECTOR_OT_change_color_randomly(Operator):
@@ -53,67 +86,226 @@ class PROJECTOR_OT_change_color_randomly(Operator):
 
     @classmethod
     def poll(cls, context):
-        return len(get_projectors(context, only_selected=True)) == 1
+        return bool(get_projectors(context, only_selected=True))
 
     def execute(self, context):
         projectors = get_projectors(context, only_selected=True)
-        new_color = random_color(alpha=True)
-        for projector in projectors:
-            projector.proj_settings['projected_color'] = new_color[:-1]
-            update_checker_color(projector.proj_settings, context)
+        new_color = random_color()
+        with batch_updates(context):
+            for projector in projectors:
+                projector.proj_settings.projected_color = new_color
         return {'FINISHED'}
 
 
-def create_projector_textures():
-    """ This function checks if the needed images exist and if not creates them. """
-    name_template = '_proj.tex.{}'
+TEXTURE_PREFIX = '_proj.tex.'
+MASK_TEXTURE = TEXTURE_PREFIX + 'mask'
+PIXEL_CELL_TEXTURE = TEXTURE_PREFIX + 'pixel_cell'
+# Custom property of proxy images, the size of the full resolution image.
+PROXY_SOURCE_SIZE = ADDON_ID.format('proxy_source_size')
+# Texels per side of the pixel cell, its grid line is one texel wide like the 2.5% of the procedural grid.
+PIXEL_CELL_SIZE = 40
+# Custom property of a spot light, names its warp map image across renames of the light.
+WARP_ID = ADDON_ID.format('warp_id')
+# Custom property of a warp map image, the name of the light it belongs to. Copies of a light keep the ID.
+# A name instead of a pointer, an ID property pointer would be a user keeping the light alive.
+WARP_LIGHT = ADDON_ID.format('warp_light')
+BLEND_MASK_NODE = 'Blend Mask'
+WARP_MAP_NODE = 'Warp Map'
+WARP_NODE = 'Warp'
+# Nodes which sample the projected image, they read the warped texture vector.
+TEXTURE_VECTOR_INPUTS = (('Image Texture', 'Vector'), ('Color Grid', 'Vector'), ('pixel_grid', 1),
+                         (BLEND_MASK_NODE, 'Vector'))
+
+
+def get_projection_texture(resolution):
+    """ Return the color grid image for the resolution and create it on first use.
+    The images are not fake user'd, unused ones are released again.
+    """
+    img_name = TEXTURE_PREFIX + resolution
+    image = bpy.data.images.get(img_name)
+    if not image:
+        log.debug(f'Create projection texture: {resolution}')
+        w, h = resolution.split('x')
+        image = bpy.data.images.new(img_name, width=int(w), height=int(h),
+                                    alpha=True, float_buffer=False)
+        image.generated_type = 'COLOR_GRID'
+    return image
+
+
+def get_pattern_texture(pattern, resolution, **params):
+    """ Return the image of a calibration pattern and create it on first use.
+    Projectors with the same pattern, resolution and parameters share the image.
+    """
+    w, h = (int(v) for v in resolution.split('x'))
+    img_name = TEXTURE_PREFIX + patterns.cache_key(pattern, w, h, params)
+    image = bpy.data.images.get(img_name)
+    if not image:
+        log.debug(f'Create pattern texture: {img_name}')
+        image = bpy.data.images.new(img_name, width=w, height=h, alpha=True, float_buffer=False)
+        image.pixels.foreach_set(patterns.generate(pattern, w, h, **params).ravel())
+        # Generated pixels are lost on save unless the image is packed.
+        image.pack()
+    return image
+
+
+def pattern_params(proj_settings):
+    """ Return the parameters of the pattern a projector projects which depend on its settings. """
+    if proj_settings.projected_texture == Textures.ID_COLOR.value:
+        return {'color': tuple(round(c, 3) for c in proj_settings.projected_color)}
+    return {}
+
+
+def get_mask_texture():
+    """ Return a tiny image whose alpha masks the checker texture to the projection area. """
+    image = bpy.data.images.get(MASK_TEXTURE)
+    if not image:
+        image = bpy.data.images.new(MASK_TEXTURE, width=4, height=4,
+                                    alpha=True, float_buffer=False)
+    return image
+
+
+def get_pixel_cell_texture():
+    """ Return the image of a single projector pixel with its grid lines on the left and bottom edge.
+    Repeated over the projected image it draws the pixel grid for every resolution.
+    """
+    image = bpy.data.images.get(PIXEL_CELL_TEXTURE)
+    if not image:
+        size = PIXEL_CELL_SIZE
+        image = bpy.data.images.new(PIXEL_CELL_TEXTURE, width=size, height=size, alpha=False)
+        image.colorspace_settings.name = 'Non-Color'
+        cell = np.ones((size, size, 4), dtype=np.float32)
+        cell[0, :, :3] = 0
+        cell[:, 0, :3] = 0
+        image.pixels.foreach_set(cell.ravel())
+        # Generated pixels are lost on save unless the image is packed.
+        image.pack()
+    return image
+
+
+def get_warp_texture(light):
+    """ Return the warp map image of a spot light and create it on first use.
+    Every light has its own image, the float pixels keep negative offsets and are packed as OpenEXR.
+    The image is named by an ID of the light, a copy of the light gets a new ID and its own image.
+    """
+    image = bpy.data.images.get(TEXTURE_PREFIX + 'warp.' + light.get(WARP_ID, ''))
+    owner = bpy.data.lights.get(image.get(WARP_LIGHT, '')) if image else None
+    if owner and owner != light and owner.get(WARP_ID) == light[WARP_ID]:
+        # A copy of the owner, a renamed owner no longer has the name and the light takes the image over.
+        image = None
+        del light[WARP_ID]
+    if not image:
+        if not light.get(WARP_ID):
+            light[WARP_ID] = uuid.uuid4().hex
+        size = warp.MAP_SIZE
+        image = bpy.data.images.new(TEXTURE_PREFIX + 'warp.' + light[WARP_ID],
+                                    width=size, height=size, alpha=False, float_buffer=True)
+        image.colorspace_settings.name = 'Non-Color'
+    image[WARP_LIGHT] = light.name_full
+    return image
+
+
+def release_projection_texture(image):
+    """ Remove a projection texture if no projector uses it anymore. """
+    if image and image.name.startswith(TEXTURE_PREFIX) and image.users == 0:
+        bpy.data.images.remove(image)
+
+
+def image_memory(image):
+    """ Return the size in bytes of the pixel buffer of an image. """
+    if not image.has_data:
+        return 0
+    bytes_per_channel = 4 if image.is_float else 1
+    return image.size[0] * image.size[1] * image.channels * bytes_per_channel
+
+
+def texture_memory_report():
+    """ Return the memory held by projection textures and what creating all of them up front would cost. """
+    loaded = {image.name: image_memory(image)
+              for image in bpy.data.images if image.name.startswith(TEXTURE_PREFIX)}
+    eager = 0
     for res in RESOLUTIONS:
-        img_name = name_template.format(res[0])
         w, h = res[0].split('x')
-        if not bpy.data.images.get(img_name):
-            log.debug(f'Create projection texture: {res}')
-            bpy.ops.image.new(name=img_name,
-                              width=int(w),
-                              height=int(h),
-                              color=(0.0, 0.0, 0.0, 1.0),
-                              alpha=True,
-                              generated_type='COLOR_GRID',
-                              float=False)
+        eager += int(w) * int(h) * 4
+    return {'images': loaded, 'total': sum(loaded.values()), 'eager_total': eager}
 
-        bpy.data.images[img_name].use_fake_user = True
 
+class PROJECTOR_OT_purge_textures(Operator):
+    """ Remove projection textures that are not used by any projector. """
+    bl_idname = 'projector.purge_textures'
+    bl_label = 'Purge Unused Projection Textures'
+    bl_options = {'REGISTER', 'UNDO'}
 
-def add_projector_node_tree_to_spot(spot):
-    """
-    This function turns a spot light into a projector.
-    This is achieved through a texture on the spot light and some basic math.
-    """
+    def execute(self, context):
+        freed = 0
+        count = 0
+        for image in [img for img in bpy.data.images if img.name.startswith(TEXTURE_PREFIX)]:
+            # Files from older versions pinned every texture with a fake user.
+            image.use_fake_user = False
+            if image.users == 0:
+                freed += image_memory(image)
+                count += 1
+                bpy.data.images.remove(image)
+        self.report({'INFO'}, f'Removed {count} texture(s), freed {freed / 2**20:.1f} MB.')
+        return {'FINISHED'}
 
-    spot.data.use_nodes = True
+
+NODE_GROUP_VERSION = 1
+PROJECTOR_GROUP = f'_Projectors-Addon_Projector.v{NODE_GROUP_VERSION}'
+PIXEL_GRID_GROUP = f'_Projectors-Addon_PixelGrid.v{NODE_GROUP_VERSION}'
+BAKED_PIXEL_GRID_GROUP = f'_Projectors-Addon_BakedPixelGrid.v{NODE_GROUP_VERSION}'
+VERSION_TAG = ADDON_ID.format('node_group_version')
+# Names of the per projector node groups created by older versions of the add-on.
+LEGACY_NODE_GROUP = re.compile(r'^(_Projector|_Projectors-Addon_PixelGrid)(\.\d+)?$')
+
+
+def get_shared_node_group(name, create):
+    """ Return the node group shared by all projectors and create it if it does not exist yet. """
+    node_group = bpy.data.node_groups.get(name)
+    if node_group is None or node_group.get(VERSION_TAG) != NODE_GROUP_VERSION:
+        node_group = create(name)
+        node_group[VERSION_TAG] = NODE_GROUP_VERSION
+    return node_group
+
+
+def has_shared_node_tree(spot):
+    """ Return True if the spot light uses the current shared node groups. """
     root_tree = spot.data.node_tree
-    root_tree.nodes.clear()
+    if root_tree is None:
+        return False
+    for node_name in ('Group', 'pixel_grid'):
+        node = root_tree.nodes.get(node_name)
+        if node is None or node.node_tree is None or node.node_tree.get(VERSION_TAG) != NODE_GROUP_VERSION:
+            return False
+    return True
 
-    node_group = bpy.data.node_groups.new('_Projector', 'ShaderNodeTree')
 
-    # Create output sockets for the node group.
-    if(bpy.app.version >= (4, 0)):
-        node_group.interface.new_socket('texture vector',  in_out="OUTPUT", socket_type='NodeSocketVector')
-        node_group.interface.new_socket('color', in_out="OUTPUT", socket_type='NodeSocketColor')
-    else:
-        output = node_group.outputs
-        output.new('NodeSocketVector', 'texture vector')
-        output.new('NodeSocketColor', 'color')
+def remove_legacy_node_groups():
+    """ Remove the unused per projector node groups of older versions. Return the number of removed groups. """
+    legacy = [node_group for node_group in bpy.data.node_groups
+              if LEGACY_NODE_GROUP.match(node_group.name) and node_group.users == 0]
+    for node_group in legacy:
+        bpy.data.node_groups.remove(node_group)
+    return len(legacy)
 
-    # # Inside Group Node #
-    # #####################
 
-    # Hold important nodes inside a group node.
-    group = spot.data.node_tree.nodes.new('ShaderNodeGroup')
-    group.node_tree = node_group
-    group.label = "!! Don't touch !!"
+def create_projector_node_group(name):
+    """
+    Create the node group which does the projection math for all projectors.
+    The values of a single projector are inputs of its group node.
+    """
+    node_group = bpy.data.node_groups.new(name, 'ShaderNodeTree')
 
-    nodes = group.node_tree.nodes
-    tree = group.node_tree
+    # Create input and output sockets for the node group.
+    new_group_socket(node_group, 'Throw Ratio', 'NodeSocketFloat').default_value = 0.8
+    new_group_socket(node_group, 'H Shift', 'NodeSocketFloat')
+    new_group_socket(node_group, 'V Shift', 'NodeSocketFloat')
+    new_group_socket(node_group, 'Inverted Aspect Ratio', 'NodeSocketFloat').default_value = 0.5625
+    new_group_socket(node_group, 'Checker Color', 'NodeSocketColor')
+    new_group_socket(node_group, 'texture vector', 'NodeSocketVector', in_out='OUTPUT')
+    new_group_socket(node_group, 'color', 'NodeSocketColor', in_out='OUTPUT')
+
+    nodes = node_group.nodes
+    tree = node_group
 
     auto_pos = auto_offset()
 
@@ -129,12 +321,8 @@ def add_projector_node_tree_to_spot(spot):
     map_1 = nodes.new('ShaderNodeMapping')
     map_1.vector_type = 'TEXTURE'
     # Flip the image horizontally and vertically to display it the intended way.
-    if bpy.app.version < (2, 81):
-        map_1.scale[0] = -1
-        map_1.scale[1] = -1
-    else:
-        map_1.inputs[3].default_value[0] = -1
-        map_1.inputs[3].default_value[1] = -1
+    map_1.inputs[3].default_value[0] = -1
+    map_1.inputs[3].default_value[1] = -1
     map_1.location = auto_pos(200)
 
     sep = nodes.new('ShaderNodeSeparateXYZ')
@@ -154,7 +342,38 @@ def add_projector_node_tree_to_spot(spot):
     com.inputs['Z'].default_value = 1.0
     com.location = auto_pos(200)
 
+    # Scale and translation of the texture from the projector inputs.
+    group_input = nodes.new('NodeGroupInput')
+    group_input.location = (com.location[0], com.location[1] - 400)
+
+    inv_throw_ratio = nodes.new('ShaderNodeMath')
+    inv_throw_ratio.operation = 'DIVIDE'
+    inv_throw_ratio.inputs[0].default_value = 1
+    inv_throw_ratio.location = (group_input.location[0] + 200, group_input.location[1])
+
+    scale_y = nodes.new('ShaderNodeMath')
+    scale_y.operation = 'MULTIPLY'
+    scale_y.location = (inv_throw_ratio.location[0], inv_throw_ratio.location[1] - 200)
+
+    shift_x = nodes.new('ShaderNodeMath')
+    shift_x.operation = 'MULTIPLY'
+    shift_x.location = (inv_throw_ratio.location[0] + 200, inv_throw_ratio.location[1])
+
+    shift_y = nodes.new('ShaderNodeMath')
+    shift_y.operation = 'MULTIPLY'
+    shift_y.location = (shift_x.location[0], shift_x.location[1] - 200)
+
+    scale = nodes.new('ShaderNodeCombineXYZ')
+    scale.name = 'Scale'
+    scale.inputs['Z'].default_value = 1.0
+    scale.location = (shift_x.location[0] + 200, shift_x.location[1])
+
+    location = nodes.new('ShaderNodeCombineXYZ')
+    location.name = 'Location'
+    location.location = (scale.location[0], scale.location[1] - 200)
+
     map_2 = nodes.new('ShaderNodeMapping')
+    map_2.name = 'Mapping.001'
     map_2.location = auto_pos(200)
     map_2.vector_type = 'TEXTURE'
 
@@ -164,14 +383,15 @@ def add_projector_node_tree_to_spot(spot):
     add.location = auto_pos(350)
 
     # Texture
-    # a) Image
+    # a) Image, only its alpha is used to mask the checker texture to the projection area.
     img = nodes.new('ShaderNodeTexImage')
+    img.name = 'Mask'
+    img.image = get_mask_texture()
     img.extension = 'CLIP'
     img.location = auto_pos(200)
 
     # b) Generated checker texture.
     checker_tex = nodes.new('ShaderNodeTexChecker')
-    # checker_tex.inputs['Color2'].default_value = random_color(alpha=True)
     checker_tex.inputs[3].default_value = 8
     checker_tex.inputs[1].default_value = (1, 1, 1, 1)
     checker_tex.location = auto_pos(y=-300)
@@ -184,26 +404,8 @@ def add_projector_node_tree_to_spot(spot):
     group_output_node = node_group.nodes.new('NodeGroupOutput')
     group_output_node.location = auto_pos(200)
 
-    # # Root Nodes #
-    # ##############
-    auto_pos_root = auto_offset()
-    # Image Texture
-    user_texture = root_tree.nodes.new('ShaderNodeTexImage')
-    user_texture.extension = 'CLIP'
-    user_texture.label = 'Add your Image Texture or Movie here'
-    user_texture.location = auto_pos_root(200, y=200)
-    # Emission
-    emission = root_tree.nodes.new('ShaderNodeEmission')
-    emission.inputs['Strength'].default_value = 1
-    emission.location = auto_pos_root(300)
-    # Material Output
-    output = root_tree.nodes.new('ShaderNodeOutputLight')
-    output.location = auto_pos_root(200)
-
     # # LINK NODES #
     # ##############
-
-    # Link inside group node
     if(bpy.app.version >= (4, 0)):
         tree.links.new(geo.outputs['Incoming'], vec_transform.inputs['Vector'])
         tree.links.new(vec_transform.outputs['Vector'], map_1.inputs['Vector'])
@@ -221,173 +423,809 @@ def add_projector_node_tree_to_spot(spot):
 
     tree.links.new(com.outputs['Vector'], map_2.inputs['Vector'])
 
+    # Scale: (1 / throw ratio, 1 / throw ratio * inverted aspect ratio)
+    # Location: (h shift * scale x, v shift * scale y)
+    tree.links.new(group_input.outputs['Throw Ratio'], inv_throw_ratio.inputs[1])
+    tree.links.new(inv_throw_ratio.outputs[0], scale_y.inputs[0])
+    tree.links.new(group_input.outputs['Inverted Aspect Ratio'], scale_y.inputs[1])
+    tree.links.new(group_input.outputs['H Shift'], shift_x.inputs[0])
+    tree.links.new(inv_throw_ratio.outputs[0], shift_x.inputs[1])
+    tree.links.new(group_input.outputs['V Shift'], shift_y.inputs[0])
+    tree.links.new(scale_y.outputs[0], shift_y.inputs[1])
+    tree.links.new(inv_throw_ratio.outputs[0], scale.inputs[0])
+    tree.links.new(scale_y.outputs[0], scale.inputs[1])
+    tree.links.new(shift_x.outputs[0], location.inputs[0])
+    tree.links.new(shift_y.outputs[0], location.inputs[1])
+    tree.links.new(scale.outputs[0], map_2.inputs['Scale'])
+    tree.links.new(location.outputs[0], map_2.inputs['Location'])
+
     # Textures
-    # a) generated texture
     tree.links.new(map_2.outputs['Vector'], add.inputs['Color1'])
     tree.links.new(add.outputs['Color'], img.inputs['Vector'])
     tree.links.new(add.outputs['Color'], group_output_node.inputs[0])
-    # b) checker texture
     tree.links.new(add.outputs['Color'], checker_tex.inputs['Vector'])
+    tree.links.new(group_input.outputs['Checker Color'], checker_tex.inputs['Color2'])
     tree.links.new(img.outputs['Alpha'], mix_rgb.inputs[0])
     tree.links.new(checker_tex.outputs['Color'], mix_rgb.inputs[2])
+    tree.links.new(mix_rgb.outputs['Color'], group_output_node.inputs[1])
+
+    return node_group
+
+
+def add_projector_node_tree_to_spot(spot):
+    """
+    This function turns a spot light into a projector.
+    This is achieved through a texture on the spot light and some basic math.
+    The math lives in node groups shared by all projectors.
+    """
+
+    spot.data.use_nodes = True
+    root_tree = spot.data.node_tree
+    # Keep the custom texture when an existing node tree is rebuilt.
+    user_node = root_tree.nodes.get('Image Texture')
+    user_image = user_node.image if user_node else None
+    blend_node = root_tree.nodes.get(BLEND_MASK_NODE)
+    blend_image = blend_node.image if blend_node else None
+    warp_node = root_tree.nodes.get(WARP_MAP_NODE)
+    warp_image = warp_node.image if warp_node else None
+    root_tree.nodes.clear()
+    # Node handles reference the removed nodes, of all projectors which share the light data.
+    _node_handles.clear()
+
+    # Hold important nodes inside a group node.
+    group = root_tree.nodes.new('ShaderNodeGroup')
+    group.node_tree = get_shared_node_group(PROJECTOR_GROUP, create_projector_node_group)
+    group.name = 'Group'
+    group.label = "!! Don't touch !!"
+
+    # # Root Nodes #
+    # ##############
+    auto_pos_root = auto_offset()
+    # Image Texture
+    user_texture = root_tree.nodes.new('ShaderNodeTexImage')
+    user_texture.name = 'Image Texture'
+    user_texture.image = user_image
+    user_texture.extension = 'CLIP'
+    user_texture.label = 'Add your Image Texture or Movie here'
+    user_texture.location = auto_pos_root(200, y=200)
+    # Generated color grid, the image matches the resolution of the projector.
+    color_grid = root_tree.nodes.new('ShaderNodeTexImage')
+    color_grid.name = 'Color Grid'
+    color_grid.label = 'Color Grid'
+    color_grid.extension = 'CLIP'
+    color_grid.location = (user_texture.location[0], user_texture.location[1] - 300)
+    # Emission
+    emission = root_tree.nodes.new('ShaderNodeEmission')
+    # New nodes are named in the language of the UI, the updates find them by these names.
+    emission.name = 'Emission'
+    emission.inputs['Strength'].default_value = 1
+    emission.location = auto_pos_root(300)
+    # Material Output
+    output = root_tree.nodes.new('ShaderNodeOutputLight')
+    output.name = 'Light Output'
+    output.location = auto_pos_root(200)
 
     # Link in root
     root_tree.links.new(group.outputs['texture vector'], user_texture.inputs['Vector'])
+    root_tree.links.new(group.outputs['texture vector'], color_grid.inputs['Vector'])
     root_tree.links.new(group.outputs['color'], emission.inputs['Color'])
     root_tree.links.new(emission.outputs['Emission'], output.inputs['Surface'])
 
     # Pixel Grid Setup
-    pixel_grid_group = create_pixel_grid_node_group()
-    pixel_grid_node = spot.data.node_tree.nodes.new('ShaderNodeGroup')
-    pixel_grid_node.node_tree = pixel_grid_group
+    pixel_grid_node = root_tree.nodes.new('ShaderNodeGroup')
+    pixel_grid_node.node_tree = get_shared_node_group(PIXEL_GRID_GROUP, create_pixel_grid_node_group)
     pixel_grid_node.label = "Pixel Grid"
     pixel_grid_node.name = 'pixel_grid'
-    loc = root_tree.nodes['Emission'].location
+    loc = emission.location
     pixel_grid_node.location = (loc[0], loc[1] - 150)
 
     root_tree.links.new(group.outputs[0], pixel_grid_node.inputs[1])
     root_tree.links.new(emission.outputs[0], pixel_grid_node.inputs[0])
 
+    if blend_image:
+        set_blend_mask(spot, blend_image)
+    if warp_image:
+        set_warp_map(spot, warp_image)
+
+
+def _texture_vector(nodes):
+    """ Return the socket with the texture vector of the projected image, warped if the projector has a warp map. """
+    if WARP_NODE in nodes:
+        return nodes[WARP_NODE].outputs['Vector']
+    return nodes['Group'].outputs['texture vector']
+
+
+def set_blend_mask(spot, image):
+    """ Multiply the projection of a spot with an edge blend mask image, None removes the mask. """
+    root_tree = spot.data.node_tree
+    nodes = root_tree.nodes
+    node = nodes.get(BLEND_MASK_NODE)
+    if image is None:
+        if node:
+            nodes.remove(node)
+        nodes['Emission'].inputs['Strength'].default_value = 1
+        return
+    if node is None:
+        node = nodes.new('ShaderNodeTexImage')
+        node.name = BLEND_MASK_NODE
+        node.label = BLEND_MASK_NODE
+        # The ramp reaches the edge of the image, the border pixels continue it.
+        node.extension = 'EXTEND'
+        color_grid = nodes['Color Grid']
+        node.location = (color_grid.location[0], color_grid.location[1] - 300)
+    node.image = image
+    root_tree.links.new(_texture_vector(nodes), node.inputs['Vector'])
+    root_tree.links.new(node.outputs['Color'], nodes['Emission'].inputs['Strength'])
+
+
+def set_warp_map(spot, image):
+    """ Offset the texture vector of a spot by the UV offsets of a warp map image, None removes the warp.
+    One lookup warps the custom texture, the color grid, the patterns, the pixel grid and the blend mask,
+    the procedural checker is computed inside the node group and stays unwarped.
+    """
+    root_tree = spot.data.node_tree
+    nodes = root_tree.nodes
+    if image is None:
+        for name in (WARP_MAP_NODE, WARP_NODE):
+            if name in nodes:
+                nodes.remove(nodes[name])
+    else:
+        node = nodes.get(WARP_MAP_NODE)
+        if node is None:
+            node = nodes.new('ShaderNodeTexImage')
+            node.name = WARP_MAP_NODE
+            node.label = WARP_MAP_NODE
+            node.interpolation = 'Linear'
+            # Offsets outside the image continue the ones at its border.
+            node.extension = 'EXTEND'
+            add = nodes.new('ShaderNodeVectorMath')
+            add.name = WARP_NODE
+            add.label = WARP_NODE
+            add.operation = 'ADD'
+            group = nodes['Group']
+            node.location = (group.location[0] + 200, group.location[1] + 300)
+            add.location = (group.location[0] + 500, group.location[1] + 300)
+            root_tree.links.new(group.outputs['texture vector'], node.inputs['Vector'])
+            root_tree.links.new(group.outputs['texture vector'], add.inputs[0])
+            root_tree.links.new(node.outputs['Color'], add.inputs[1])
+        node.image = image
+    texture_vector = _texture_vector(nodes)
+    for name, socket in TEXTURE_VECTOR_INPUTS:
+        if name in nodes:
+            root_tree.links.new(texture_vector, nodes[name].inputs[socket])
+
+
+def rebuild_node_tree(projector):
+    """ Rebuild the node tree of the spot light of a projector and restore its drivers. """
+    add_projector_node_tree_to_spot(find_spot(projector))
+    if projector.proj_settings.use_drivers:
+        add_drivers(projector)
+
+
+# Attribute of ProjectorNodes -> name of the node in the node tree of the spot light.
+NODE_NAMES = {'group': 'Group', 'image_texture': 'Image Texture', 'color_grid': 'Color Grid',
+              'emission': 'Emission', 'pixel_grid': 'pixel_grid', 'output': 'Light Output'}
+
+
+class ProjectorNodes:
+    """ The spot light and the nodes of a projector, resolved once and shared by all updates and the UI.
+    Get it with projector_nodes(). It is dropped on undo, redo and file loading and when the node tree is rebuilt.
+    """
+    __slots__ = ('spot', 'tree', 'node_count') + tuple(NODE_NAMES)
+
+    def __init__(self, spot):
+        self.spot = spot
+        self.tree = spot.data.node_tree
+        nodes = self.tree.nodes
+        # Nodes added or removed by the user, e.g. the edge blend mask, change the count.
+        self.node_count = len(nodes)
+        for attr, name in NODE_NAMES.items():
+            setattr(self, attr, nodes[name])
+
+    def is_valid(self, projector):
+        try:
+            return (self.spot.parent == projector and self.spot.data.node_tree == self.tree
+                    and len(self.tree.nodes) == self.node_count)
+        except ReferenceError:
+            return False
+
+
+# Node handles of the projectors: projector pointer -> ProjectorNodes.
+# Pointers are not stable across undo and file loading, the handles are dropped then.
+_node_handles = {}
+
+
+def _is_intact(spot):
+    if spot is None or not has_shared_node_tree(spot):
+        return False
+    nodes = spot.data.node_tree.nodes
+    return all(name in nodes for name in NODE_NAMES.values())
+
+
+def projector_nodes(projector, repair=True):
+    """ Return the cached spot light and nodes of a projector.
+    A projector with a missing spot light or node is repaired instead of raising a KeyError.
+    With repair=False, e.g. while drawing the UI where data can not be changed, None is returned instead.
+    """
+    key = projector.as_pointer()
+    handle = _node_handles.get(key)
+    if handle is not None and handle.is_valid(projector):
+        return handle
+    spot = find_spot(projector)
+    if not _is_intact(spot):
+        if not repair:
+            return None
+        spot = repair_projector(projector)
+    handle = _node_handles[key] = ProjectorNodes(spot)
+    return handle
+
+
+def repair_projector(projector):
+    """ Rebuild the spot light or the node tree of a projector and recompute all its outputs.
+    Projectors from older files carry their own copies of the node groups, they are rebuilt here as well.
+    Return the spot light.
+    """
+    spot = find_spot(projector)
+    if spot is None:
+        log.warning(f'Projector {projector.name} has no spot light, creating a new one.')
+        spot = build_spot()
+        spot.parent = projector
+        for collection in projector.users_collection:
+            collection.objects.link(spot)
+    rebuild_node_tree(projector)
+    mark_projector_dirty(projector, projector.proj_settings, Dirty.ALL)
+    if not _batch_depth:
+        flush_updates(bpy.context)
+    return spot
+
+
+# Damaged projectors the depsgraph handler reported: projector pointers.
+_reported_damage = set()
+
+
+def _report_damage(projector):
+    """ Log a projector with a missing spot light or node once, the migrate operator repairs it. """
+    if projector.as_pointer() not in _reported_damage:
+        _reported_damage.add(projector.as_pointer())
+        log.warning(f'Projector {projector.name} is damaged, repair it with '
+                    f'{PROJECTOR_OT_migrate_node_groups.bl_label}.')
+
+
+@persistent
+def _drop_node_handles(*args):
+    _node_handles.clear()
+    _warp_maps.clear()
+    _reported_damage.clear()
+
+
+def uses_image_resolution(proj_settings):
+    """ Return True if the resolution of the projector comes from its custom texture. """
+    return proj_settings.use_custom_texture_res and proj_settings.projected_texture == Textures.CUSTOM_TEXTURE.value
+
+
+def image_size(image):
+    """ Return the dimensions of an image without decoding it if possible.
+    The size is read from the file header, image.size is the fallback for other formats and movies.
+    """
+    size = None
+    if image.get(PROXY_SOURCE_SIZE):
+        size = tuple(image[PROXY_SOURCE_SIZE])
+    elif image.source == 'GENERATED':
+        size = image.generated_width, image.generated_height
+    elif image.has_data:
+        size = tuple(image.size)
+    elif image.packed_file:
+        size = image_probe.probe_packed(image.packed_file)
+    elif image.source in ('FILE', 'SEQUENCE', 'TILED'):
+        # Without an image user the path of a sequence is the one of frame 0, the loaded path is one of its frames.
+        filepath = image.filepath if image.source == 'SEQUENCE' else image.filepath_from_user()
+        size = image_probe.probe_file(bpy.path.abspath(filepath, library=image.library))
+    if not size:
+        size = tuple(image.size)
+    return size
+
+
+def _resolution(projector, proj_settings):
+    if uses_image_resolution(proj_settings):
+        image = projector_nodes(projector).image_texture.image
+        if image:
+            w, h = image_size(image)
+        else:
+            w, h = 300, 300
+        return float(w), float(h)
+    return projection.parse_resolution(proj_settings.resolution)
+
+
 def get_resolution(proj_settings, context):
     """ Find out what resolution is currently used and return it.
     Resolution from the dropdown or the resolution from the custom texture.
     """
-    if proj_settings.use_custom_texture_res and proj_settings.projected_texture == Textures.CUSTOM_TEXTURE.value:
-        projector = get_projector(context)
-        root_tree = projector.children[0].data.node_tree
-        image = root_tree.nodes['Image Texture'].image
-        if image:
-            w = image.size[0]
-            h = image.size[1]
+    return _resolution(_owner(proj_settings, context), proj_settings)
+
+
+class Dirty(IntFlag):
+    """ Derived outputs of the projector settings which have to be recomputed. """
+    NONE = 0
+    FOV = 1
+    CAMERA_SHIFT = 2
+    MAPPING_SCALE = 4
+    MAPPING_TRANSLATION = 8
+    PIXEL_GRID_SIZE = 16
+    LINK_TOPOLOGY = 32
+    TEXTURE_IMAGE = 64
+    CHECKER_COLOR = 128
+    POWER = 256
+    WARP = 512
+
+    # Everything that depends on the resolution of the projector.
+    RESOLUTION = CAMERA_SHIFT | MAPPING_SCALE | PIXEL_GRID_SIZE
+    ALL = (FOV | CAMERA_SHIFT | MAPPING_SCALE | MAPPING_TRANSLATION | PIXEL_GRID_SIZE |
+           LINK_TOPOLOGY | TEXTURE_IMAGE | CHECKER_COLOR | POWER | WARP)
+
+
+class UpdateTrace:
+    """ Bookkeeping of the update engine. Lets the tests check how much work a property change causes. """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.flushes = 0
+        self.writes = 0
+        self.outputs = Counter()
+
+    def record(self, output, writes):
+        self.outputs[output] += 1
+        self.writes += writes
+
+
+update_trace = UpdateTrace()
+
+# Projectors with stale outputs: projector pointer -> [projector, proj_settings, Dirty].
+_pending = {}
+_batch_depth = 0
+
+
+def _owner(proj_settings, context):
+    """ Return the projector the settings belong to, independent of the selection.
+    Every object has projector settings, None is returned for objects that are no projector.
+    """
+    projector = proj_settings.id_data
+    return projector if is_projector(projector) else None
+
+
+def mark_dirty(proj_settings, context, dirty):
+    """ Mark outputs of a projector as stale. They are recomputed right away unless updates are batched. """
+    projector = _owner(proj_settings, context)
+    if projector is None:
+        return
+    mark_projector_dirty(projector, proj_settings, dirty)
+    # Instanced projectors keep identical settings.
+    if not _syncing and projector.data.users > 1:
+        sync_instances(projector)
+    if not _batch_depth:
+        flush_updates(context)
+
+
+def mark_projector_dirty(projector, proj_settings, dirty):
+    """ Mark outputs of the given projector as stale without flushing.
+    Instanced projectors share their camera data and so their entry, the shared outputs are written once.
+    """
+    entry = _pending.setdefault(
+        projector.data.as_pointer(), [projector, proj_settings, Dirty.NONE])
+    entry[2] |= dirty
+
+
+@contextmanager
+def batch_updates(context):
+    """ Collect all updates inside the with block and flush them once at the end. """
+    global _batch_depth
+    _batch_depth += 1
+    try:
+        yield
+    finally:
+        _batch_depth -= 1
+        if not _batch_depth:
+            flush_updates(context)
+
+
+def flush_updates(context):
+    """ Recompute every stale output of every pending projector exactly once. """
+    while _pending:
+        _, (projector, proj_settings, dirty) = _pending.popitem()
+        update_trace.flushes += 1
+        _apply_updates(projector, proj_settings, dirty, context)
+
+
+def _apply_updates(projector, proj_settings, dirty, context):
+    cam = projector.data
+    nodes = projector_nodes(projector)
+    group = nodes.group
+
+    throw_ratio = proj_settings.throw_ratio
+    h_shift = projection.shift_fraction(proj_settings.h_shift)
+    v_shift = projection.shift_fraction(proj_settings.v_shift)
+    if dirty & Dirty.RESOLUTION:
+        w, h = _resolution(projector, proj_settings)
+        inverted_aspect_ratio = projection.inverted_aspect_ratio(w, h)
+        # Read by the drivers of driven projectors.
+        for instance in projector_instances(projector):
+            instance.proj_settings.resolution_x = w
+            instance.proj_settings.resolution_y = h
+
+    if dirty & Dirty.FOV:
+        # Adjust some settings on a camera to achieve a throw ratio.
+        cam.lens_unit = 'FOV'
+        # The sensor width has to be set first, the angle is stored as focal length.
+        cam.sensor_width = 10
+        cam.angle = projection.fov(throw_ratio)
+        cam.display_size = 1
+        update_trace.record(Dirty.FOV, 4)
+
+    if dirty & Dirty.CAMERA_SHIFT:
+        cam.shift_x, cam.shift_y = projection.camera_shift(h_shift, v_shift, inverted_aspect_ratio)
+        update_trace.record(Dirty.CAMERA_SHIFT, 2)
+
+    if dirty & Dirty.MAPPING_SCALE:
+        # The node group derives the texture scale from the throw ratio and aspect ratio.
+        group.inputs['Throw Ratio'].default_value = throw_ratio
+        group.inputs['Inverted Aspect Ratio'].default_value = inverted_aspect_ratio
+        update_trace.record(Dirty.MAPPING_SCALE, 2)
+
+    if dirty & Dirty.MAPPING_TRANSLATION:
+        # The node group derives the texture translation from the shift and the scale.
+        group.inputs['H Shift'].default_value = h_shift
+        group.inputs['V Shift'].default_value = v_shift
+        update_trace.record(Dirty.MAPPING_TRANSLATION, 2)
+
+    if dirty & Dirty.PIXEL_GRID_SIZE:
+        _use_pixel_grid_group(nodes, proj_settings.bake_pixel_grid)
+        pixel_grid = nodes.pixel_grid
+        pixel_grid.inputs['Width'].default_value = w
+        pixel_grid.inputs['Height'].default_value = h
+        update_trace.record(Dirty.PIXEL_GRID_SIZE, 2)
+
+    if dirty & Dirty.TEXTURE_IMAGE:
+        # The color grid and the patterns are only created when they are projected.
+        img_node = nodes.color_grid
+        previous = img_node.image
+        texture = proj_settings.projected_texture
+        if texture == Textures.COLOR_GRID.value:
+            img_node.image = get_projection_texture(proj_settings.resolution)
+        elif texture in PATTERN_TEXTURES:
+            img_node.image = get_pattern_texture(PATTERN_TEXTURES[texture], proj_settings.resolution,
+                                                 **pattern_params(proj_settings))
         else:
-            w, h = 300, 300
+            img_node.image = None
+        if previous != img_node.image:
+            release_projection_texture(previous)
+        update_trace.record(Dirty.TEXTURE_IMAGE, 1)
+
+    if dirty & Dirty.LINK_TOPOLOGY:
+        _link_projected_texture(proj_settings, nodes)
+        # Make the pixel grid visible by linking the right node.
+        if proj_settings.show_pixel_grid:
+            nodes.tree.links.new(nodes.pixel_grid.outputs[0], nodes.output.inputs[0])
+        else:
+            nodes.tree.links.new(nodes.emission.outputs[0], nodes.output.inputs[0])
+        update_trace.record(Dirty.LINK_TOPOLOGY, 2)
+
+    if dirty & Dirty.WARP:
+        update_warp_map(nodes, proj_settings)
+        update_trace.record(Dirty.WARP, 1)
+
+    if dirty & Dirty.CHECKER_COLOR:
+        c = proj_settings.projected_color
+        group.inputs['Checker Color'].default_value = [c.r, c.g, c.b, 1]
+        update_trace.record(Dirty.CHECKER_COLOR, 1)
+
+    # The energy of a projector in lumens depends on the solid angle of its image.
+    lumens_dirty = Dirty.MAPPING_SCALE | Dirty.MAPPING_TRANSLATION
+    if dirty & Dirty.POWER or (proj_settings.use_lumens and dirty & lumens_dirty):
+        nodes.spot.data.energy = spot_energy(projector, proj_settings)
+        update_trace.record(Dirty.POWER, 1)
+
+
+def spot_energy(projector, proj_settings):
+    """ Return the energy of the spot light in watts, the power or the energy which emits the lumens. """
+    if not proj_settings.use_lumens:
+        return proj_settings.power
+    w, h = _resolution(projector, proj_settings)
+    return projection.lumens_energy(proj_settings.lumens, proj_settings.throw_ratio,
+                                    projection.shift_fraction(proj_settings.h_shift),
+                                    projection.shift_fraction(proj_settings.v_shift),
+                                    projection.inverted_aspect_ratio(w, h))
+
+
+# Baked warp maps: image name -> (corner pin, control point offsets, lookup map).
+# Only the texels around moved control points are baked again. Dropped on undo, redo and file loading.
+_warp_maps = {}
+
+
+def warp_offsets(proj_settings):
+    """ Return the control point offsets of the warp mode of a projector as an array of shape (rows, columns, 2). """
+    if proj_settings.warp_mode == 'CORNER_PIN':
+        points, columns, rows = proj_settings.corner_pin, 2, 2
+    else:
+        points, columns, rows = proj_settings.warp_points, proj_settings.warp_columns, proj_settings.warp_rows
+    offsets = np.zeros(rows * columns * 2)
+    if len(points) == rows * columns:
+        points.foreach_get('offset', offsets)
+    return offsets.reshape(rows, columns, 2)
+
+
+def set_warp_offsets(points, offsets):
+    """ Replace the control points of a collection with offsets of shape (rows, columns, 2), flat ones work too.
+    foreach_set does not run the update callbacks of the points.
+    """
+    offsets = np.asarray(offsets, dtype=float).ravel()
+    count = len(offsets) // 2
+    if len(points) != count:
+        points.clear()
+        for _ in range(count):
+            points.add()
+    points.foreach_set('offset', offsets)
+
+
+def update_warp_map(nodes, proj_settings):
+    """ Bake the warp of a projector into its warp map image and link it, or remove the warp. """
+    node = nodes.tree.nodes.get(WARP_MAP_NODE)
+    previous = node.image if node else None
+    if proj_settings.warp_mode == 'NONE':
+        set_warp_map(nodes.spot, None)
+        release_projection_texture(previous)
+        return
+    image = get_warp_texture(nodes.spot.data)
+    corner_pin = proj_settings.warp_mode == 'CORNER_PIN'
+    offsets = warp_offsets(proj_settings)
+    cached = _warp_maps.get(image.name)
+    if cached and cached[0] == corner_pin and cached[1].shape == offsets.shape and image == previous:
+        if np.array_equal(cached[1], offsets):
+            return
+        # A corner pin moves the whole image, a grid control point only the cells around it.
+        region = None if corner_pin else warp.affected_region(cached[1], offsets)
+        lookup = warp.bake(offsets, corner_pin, region=region, lookup=cached[2])
     else:
-        w, h = proj_settings.resolution.split('x')
+        lookup = warp.bake(offsets, corner_pin)
+    _warp_maps[image.name] = (corner_pin, offsets, lookup)
+    # The whole map is tiny, writing it at once is cheaper than writing the baked region pixel by pixel.
+    pixels = np.ones((warp.MAP_SIZE, warp.MAP_SIZE, 4), dtype=np.float32)
+    pixels[..., :2] = lookup
+    pixels[..., 2] = 0
+    image.pixels.foreach_set(pixels.ravel())
+    # Generated pixels are lost on save unless the image is packed.
+    image.pack()
+    set_warp_map(nodes.spot, image)
+    if previous != image:
+        release_projection_texture(previous)
+
+
+# True while settings are copied between instanced projectors, the copies must not be copied back.
+_syncing = False
+
+
+@contextmanager
+def _syncing_instances():
+    global _syncing
+    previous, _syncing = _syncing, True
+    try:
+        yield
+    finally:
+        _syncing = previous
+
+
+def is_instanced(projector):
+    """ Return True if the projector shares its camera and light data with other projectors. """
+    return projector.data.users > 1
+
+
+def projector_instances(projector):
+    """ Return the projectors which share the camera and light data of a projector, the projector included. """
+    if not is_instanced(projector):
+        return [projector]
+    instances = {projector: None}
+    for scene in bpy.data.scenes:
+        for other in scene_projectors(scene):
+            if other.data == projector.data:
+                instances[other] = None
+    return list(instances)
+
+
+def _settings_value(proj_settings, key):
+    value = getattr(proj_settings, key)
+    if key in WARP_POINT_SETTINGS:
+        offsets = np.zeros(len(value) * 2)
+        value.foreach_get('offset', offsets)
+        return tuple(offsets)
+    return value if isinstance(value, (bool, int, float, str)) else tuple(value)
+
+
+def _write_settings(values, target):
+    """ Write the differing settings values to target. Its update callbacks do not copy them on to its instances. """
+    with _syncing_instances():
+        for key, value in values.items():
+            if _settings_value(target, key) == value:
+                continue
+            if key in WARP_POINT_SETTINGS:
+                set_warp_offsets(getattr(target, key), value)
+            else:
+                setattr(target, key, value)
+
+
+def copy_settings(source, target):
+    """ Copy all projector settings from source to target, only values which differ are written. """
+    _write_settings({key: _settings_value(source, key) for key in INSTANCE_SETTINGS}, target)
 
-    return float(w), float(h)
+
+def sync_instances(projector):
+    """ Copy the settings of an instanced projector to all projectors sharing its data.
+    Their outputs are the same data, they are recomputed once at the end.
+    """
+    values = {key: _settings_value(projector.proj_settings, key) for key in INSTANCE_SETTINGS}
+    with batch_updates(bpy.context):
+        for instance in projector_instances(projector):
+            if instance != projector:
+                _write_settings(values, instance.proj_settings)
 
 
 def update_throw_ratio(proj_settings, context):
     """
     Adjust some settings on a camera to achieve a throw ratio
     """
-    projector = get_projector(context)
-    # Update properties of the camera.
-    throw_ratio = proj_settings.get('throw_ratio')
-    distance = 1
-    alpha = math.atan((distance/throw_ratio)*.5) * 2
-    projector.data.lens_unit = 'FOV'
-    projector.data.angle = alpha
-    projector.data.sensor_width = 10
-    projector.data.display_size = 1
-
-    # Adjust Texture to fit new camera ###
-    w, h = get_resolution(proj_settings, context)
-    aspect_ratio = w/h
-    inverted_aspect_ratio = 1/aspect_ratio
-
-    # Projected Texture
-    update_projected_texture(proj_settings, context)
-
-    # Update spotlight properties.
-    spot = projector.children[0]
-    nodes = spot.data.node_tree.nodes['Group'].node_tree.nodes
-    if bpy.app.version < (2, 81):
-        nodes['Mapping.001'].scale[0] = 1 / throw_ratio
-        nodes['Mapping.001'].scale[1] = 1 / throw_ratio * inverted_aspect_ratio
-    else:
-        nodes['Mapping.001'].inputs[3].default_value[0] = 1 / throw_ratio
-        nodes['Mapping.001'].inputs[3].default_value[1] = 1 / \
-            throw_ratio * inverted_aspect_ratio
-
-    # Update lens shift because it depends on the throw ratio.
-    update_lens_shift(proj_settings, context)
-
-    
+    mark_dirty(proj_settings, context, Dirty.FOV | Dirty.MAPPING_SCALE)
 
 
 def update_lens_shift(proj_settings, context):
     """
     Apply the shift to the camera and texture.
     """
-    projector = get_projector(context)
-    h_shift = proj_settings.get('h_shift', 0.0) / 100
-    v_shift = proj_settings.get('v_shift', 0.0) / 100
-    throw_ratio = proj_settings.get('throw_ratio')
-
-    w, h = get_resolution(proj_settings, context)
-    inverted_aspect_ratio = h/w
-
-    # Update the properties of the camera.
-    cam = projector
-    cam.data.shift_x = h_shift
-    cam.data.shift_y = v_shift * inverted_aspect_ratio
-
-    # Update spotlight node setup.
-    spot = projector.children[0]
-    nodes = spot.data.node_tree.nodes['Group'].node_tree.nodes
-    if bpy.app.version < (2, 81):
-        nodes['Mapping.001'].translation[0] = h_shift / throw_ratio
-        nodes['Mapping.001'].translation[1] = v_shift / throw_ratio * inverted_aspect_ratio
-    else:
-        nodes['Mapping.001'].inputs[1].default_value[0] = h_shift / throw_ratio
-        nodes['Mapping.001'].inputs[1].default_value[1] = v_shift / throw_ratio * inverted_aspect_ratio
+    mark_dirty(proj_settings, context,
+               Dirty.CAMERA_SHIFT | Dirty.MAPPING_TRANSLATION)
 
 
 def update_resolution(proj_settings, context):
-    projector = get_projector(context)
-    nodes = projector.children[0].data.node_tree.nodes['Group'].node_tree.nodes
-    # Change resolution image texture
-    nodes['Image Texture'].image = bpy.data.images[f'_proj.tex.{proj_settings.resolution}']
-    update_throw_ratio(proj_settings, context)
-    update_pixel_grid(proj_settings, context)
+    mark_dirty(proj_settings, context, Dirty.TEXTURE_IMAGE | Dirty.RESOLUTION)
+
+
+def update_custom_texture_res(proj_settings, context):
+    mark_dirty(proj_settings, context, Dirty.RESOLUTION)
+
+
+def update_use_drivers(proj_settings, context):
+    """ Switch between driven projection math and updates by the property callbacks. """
+    mark_dirty(proj_settings, context, Dirty.ALL)
+    projector = _owner(proj_settings, context)
+    if projector is None:
+        return
+    if proj_settings.use_drivers:
+        add_drivers(projector)
+    else:
+        remove_drivers(projector)
 
 
 def update_checker_color(proj_settings, context):
     # Update checker texture color
-    nodes = get_projector(
-        context).children[0].data.node_tree.nodes['Group'].node_tree.nodes
-    c = proj_settings.projected_color
-    nodes['Checker Texture'].inputs['Color2'].default_value = [c.r, c.g, c.b, 1]
+    dirty = Dirty.CHECKER_COLOR
+    if proj_settings.projected_texture == Textures.ID_COLOR.value:
+        dirty |= Dirty.TEXTURE_IMAGE
+    mark_dirty(proj_settings, context, dirty)
+
+
+def update_warp(proj_settings, context):
+    """ Give the warp mode its control points at rest the first time it is used. """
+    if proj_settings.warp_mode == 'CORNER_PIN' and len(proj_settings.corner_pin) != 4:
+        set_warp_offsets(proj_settings.corner_pin, np.zeros((2, 2, 2)))
+    elif proj_settings.warp_mode == 'GRID':
+        _resize_warp_grid(proj_settings, proj_settings.warp_columns, proj_settings.warp_rows)
+    mark_dirty(proj_settings, context, Dirty.WARP)
+
+
+def _resize_warp_grid(proj_settings, columns, rows):
+    """ Resample the warp grid from the given number of columns and rows to the current ones. """
+    points = proj_settings.warp_points
+    target = (proj_settings.warp_rows, proj_settings.warp_columns)
+    if len(points) == columns * rows and (rows, columns) == target:
+        return
+    if points and len(points) == columns * rows:
+        offsets = np.zeros(len(points) * 2)
+        points.foreach_get('offset', offsets)
+        offsets = warp.resample(offsets.reshape(rows, columns, 2), target[1], target[0])
+    else:
+        offsets = np.zeros((*target, 2))
+    set_warp_offsets(points, offsets)
+
+
+def update_warp_columns(proj_settings, context):
+    _resize_warp_grid(proj_settings, len(proj_settings.warp_points) // proj_settings.warp_rows,
+                      proj_settings.warp_rows)
+    mark_dirty(proj_settings, context, Dirty.WARP)
+
+
+def update_warp_rows(proj_settings, context):
+    _resize_warp_grid(proj_settings, proj_settings.warp_columns,
+                      len(proj_settings.warp_points) // proj_settings.warp_columns)
+    mark_dirty(proj_settings, context, Dirty.WARP)
+
+
+def update_warp_point(point, context):
+    """ A control point belongs to the projector settings of its object. """
+    mark_dirty(point.id_data.proj_settings, context, Dirty.WARP)
+
+
+class PROJECTOR_OT_reset_warp(Operator):
+    """ Move all control points of the warp of the selected projectors back to their rest positions. """
+    bl_idname = 'projector.reset_warp'
+    bl_label = 'Reset Warp'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return bool(get_projectors(context, only_selected=True))
+
+    def execute(self, context):
+        with batch_updates(context):
+            for projector in get_projectors(context, only_selected=True):
+                proj_settings = projector.proj_settings
+                for points in (proj_settings.corner_pin, proj_settings.warp_points):
+                    set_warp_offsets(points, np.zeros(len(points) * 2))
+                mark_dirty(proj_settings, context, Dirty.WARP)
+        return {'FINISHED'}
+
+
+class WarpPoint(bpy.types.PropertyGroup):
+    offset: bpy.props.FloatVectorProperty(
+        name="Offset",
+        description="Move the image at this control point, in fractions of the image width and height",
+        size=2,
+        soft_min=-0.5, soft_max=0.5,
+        step=0.1,
+        subtype='XYZ',
+        update=update_warp_point)
 
 
 def update_power(proj_settings, context):
     # Update spotlight power
-    spot = get_projector(context).children[0]
-    spot.data.energy = proj_settings["power"]
+    mark_dirty(proj_settings, context, Dirty.POWER)
 
 
-def update_pixel_grid(proj_settings, context):
-    """ Update the pixel grid. Meaning, make it visible by linking the right node and updating the resolution. """
-    root_tree = get_projector(context).children[0].data.node_tree
-    nodes = root_tree.nodes
-    pixel_grid_nodes = nodes['pixel_grid'].node_tree.nodes
-    width, height = get_resolution(proj_settings, context)
-    pixel_grid_nodes['_width'].outputs[0].default_value = width
-    pixel_grid_nodes['_height'].outputs[0].default_value = height
-    if proj_settings.show_pixel_grid:
-        root_tree.links.new(nodes['pixel_grid'].outputs[0], nodes['Light Output'].inputs[0])
+def update_use_lumens(proj_settings, context):
+    """ Switch between the power of the spot light and the lumens of the projector. """
+    mark_dirty(proj_settings, context, Dirty.POWER)
+    projector = _owner(proj_settings, context)
+    # The driver expression of the energy differs.
+    if projector is not None and proj_settings.use_drivers:
+        add_drivers(projector)
+
+
+def _use_pixel_grid_group(nodes, baked):
+    """ Switch the pixel grid node between the procedural and the baked node group. """
+    if baked:
+        node_group = get_shared_node_group(BAKED_PIXEL_GRID_GROUP, create_baked_pixel_grid_node_group)
     else:
-        root_tree.links.new(nodes['Emission'].outputs[0], nodes['Light Output'].inputs[0])
+        node_group = get_shared_node_group(PIXEL_GRID_GROUP, create_pixel_grid_node_group)
+    pixel_grid = nodes.pixel_grid
+    if pixel_grid.node_tree != node_group:
+        pixel_grid.node_tree = node_group
+        nodes.tree.links.new(nodes.emission.outputs[0], pixel_grid.inputs[0])
+        nodes.tree.links.new(nodes.group.outputs[0], pixel_grid.inputs[1])
 
-    
-def create_pixel_grid_node_group():
-    node_group = bpy.data.node_groups.new(
-        '_Projectors-Addon_PixelGrid', 'ShaderNodeTree')
 
-    # Create input/output sockets for the node group.
-    if(bpy.app.version >= (4, 0)):
-        node_group.interface.new_socket('Shader', socket_type='NodeSocketShader')
-        node_group.interface.new_socket('Vector', socket_type='NodeSocketVector')
+def update_pixel_grid(proj_settings, context):
+    """ Update the pixel grid. Meaning, make it visible by linking the right node and updating the resolution. """
+    mark_dirty(proj_settings, context,
+               Dirty.PIXEL_GRID_SIZE | Dirty.LINK_TOPOLOGY)
 
-        node_group.interface.new_socket('Shader', in_out='OUTPUT', socket_type='NodeSocketShader')
-    else:
-        inputs = node_group.inputs
-        inputs.new('NodeSocketShader', 'Shader')
-        inputs.new('NodeSocketVector', 'Vector')
 
-        outputs = node_group.outputs
-        outputs.new('NodeSocketShader', 'Shader')
+def create_pixel_grid_node_group(name):
+    """ Create the pixel grid node group. The resolution of a projector are inputs of its group node. """
+    node_group = bpy.data.node_groups.new(name, 'ShaderNodeTree')
+
+    # Create input/output sockets for the node group.
+    new_group_socket(node_group, 'Shader', 'NodeSocketShader')
+    new_group_socket(node_group, 'Vector', 'NodeSocketVector')
+    new_group_socket(node_group, 'Width', 'NodeSocketFloat').default_value = 1920
+    new_group_socket(node_group, 'Height', 'NodeSocketFloat').default_value = 1080
+    new_group_socket(node_group, 'Shader', 'NodeSocketShader', in_out='OUTPUT')
 
     nodes = node_group.nodes
 
@@ -399,16 +1237,6 @@ def create_pixel_grid_node_group():
     sepXYZ = nodes.new('ShaderNodeSeparateXYZ')
     sepXYZ.location = auto_pos(200)
 
-    in_width = nodes.new('ShaderNodeValue')
-    in_width.name = '_width'
-    in_width.label = 'Width'
-    in_width.location = auto_pos(100)
-
-    in_height = nodes.new('ShaderNodeValue')
-    in_height.name = '_height'
-    in_height.label = 'Height'
-    in_height.location = auto_pos(y=-200)
-
     mul1 = nodes.new('ShaderNodeMath')
     mul1.operation = 'MULTIPLY'
     mul1.location = auto_pos(100)
@@ -458,8 +1286,8 @@ def create_pixel_grid_node_group():
     links.new(group_input.outputs[0], mix_shader.inputs[2])
     links.new(group_input.outputs[1], sepXYZ.inputs[0])
 
-    links.new(in_width.outputs[0], mul1.inputs[1])
-    links.new(in_height.outputs[0], mul2.inputs[1])
+    links.new(group_input.outputs['Width'], mul1.inputs[1])
+    links.new(group_input.outputs['Height'], mul2.inputs[1])
 
     links.new(sepXYZ.outputs[0], mul1.inputs[0])
     links.new(sepXYZ.outputs[1], mul2.inputs[0])
@@ -481,46 +1309,124 @@ def create_pixel_grid_node_group():
     return node_group
     
 
-def create_projector(context):
-    """
-    Create a new projector composed out of a camera (parent obj) and a spotlight (child not intended for user interaction).
-    The camera is the object intended for the user to manipulate and custom properties are stored there.
-    The spotlight with a custom nodetree is responsible for actual projection of the texture.
+def create_baked_pixel_grid_node_group(name):
+    """ Create the baked pixel grid node group, a drop-in replacement of the procedural pixel grid.
+    One lookup of the repeated pixel cell image replaces the modulo and color ramp math per shading sample.
     """
-    create_projector_textures()
-    log.debug('Creating projector.')
+    node_group = bpy.data.node_groups.new(name, 'ShaderNodeTree')
 
-    # Create a camera and a spotlight
-    # ### Spot Light ###
-    bpy.ops.object.light_add(type='SPOT', location=(0, 0, 0))
-    spot = context.object
-    spot.name = 'Projector.Spot'
+    new_group_socket(node_group, 'Shader', 'NodeSocketShader')
+    new_group_socket(node_group, 'Vector', 'NodeSocketVector')
+    new_group_socket(node_group, 'Width', 'NodeSocketFloat').default_value = 1920
+    new_group_socket(node_group, 'Height', 'NodeSocketFloat').default_value = 1080
+    new_group_socket(node_group, 'Shader', 'NodeSocketShader', in_out='OUTPUT')
+
+    nodes = node_group.nodes
+    auto_pos = auto_offset()
+
+    group_input = nodes.new('NodeGroupInput')
+    group_input.location = auto_pos(200)
+
+    resolution = nodes.new('ShaderNodeCombineXYZ')
+    resolution.inputs[2].default_value = 1
+    resolution.location = auto_pos(200)
+
+    scale = nodes.new('ShaderNodeVectorMath')
+    scale.operation = 'MULTIPLY'
+    scale.location = auto_pos(200)
+
+    cell = nodes.new('ShaderNodeTexImage')
+    cell.image = get_pixel_cell_texture()
+    cell.extension = 'REPEAT'
+    cell.interpolation = 'Closest'
+    cell.location = auto_pos(200)
+
+    transparent = nodes.new('ShaderNodeBsdfTransparent')
+    transparent.location = auto_pos(y=-200)
+
+    mix_shader = nodes.new('ShaderNodeMixShader')
+    mix_shader.location = auto_pos(300)
+
+    group_output = nodes.new('NodeGroupOutput')
+    group_output.location = auto_pos(100)
+
+    links = node_group.links
+    links.new(group_input.outputs['Width'], resolution.inputs[0])
+    links.new(group_input.outputs['Height'], resolution.inputs[1])
+    links.new(group_input.outputs[1], scale.inputs[0])
+    links.new(resolution.outputs[0], scale.inputs[1])
+    links.new(scale.outputs[0], cell.inputs['Vector'])
+    links.new(cell.outputs['Color'], mix_shader.inputs[0])
+    links.new(transparent.outputs[0], mix_shader.inputs[1])
+    links.new(group_input.outputs[0], mix_shader.inputs[2])
+    links.new(mix_shader.outputs[0], group_output.inputs[0])
+
+    return node_group
+
+
+def build_spot(light=None):
+    """ Build the spot light of a projector with its node tree, not linked to any collection.
+    Instanced projectors pass the light data they share, it has its node tree already.
+    """
+    spot = bpy.data.objects.new('Projector.Spot', light if light else bpy.data.lights.new('Spot', 'SPOT'))
     spot.scale = (.01, .01, .01)
-    spot.data.spot_size = math.pi - 0.001
-    spot.data.spot_blend = 0
-    spot.data.shadow_soft_size = 0.0
     spot.hide_select = True
-    spot[ADDON_ID.format('spot')] = True
-    spot.data.cycles.use_multiple_importance_sampling = False
-    add_projector_node_tree_to_spot(spot)
+    spot[SPOT_TAG] = True
+    if light is None:
+        spot.data.spot_size = math.pi - 0.001
+        spot.data.spot_blend = 0
+        spot.data.shadow_soft_size = 0.0
+        spot.data.cycles.use_multiple_importance_sampling = False
+        add_projector_node_tree_to_spot(spot)
+    return spot
+
+
+def build_projector(collection, name='Projector', location=(0, 0, 0), rotation=(0, 0, 0), instance_of=None):
+    """
+    Build the camera and the spotlight of a projector straight through bpy.data.
+    Nothing depends on the context, the selection or the active object.
+    An instance shares the camera data and the light data of the projector instance_of.
+    """
+    # ### Spot Light ###
+    spot = build_spot(projector_nodes(instance_of).spot.data if instance_of else None)
 
     # ### Camera ###
-    bpy.ops.object.camera_add(enter_editmode=False,
-                              location=(0, 0, 0),
-                              rotation=(0, 0, 0))
-    cam = context.object
-    cam.name = 'Projector'
+    cam = bpy.data.objects.new(name, instance_of.data if instance_of else bpy.data.cameras.new('Camera'))
+    cam.data[PROJECTOR_TAG] = True
+    cam.location = location
+    cam.rotation_euler = rotation
 
     # Parent light to cam.
     spot.parent = cam
+    collection.objects.link(cam)
+    collection.objects.link(spot)
+    return cam
+
 
-    # Move newly create projector (cam and spotlight) to 3D-Cursor position.
-    cam.location = context.scene.cursor.location
-    cam.rotation_euler = context.scene.cursor.rotation_euler
+def create_projector(context):
+    """
+    Create a new projector composed out of a camera (parent obj) and a spotlight (child not intended for user interaction).
+    The camera is the object intended for the user to manipulate and custom properties are stored there.
+    The spotlight with a custom nodetree is responsible for actual projection of the texture.
+    """
+    log.debug('Creating projector.')
+
+    # Create the projector at the 3D-Cursor position.
+    cursor = context.scene.cursor
+    cam = build_projector(context.collection,
+                          location=cursor.location,
+                          rotation=cursor.rotation_euler)
+    register_projector(context.scene, cam)
+
+    # Make the new projector the only selected and the active object.
+    for obj in context.selected_objects:
+        obj.select_set(False)
+    cam.select_set(True)
+    context.view_layer.objects.active = cam
     return cam
 
 
-def init_projector(proj_settings, context):
+def _set_default_settings(proj_settings):
     # # Add custom properties to store projector settings on the camera obj.
     proj_settings.throw_ratio = 0.8
     proj_settings.power = 1000.0
@@ -531,14 +1437,97 @@ def init_projector(proj_settings, context):
     proj_settings.resolution = '1920x1080'
     proj_settings.use_custom_texture_res = True
 
-    # Init Projector
-    update_throw_ratio(proj_settings, context)
-    update_projected_texture(proj_settings, context)
-    update_resolution(proj_settings, context)
-    update_checker_color(proj_settings, context)
-    update_lens_shift(proj_settings, context)
-    update_power(proj_settings, context)
-    update_pixel_grid(proj_settings, context)
+
+def init_projector(proj_settings, context):
+    # Set all properties first and compute the projector once at the end.
+    with batch_updates(context):
+        _set_default_settings(proj_settings)
+        # Init Projector
+        mark_dirty(proj_settings, context, Dirty.ALL)
+
+
+# Keys of a projector spec that are projector settings.
+SPEC_SETTINGS = ('throw_ratio', 'power', 'use_lumens', 'lumens', 'resolution', 'h_shift', 'v_shift', 'projected_texture',
+                 'projected_color', 'use_custom_texture_res', 'show_pixel_grid', 'bake_pixel_grid', 'use_drivers')
+
+
+def create_projectors(specs, scene=None, collection=None, instanced=False):
+    """
+    Create many projectors at once without bpy.ops, undo pushes or selection changes.
+    The property callbacks of all projectors are collected and flushed once at the end.
+    Every spec is a dict with the optional keys name, location, rotation and any of SPEC_SETTINGS.
+    With instanced=True, projectors with the same settings in their specs share one camera and light data.
+    Return the created projectors in the order of the specs.
+    """
+    scene = scene if scene else bpy.context.scene
+    collection = collection if collection else scene.collection
+    projectors = []
+    # Settings of a spec -> the first projector created with them.
+    sources = {}
+    with batch_updates(bpy.context):
+        for spec in specs:
+            unknown = set(spec) - set(SPEC_SETTINGS) - {'name', 'location', 'rotation'}
+            if unknown:
+                raise KeyError(f'Unknown projector spec keys: {sorted(unknown)}')
+            settings_key = tuple((key, repr(spec[key])) for key in SPEC_SETTINGS if key in spec)
+            source = sources.get(settings_key) if instanced else None
+            cam = build_projector(collection,
+                                  name=spec.get('name', 'Projector'),
+                                  location=spec.get('location', (0, 0, 0)),
+                                  rotation=spec.get('rotation', (0, 0, 0)),
+                                  instance_of=source)
+            register_projector(scene, cam)
+            proj_settings = cam.proj_settings
+            if source is not None:
+                copy_settings(source.proj_settings, proj_settings)
+            else:
+                _set_default_settings(proj_settings)
+                for key in SPEC_SETTINGS:
+                    if key in spec:
+                        setattr(proj_settings, key, spec[key])
+                mark_projector_dirty(cam, proj_settings, Dirty.ALL)
+                sources[settings_key] = cam
+            projectors.append(cam)
+    return projectors
+
+
+class PROJECTOR_OT_create_projector_array(Operator):
+    """Create a grid of projectors at the 3D-Cursor"""
+    bl_idname = 'projector.create_array'
+    bl_label = 'Add Projector Array'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    columns: bpy.props.IntProperty(name='Columns', default=4, min=1, soft_max=50)
+    rows: bpy.props.IntProperty(name='Rows', default=2, min=1, soft_max=50)
+    spacing_x: bpy.props.FloatProperty(name='Horizontal Spacing', default=1.0, unit='LENGTH')
+    spacing_y: bpy.props.FloatProperty(name='Vertical Spacing', default=1.0, unit='LENGTH')
+    instanced: bpy.props.BoolProperty(
+        name='Instanced',
+        description='Let all projectors of the array share one camera and light data, they keep identical settings',
+        default=False)
+
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'OBJECT'
+
+    def execute(self, context):
+        cursor = context.scene.cursor
+        specs = []
+        for row in range(self.rows):
+            for column in range(self.columns):
+                offset = Vector(((column - (self.columns - 1) / 2) * self.spacing_x,
+                                 (row - (self.rows - 1) / 2) * self.spacing_y,
+                                 0))
+                specs.append({'location': cursor.matrix @ offset,
+                              'rotation': cursor.rotation_euler.copy()})
+        projectors = create_projectors(specs, context.scene, context.collection, instanced=self.instanced)
+
+        for obj in context.selected_objects:
+            obj.select_set(False)
+        for projector in projectors:
+            projector.select_set(True)
+        context.view_layer.objects.active = projectors[-1]
+        return {'FINISHED'}
 
 
 class PROJECTOR_OT_create_projector(Operator):
@@ -559,28 +1548,133 @@ class PROJECTOR_OT_create_projector(Operator):
 
 def update_projected_texture(proj_settings, context):
     """ Update the projected output source. """
-    projector = get_projectors(context, only_selected=True)[0]
-    root_tree = projector.children[0].data.node_tree
-    group_tree = root_tree.nodes['Group'].node_tree
-    group_output_node = group_tree.nodes['Group Output']
-    group_node = root_tree.nodes['Group']
-    emission_node = root_tree.nodes['Emission']
+    mark_dirty(proj_settings, context,
+               Dirty.LINK_TOPOLOGY | Dirty.TEXTURE_IMAGE | Dirty.RESOLUTION)
+
+
+def _link_projected_texture(proj_settings, nodes):
+    links = nodes.tree.links
+    emission_node = nodes.emission
 
     # Switch between the three possible cases by relinking some nodes.
     case = proj_settings.projected_texture
     if case == Textures.CHECKER.value:
-        mix_node = group_tree.nodes['Mix.001']
-        group_tree.links.new(
-            mix_node.outputs['Color'], group_output_node.inputs[1])
-        root_tree.links.new(group_node.outputs[1], emission_node.inputs[0])
-    elif case == Textures.COLOR_GRID.value:
-        img_node = group_tree.nodes['Image Texture']
-        group_tree.links.new(img_node.outputs[0], group_output_node.inputs[1])
-        root_tree.links.new(group_node.outputs[1], emission_node.inputs[0])
+        links.new(nodes.group.outputs['color'], emission_node.inputs[0])
+    elif case == Textures.COLOR_GRID.value or case in PATTERN_TEXTURES:
+        links.new(nodes.color_grid.outputs[0], emission_node.inputs[0])
     elif case == Textures.CUSTOM_TEXTURE.value:
-        custom_tex_node = root_tree.nodes['Image Texture']
-        root_tree.links.new(
-            custom_tex_node.outputs[0], emission_node.inputs[0])
+        links.new(nodes.image_texture.outputs[0], emission_node.inputs[0])
+
+
+class PROJECTOR_OT_migrate_node_groups(Operator):
+    """ Replace the per projector node groups of older files with the node groups shared by all projectors.
+    Also repairs projectors with missing nodes or spot lights. """
+    bl_idname = 'projector.migrate_node_groups'
+    bl_label = 'Migrate Projector Node Groups'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        projectors = [projector for projector in get_projectors(context)
+                      if not _is_intact(find_spot(projector))]
+        with batch_updates(context):
+            for projector in projectors:
+                repair_projector(projector)
+        removed = remove_legacy_node_groups()
+        self.report({'INFO'}, f'Migrated {len(projectors)} projector(s), removed {removed} node group(s).')
+        return {'FINISHED'}
+
+
+def _node_tree_dependencies(node_tree, images, node_groups):
+    """ Collect the images and node groups used by a node tree and its nested groups. """
+    for node in node_tree.nodes:
+        if getattr(node, 'image', None):
+            images.add(node.image)
+        if node.bl_idname == 'ShaderNodeGroup' and node.node_tree and node.node_tree not in node_groups:
+            node_groups.add(node.node_tree)
+            _node_tree_dependencies(node.node_tree, images, node_groups)
+
+
+def _remove_unused(ids):
+    """ Remove all datablocks without users in one batch. Return the number of removed datablocks. """
+    unused = [id_data for id_data in ids if id_data.users == 0]
+    if unused:
+        bpy.data.batch_remove(unused)
+    return len(unused)
+
+
+def _remove_with_dependencies(objects, data):
+    """
+    Remove objects and afterwards all data, node groups and images which are not used anymore.
+    Data still used elsewhere, for example an image also used in a material, is kept.
+    """
+    images = set()
+    node_groups = set()
+    for data_block in data:
+        if getattr(data_block, 'node_tree', None):
+            _node_tree_dependencies(data_block.node_tree, images, node_groups)
+        # Images referenced by custom properties, like the source of a proxy.
+        images.update(value for value in data_block.values() if isinstance(value, bpy.types.Image))
+    removed = len(objects)
+    if objects:
+        bpy.data.batch_remove(list(objects))
+    # Removal order matters, every step can free the users of the next one.
+    removed += _remove_unused(data)
+    removed += _remove_unused(node_groups)
+    removed += _remove_unused(images)
+    return removed
+
+
+def delete_projectors(scene, projectors):
+    """ Delete projectors with all data only they use. Return the number of removed datablocks. """
+    # Instances which are kept take over the drivers of their shared light.
+    deleted = set(projectors)
+    for projector in projectors:
+        survivors = [instance for instance in projector_instances(projector) if instance not in deleted]
+        if survivors and survivors[0].proj_settings.use_drivers:
+            retarget_drivers(survivors[0])
+    unregister_projectors(scene, projectors)
+    objects = set()
+    data = set()
+    for projector in projectors:
+        _node_handles.pop(projector.as_pointer(), None)
+        for obj in (projector, *projector.children):
+            objects.add(obj)
+            if obj.data:
+                data.add(obj.data)
+    return _remove_with_dependencies(objects, data)
+
+
+def _is_projector_light(light):
+    """ Return True if the light data carries a projector node tree. """
+    if light.type != 'SPOT' or not light.node_tree:
+        return False
+    for node in light.node_tree.nodes:
+        if node.bl_idname == 'ShaderNodeGroup' and node.node_tree:
+            if node.node_tree.get(VERSION_TAG) or LEGACY_NODE_GROUP.match(node.node_tree.name):
+                return True
+    return False
+
+
+def purge_projector_orphans(scene):
+    """
+    Remove leftovers of projectors deleted by other means than the delete operator, e.g. the outliner or scripts.
+    Return the number of removed datablocks.
+    """
+    unregister_projectors(scene, [])
+    # Spot lights whose projector camera is gone or was deleted from every scene.
+    # Cameras of projectors from before the projector tag are only recognized by their spot.
+    objects = {obj for obj in bpy.data.objects
+               if obj.get(SPOT_TAG) and (obj.parent is None or not obj.parent.users_scene
+                                         or not (is_projector(obj.parent) or _is_legacy_projector(obj.parent)))}
+    data = {obj.data for obj in objects if obj.data}
+    data.update(light for light in bpy.data.lights if light.users == 0 and _is_projector_light(light))
+    data.update(cam for cam in bpy.data.cameras if cam.users == 0 and cam.get(PROJECTOR_TAG))
+    removed = _remove_with_dependencies(objects, data)
+    # Node groups and textures whose users were removed before.
+    removed += _remove_unused(node_group for node_group in bpy.data.node_groups
+                              if node_group.get(VERSION_TAG) or LEGACY_NODE_GROUP.match(node_group.name))
+    removed += _remove_unused(image for image in bpy.data.images if image.name.startswith(TEXTURE_PREFIX))
+    return removed
 
 
 class PROJECTOR_OT_delete_projector(Operator):
@@ -595,11 +1689,19 @@ class PROJECTOR_OT_delete_projector(Operator):
 
     def execute(self, context):
         selected_projectors = get_projectors(context, only_selected=True)
-        for projector in selected_projectors:
-            for child in projector.children:
-                bpy.data.objects.remove(child, do_unlink=True)
-            else:
-                bpy.data.objects.remove(projector, do_unlink=True)
+        delete_projectors(context.scene, selected_projectors)
+        return {'FINISHED'}
+
+
+class PROJECTOR_OT_purge_orphans(Operator):
+    """Remove data left behind by projectors that were deleted without the Delete Projector operator"""
+    bl_idname = 'projector.purge_orphans'
+    bl_label = 'Purge Projector Orphans'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        removed = purge_projector_orphans(context.scene)
+        self.report({'INFO'}, f'Removed {removed} datablock(s).')
         return {'FINISHED'}
 
 
@@ -614,6 +1716,17 @@ class ProjectorSettings(bpy.types.PropertyGroup):
         soft_min=0, soft_max=999999,
         update=update_power,
         unit='POWER')
+    use_lumens: bpy.props.BoolProperty(
+        name="Lumens",
+        description="Specify the brightness in ANSI lumens like a projector datasheet instead of the power of the spot light",
+        default=False,
+        update=update_use_lumens)
+    lumens: bpy.props.FloatProperty(
+        name="Lumens",
+        description="Luminous flux of a full white image in ANSI lumens",
+        default=3000,
+        min=0, soft_max=50000,
+        update=update_power)
     resolution: bpy.props.EnumProperty(
         items=RESOLUTIONS,
         default='1920x1080',
@@ -622,8 +1735,8 @@ class ProjectorSettings(bpy.types.PropertyGroup):
     use_custom_texture_res: bpy.props.BoolProperty(
         name="Let Image Define Projector Resolution",
         default=True,
-        description="Use the resolution from the image as the projector resolution. Warning: After selecting a new image toggle this checkbox to update",
-        update=update_throw_ratio)
+        description="Use the resolution from the image as the projector resolution",
+        update=update_custom_texture_res)
     h_shift: bpy.props.FloatProperty(
         name="Horizontal Shift",
         description="Horizontal Lens Shift",
@@ -643,25 +1756,108 @@ class ProjectorSettings(bpy.types.PropertyGroup):
         items=PROJECTED_OUTPUTS,
         default=Textures.CHECKER.value,
         description="What do you to project?",
-        update=update_throw_ratio)
+        update=update_projected_texture)
     show_pixel_grid: bpy.props.BoolProperty(
         name="Show Pixel Grid",
         description="When checked the image is divided into a pixel grid with the dimensions of the image resolution.",
         default=False,
         update=update_pixel_grid)
+    bake_pixel_grid: bpy.props.BoolProperty(
+        name="Baked",
+        description="Draw the pixel grid with one image lookup instead of computing it for every shading sample",
+        default=False,
+        update=update_pixel_grid)
+    use_drivers: bpy.props.BoolProperty(
+        name="Driven",
+        description="Drive the projection with drivers so animated settings work in playback and renders without running Python",
+        default=False,
+        update=update_use_drivers)
+    warp_mode: bpy.props.EnumProperty(
+        name="Warp",
+        items=[('NONE', 'None', 'Project the image unwarped'),
+               ('CORNER_PIN', 'Corner Pin', 'Move the four corners of the image, a keystone correction'),
+               ('GRID', 'Grid', 'Move the control points of a grid over the image, a mesh warp')],
+        default='NONE',
+        description="Correct the projected image for oblique or curved surfaces",
+        update=update_warp)
+    corner_pin: bpy.props.CollectionProperty(type=WarpPoint)
+    warp_columns: bpy.props.IntProperty(
+        name="Columns",
+        description="Number of control points of the warp grid along the image width",
+        default=4, min=2, soft_max=16,
+        update=update_warp_columns)
+    warp_rows: bpy.props.IntProperty(
+        name="Rows",
+        description="Number of control points of the warp grid along the image height",
+        default=4, min=2, soft_max=16,
+        update=update_warp_rows)
+    # Control points row by row, from the bottom left to the top right of the image.
+    warp_points: bpy.props.CollectionProperty(type=WarpPoint)
+    # Resolution in use, written by the update engine and read by the drivers.
+    resolution_x: bpy.props.FloatProperty(default=1920, options={'HIDDEN'})
+    resolution_y: bpy.props.FloatProperty(default=1080, options={'HIDDEN'})
+
+
+# Settings which instanced projectors keep identical.
+INSTANCE_SETTINGS = tuple(ProjectorSettings.__annotations__)
+# Collections of warp control points, instanced projectors copy their offsets.
+WARP_POINT_SETTINGS = ('corner_pin', 'warp_points')
+
+
+@persistent
+def _on_depsgraph_update(scene, depsgraph=None):
+    """ Pick up new or changed custom textures of projectors that take their resolution from the image. """
+    if depsgraph is None:
+        return
+    if not any(isinstance(update.id, (bpy.types.Light, bpy.types.Image, bpy.types.NodeTree))
+               for update in depsgraph.updates):
+        return
+    for projector in scene_projectors(scene):
+        proj_settings = projector.proj_settings
+        if not uses_image_resolution(proj_settings):
+            continue
+        # A repair would write data and cause another depsgraph update, damaged projectors are only reported.
+        if projector_nodes(projector, repair=False) is None:
+            _report_damage(projector)
+            continue
+        w, h = _resolution(projector, proj_settings)
+        if (w, h) != (proj_settings.resolution_x, proj_settings.resolution_y):
+            mark_projector_dirty(projector, proj_settings, Dirty.RESOLUTION)
+    flush_updates(bpy.context)
 
 
 def register():
+    bpy.utils.register_class(WarpPoint)
     bpy.utils.register_class(ProjectorSettings)
     bpy.utils.register_class(PROJECTOR_OT_create_projector)
+    bpy.utils.register_class(PROJECTOR_OT_create_projector_array)
     bpy.utils.register_class(PROJECTOR_OT_delete_projector)
+    bpy.utils.register_class(PROJECTOR_OT_purge_orphans)
     bpy.utils.register_class(PROJECTOR_OT_change_color_randomly)
+    bpy.utils.register_class(PROJECTOR_OT_purge_textures)
+    bpy.utils.register_class(PROJECTOR_OT_migrate_node_groups)
+    bpy.utils.register_class(PROJECTOR_OT_reset_warp)
     bpy.types.Object.proj_settings = bpy.props.PointerProperty(
         type=ProjectorSettings)
+    bpy.app.handlers.depsgraph_update_post.append(_on_depsgraph_update)
+    for handlers in (bpy.app.handlers.load_post, bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+        handlers.append(_drop_node_handles)
 
 
 def unregister():
+    for handlers in (bpy.app.handlers.load_post, bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+        if _drop_node_handles in handlers:
+            handlers.remove(_drop_node_handles)
+    _node_handles.clear()
+    if _on_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(_on_depsgraph_update)
+    bpy.utils.unregister_class(PROJECTOR_OT_reset_warp)
+    bpy.utils.unregister_class(PROJECTOR_OT_migrate_node_groups)
+    bpy.utils.unregister_class(PROJECTOR_OT_purge_textures)
     bpy.utils.unregister_class(PROJECTOR_OT_change_color_randomly)
+    bpy.utils.unregister_class(PROJECTOR_OT_purge_orphans)
     bpy.utils.unregister_class(PROJECTOR_OT_delete_projector)
+    bpy.utils.unregister_class(PROJECTOR_OT_create_projector_array)
     bpy.utils.unregister_class(PROJECTOR_OT_create_projector)
     bpy.utils.unregister_class(ProjectorSettings)
+    bpy.utils.unregister_class(WarpPoint)
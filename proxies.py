@@ -0,0 +1,155 @@
+import hashlib
+import logging
+import os
+
+import bpy
+import numpy as np
+
+from .helper import ADDON_ID, scene_projectors
+from .image_probe import packed_data
+from .projector import (PROXY_SOURCE_SIZE, TEXTURE_PREFIX, batch_updates, image_size, mark_projector_dirty,
+                        projector_nodes, release_projection_texture, uses_image_resolution, Dirty)
+
+log = logging.getLogger(name=__file__)
+
+PROXY_DIR = 'projector_proxies'
+PROXY_PREFIX = TEXTURE_PREFIX + 'proxy.'
+# Custom property of the spot light data, the full resolution image while a proxy is projected.
+PROXY_SOURCE = ADDON_ID.format('proxy_source')
+
+TEXTURE_QUALITIES = [('FINAL', 'Final', 'Project the custom textures at full resolution', 1),
+                     ('HALF', 'Preview 1/2', 'Project custom textures at half resolution', 2),
+                     ('QUARTER', 'Preview 1/4', 'Project custom textures at a quarter of their resolution', 4),
+                     ('EIGHTH', 'Preview 1/8', 'Project custom textures at an eighth of their resolution', 8)]
+FACTORS = {'HALF': 2, 'QUARTER': 4, 'EIGHTH': 8}
+
+
+def proxy_directory():
+    """ Return the directory of the proxies, next to the .blend file or in the session temp dir for unsaved files. """
+    if bpy.data.filepath:
+        return bpy.path.abspath('//' + PROXY_DIR)
+    return os.path.join(bpy.app.tempdir, PROXY_DIR)
+
+
+def source_key(image):
+    """ Return a key which changes with the pixels of an image, its path and modification time or its packed data. """
+    if image.packed_file:
+        return hashlib.sha1(packed_data(image.packed_file)).hexdigest()
+    filepath = os.path.normpath(bpy.path.abspath(image.filepath_from_user(), library=image.library))
+    stamp = os.stat(filepath).st_mtime_ns
+    return hashlib.sha1(f'{filepath}:{stamp}'.encode()).hexdigest()
+
+
+def proxy_path(image, factor):
+    """ Return the file path of the proxy of an image at 1/factor of its resolution. """
+    stem = bpy.path.clean_name(os.path.splitext(bpy.path.basename(image.filepath))[0] or image.name)
+    extension = '.exr' if image.is_float else '.png'
+    return os.path.join(proxy_directory(), f'{stem}.{source_key(image)[:16]}.{factor}{extension}')
+
+
+def downscale(pixels, factor):
+    """ Box filter an array of shape (height, width, channels) down by an integer factor. """
+    height, width = pixels.shape[0] // factor * factor, pixels.shape[1] // factor * factor
+    blocks = pixels[:height, :width].reshape(height // factor, factor, width // factor, factor, -1)
+    return blocks.mean(axis=(1, 3), dtype=np.float32)
+
+
+def write_proxy(image, factor, filepath):
+    """ Downscale an image and save it to filepath. The full resolution pixels are freed again if they were
+    not loaded before. Raise a RuntimeError if the image can not be loaded.
+    """
+    was_loaded = image.has_data
+    width, height = image.size
+    if not width or not height:
+        raise RuntimeError(f'Could not load {image.filepath}')
+    pixels = np.empty(width * height * image.channels, dtype=np.float32)
+    image.pixels.foreach_get(pixels)
+    if not was_loaded:
+        image.buffers_free()
+    small = downscale(pixels.reshape(height, width, image.channels), factor)
+
+    proxy = bpy.data.images.new('_proj.proxy.tmp', width=small.shape[1], height=small.shape[0],
+                                alpha=image.channels == 4, float_buffer=image.is_float)
+    proxy.pixels.foreach_set(small.ravel())
+    proxy.filepath_raw = filepath
+    proxy.file_format = 'OPEN_EXR' if image.is_float else 'PNG'
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    proxy.save()
+    bpy.data.images.remove(proxy)
+
+
+def get_proxy(image, factor):
+    """ Return the proxy of an image at 1/factor of its resolution, from the disk cache if it exists.
+    Raise an OSError if the source file is missing and a RuntimeError if it can not be read.
+    """
+    filepath = proxy_path(image, factor)
+    if not os.path.exists(filepath):
+        write_proxy(image, factor, filepath)
+    proxy = bpy.data.images.load(filepath, check_existing=True)
+    proxy.name = PROXY_PREFIX + os.path.basename(filepath)
+    proxy.colorspace_settings.name = image.colorspace_settings.name
+    proxy.alpha_mode = image.alpha_mode
+    # Projectors taking their resolution from the image keep the resolution of the source.
+    proxy[PROXY_SOURCE_SIZE] = image_size(image)
+    return proxy
+
+
+def projected_source(light):
+    """ Return the full resolution custom texture of a projector spot light, also while a proxy is projected. """
+    image = light.node_tree.nodes['Image Texture'].image
+    source = light.get(PROXY_SOURCE)
+    # An image assigned while a proxy was projected replaces the source.
+    if source and image and image.get(PROXY_SOURCE_SIZE):
+        return source
+    return image
+
+
+def set_texture_quality(scene, quality):
+    """ Swap the custom textures of all projectors in the scene to proxies or back to full resolution in one call.
+    Movies and generated images are always projected at full resolution. Projectors whose source file is missing
+    or unreadable keep their source. Return the number of swapped textures.
+    """
+    factor = FACTORS.get(quality)
+    swapped = 0
+    with batch_updates(bpy.context):
+        for projector in scene_projectors(scene):
+            nodes = projector_nodes(projector)
+            light = nodes.spot.data
+            node = nodes.image_texture
+            source = projected_source(light)
+            image = source
+            if source and factor and source.source == 'FILE':
+                try:
+                    image = get_proxy(source, factor)
+                except (OSError, RuntimeError) as error:
+                    log.warning(f'No proxy for {source.filepath} of {projector.name}: {error}')
+            if image is not source:
+                light[PROXY_SOURCE] = source
+            elif PROXY_SOURCE in light:
+                del light[PROXY_SOURCE]
+            if node.image != image:
+                previous = node.image
+                node.image = image
+                release_projection_texture(previous)
+                swapped += 1
+                if uses_image_resolution(projector.proj_settings):
+                    mark_projector_dirty(projector, projector.proj_settings, Dirty.RESOLUTION)
+    return swapped
+
+
+def update_texture_quality(scene, context):
+    set_texture_quality(scene, scene.projector_texture_quality)
+
+
+def register():
+    bpy.types.Scene.projector_texture_quality = bpy.props.EnumProperty(
+        name='Texture Quality',
+        description='Project downscaled proxies of the custom textures of all projectors in the scene, '
+                    'they are cached next to the .blend file',
+        items=TEXTURE_QUALITIES,
+        default='FINAL',
+        update=update_texture_quality)
+
+
+def unregister():
+    del bpy.types.Scene.projector_texture_quality
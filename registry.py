@@ -0,0 +1,185 @@
+import bpy
+from bpy.app.handlers import persistent
+from bpy.types import Operator, PropertyGroup
+
+from .helper import PROJECTOR_TAG, SPOT_TAG, is_projector
+
+
+class ProjectorRegistryItem(PropertyGroup):
+    """ One entry of the scene level projector registry, the full name of a projector.
+    Entries do not point to their object, so the registry does not keep deleted projectors alive.
+    """
+
+
+# In-memory index of the registry: scene pointer -> {object pointer: (object, registered name)}.
+# Pointers are not stable across undo and file loading, so the index is dropped and rebuilt lazily.
+_index = {}
+
+
+def _scene_index(scene):
+    key = scene.as_pointer()
+    index = _index.get(key)
+    if index is None:
+        names = {item.name for item in scene.projector_registry}
+        index = {obj.as_pointer(): (obj, obj.name_full) for obj in scene.objects
+                 if obj.name_full in names and is_projector(obj)}
+        _index[key] = index
+    return index
+
+
+def invalidate_index():
+    _index.clear()
+
+
+def is_registered(scene, obj):
+    """ Return True if the object is in the registry of the scene. """
+    return obj.as_pointer() in _scene_index(scene)
+
+
+def registered_projectors(scene):
+    """ Return the projectors in the registry of the scene.
+    Blender invalidates the Python objects of the objects it frees, deleted projectors are skipped at once.
+    """
+    index = _scene_index(scene)
+    projectors = []
+    for obj, _ in index.values():
+        try:
+            if is_projector(obj):
+                projectors.append(obj)
+        except ReferenceError:
+            pass
+    if len(projectors) != len(index):
+        _index.pop(scene.as_pointer(), None)
+    return projectors
+
+
+def register_projector(scene, obj):
+    """ Tag the camera as projector and add it to the registry of the scene. """
+    obj[PROJECTOR_TAG] = True
+    index = _scene_index(scene)
+    if obj.as_pointer() not in index:
+        scene.projector_registry.add().name = obj.name_full
+        index[obj.as_pointer()] = (obj, obj.name_full)
+
+
+def _rename_projector(scene, obj, name):
+    """ Follow a projector which was renamed from name. """
+    for item in scene.projector_registry:
+        if item.name == name:
+            item.name = obj.name_full
+            break
+    _scene_index(scene)[obj.as_pointer()] = (obj, obj.name_full)
+
+
+def unregister_projectors(scene, objs):
+    """ Remove the objects from the registry of the scene. Entries of objects which were deleted,
+    unlinked from the scene or lost their tag are removed as well.
+    """
+    names = {obj.name_full for obj in objs}
+    linked = {obj.name_full: obj for obj in scene.objects}
+    registry = scene.projector_registry
+    for i in reversed(range(len(registry))):
+        name = registry[i].name
+        if name in names or not is_projector(linked.get(name)):
+            registry.remove(i)
+    _index.pop(scene.as_pointer(), None)
+
+
+def _scene_objects(scene):
+    return {obj.as_pointer() for obj in scene.objects}
+
+
+def _is_legacy_projector(obj):
+    """ Projectors created before the registry existed only carry the tag on their spot light. """
+    return obj.type == 'CAMERA' and any(child.get(SPOT_TAG) for child in obj.children)
+
+
+def rebuild_registry(scene):
+    """ Rebuild the registry of the scene from the projector tags. Return the number of projectors. """
+    scene.projector_registry.clear()
+    _index.pop(scene.as_pointer(), None)
+    for obj in scene.objects:
+        if is_projector(obj) or _is_legacy_projector(obj):
+            register_projector(scene, obj)
+    return len(scene.projector_registry)
+
+
+@persistent
+def _on_load_post(*args):
+    invalidate_index()
+    for scene in bpy.data.scenes:
+        # Registries of older files point to their objects, their entries have no name.
+        if len(_scene_index(scene)) != len(scene.projector_registry) or not scene.projector_registry:
+            rebuild_registry(scene)
+
+
+@persistent
+def _on_undo_redo(*args):
+    invalidate_index()
+
+
+@persistent
+def _on_depsgraph_update(scene, depsgraph=None):
+    """ Pick up projectors that were duplicated, linked, appended or renamed and drop the ones unlinked from the scene.
+    """
+    if depsgraph is None:
+        return
+    linked = None
+    # Objects were linked to or unlinked from a collection.
+    if any(isinstance(update.id, bpy.types.Collection) for update in depsgraph.updates):
+        unregister_projectors(scene, [])
+        linked = _scene_objects(scene)
+    index = _scene_index(scene)
+    for update in depsgraph.updates:
+        obj = update.id.original
+        if not isinstance(obj, bpy.types.Object):
+            continue
+        entry = index.get(obj.as_pointer())
+        if entry is not None:
+            if entry[1] != obj.name_full:
+                _rename_projector(scene, obj, entry[1])
+        elif is_projector(obj):
+            if linked is None:
+                linked = _scene_objects(scene)
+            # Deleted projectors are still tagged in the updates of their deletion.
+            if obj.as_pointer() in linked:
+                register_projector(scene, obj)
+
+
+class PROJECTOR_OT_rebuild_registry(Operator):
+    """ Rebuild the projector registry of the scene from the projector tags. """
+    bl_idname = 'projector.rebuild_registry'
+    bl_label = 'Rebuild Projector Registry'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        count = rebuild_registry(context.scene)
+        self.report({'INFO'}, f'Registered {count} projector(s).')
+        return {'FINISHED'}
+
+
+_handlers = (
+    (bpy.app.handlers.load_post, _on_load_post),
+    (bpy.app.handlers.undo_post, _on_undo_redo),
+    (bpy.app.handlers.redo_post, _on_undo_redo),
+    (bpy.app.handlers.depsgraph_update_post, _on_depsgraph_update),
+)
+
+
+def register():
+    bpy.utils.register_class(ProjectorRegistryItem)
+    bpy.utils.register_class(PROJECTOR_OT_rebuild_registry)
+    bpy.types.Scene.projector_registry = bpy.props.CollectionProperty(
+        type=ProjectorRegistryItem)
+    for handlers, handler in _handlers:
+        handlers.append(handler)
+
+
+def unregister():
+    for handlers, handler in _handlers:
+        if handler in handlers:
+            handlers.remove(handler)
+    del bpy.types.Scene.projector_registry
+    bpy.utils.unregister_class(PROJECTOR_OT_rebuild_registry)
+    bpy.utils.unregister_class(ProjectorRegistryItem)
+    invalidate_index()
@@ -0,0 +1,258 @@
+import csv
+import json
+import math
+import os
+import uuid
+
+import bpy
+from bpy.props import BoolProperty, StringProperty
+from bpy.types import Operator
+from bpy_extras.io_utils import ExportHelper, ImportHelper
+
+from .helper import ADDON_ID, scene_projectors
+from .projector import ProjectorSettings, batch_updates, create_projectors, projector_nodes
+from .proxies import projected_source
+
+RIG_VERSION = 1
+# Custom property of the projector camera object, identifies it across exports and imports.
+PROJECTOR_ID = ADDON_ID.format('id')
+
+# Columns of a projector record and their types. Rotations are in degrees, shifts in percent.
+FIELDS = [('id', str), ('name', str),
+          ('location_x', float), ('location_y', float), ('location_z', float),
+          ('rotation_x', float), ('rotation_y', float), ('rotation_z', float),
+          ('throw_ratio', float), ('power', float), ('use_lumens', bool), ('lumens', float), ('resolution', str),
+          ('h_shift', float), ('v_shift', float), ('projected_texture', str),
+          ('color_r', float), ('color_g', float), ('color_b', float),
+          ('use_custom_texture_res', bool), ('show_pixel_grid', bool), ('source', str)]
+FIELD_TYPES = dict(FIELDS)
+SETTINGS = ('throw_ratio', 'power', 'use_lumens', 'lumens', 'resolution', 'h_shift', 'v_shift', 'projected_texture',
+            'use_custom_texture_res', 'show_pixel_grid')
+# Tolerance below which a float of an imported record counts as unchanged.
+EPSILON = 1e-5
+
+
+def projector_id(projector):
+    """ Return the stable ID of a projector and assign one if it has none yet. """
+    if not projector.get(PROJECTOR_ID):
+        projector[PROJECTOR_ID] = uuid.uuid4().hex
+    return projector[PROJECTOR_ID]
+
+
+def projectors_by_id(scene):
+    """ Return the projectors of a scene by their ID.
+    Duplicated projectors copy the ID of the original, they get a new one.
+    """
+    projectors = {}
+    for projector in scene_projectors(scene):
+        if projector_id(projector) in projectors:
+            del projector[PROJECTOR_ID]
+        projectors[projector_id(projector)] = projector
+    return projectors
+
+
+def _source(projector):
+    # While a proxy is projected the rig keeps the full resolution source.
+    image = projected_source(projector_nodes(projector).spot.data)
+    if image is None or image.packed_file or image.source == 'GENERATED':
+        return ''
+    return os.path.normpath(bpy.path.abspath(image.filepath, library=image.library))
+
+
+def projector_record(projector):
+    """ Return the settings and the transform of a projector as a flat record. """
+    proj_settings = projector.proj_settings
+    record = {'id': projector_id(projector), 'name': projector.name}
+    for axis, value in zip('xyz', projector.location):
+        record[f'location_{axis}'] = value
+    for axis, value in zip('xyz', projector.rotation_euler):
+        record[f'rotation_{axis}'] = math.degrees(value)
+    for key in SETTINGS:
+        record[key] = getattr(proj_settings, key)
+    for channel, value in zip('rgb', proj_settings.projected_color):
+        record[f'color_{channel}'] = value
+    record['source'] = _source(projector)
+    return record
+
+
+def parse_record(record):
+    """ Convert the values of a record, e.g. the strings of a CSV row, to the types of the fields.
+    Missing and empty values are left out, they keep the current value of the projector.
+    """
+    parsed = {}
+    for key, value in record.items():
+        if key not in FIELD_TYPES:
+            raise KeyError(f'Unknown projector record field: {key}')
+        if value is None or value == '':
+            continue
+        field_type = FIELD_TYPES[key]
+        if field_type is bool and isinstance(value, str):
+            value = value.strip().lower() in ('1', 'true', 'yes')
+        parsed[key] = field_type(value)
+    return parsed
+
+
+def check_record(record):
+    """ Raise a ValueError if a parsed record has a value the projector settings do not accept. """
+    for key in SETTINGS:
+        prop = ProjectorSettings.bl_rna.properties[key]
+        if key in record and prop.type == 'ENUM' and record[key] not in prop.enum_items:
+            raise ValueError(f'Projector record {record.get("id") or record.get("name", "")!r} '
+                             f'has an unknown {key}: {record[key]!r}')
+
+
+def _changed(current, value):
+    if isinstance(value, float):
+        return abs(current - value) > EPSILON
+    return current != value
+
+
+def _spec(record):
+    """ Return the create_projectors spec of a record. """
+    spec = {key: record[key] for key in SETTINGS if key in record}
+    if 'name' in record:
+        spec['name'] = record['name']
+    return spec
+
+
+def _apply(projector, record, changes):
+    """ Write the changed fields of a record to a projector. """
+    proj_settings = projector.proj_settings
+    for key in changes:
+        if key == 'name':
+            projector.name = record['name']
+        elif key.startswith('location_'):
+            projector.location['xyz'.index(key[-1])] = record[key]
+        elif key.startswith('rotation_'):
+            projector.rotation_euler['xyz'.index(key[-1])] = math.radians(record[key])
+        elif key in SETTINGS:
+            setattr(proj_settings, key, record[key])
+        elif key == 'source':
+            image = bpy.data.images.load(record['source'], check_existing=True) if record['source'] else None
+            projector_nodes(projector).image_texture.image = image
+    if any(key.startswith('color_') for key in changes):
+        proj_settings.projected_color = [record.get(f'color_{c}', v) for c, v in zip('rgb', proj_settings.projected_color)]
+
+
+def import_rig(records, scene=None, base_dir=''):
+    """ Create or update the projectors of a scene from records in one batch, without bpy.ops or selection changes.
+    Records are matched to projectors by their ID, only projectors with changed values are written.
+    Relative source paths are resolved from base_dir.
+    All records are checked before any projector is written, invalid values raise a ValueError.
+    Return the numbers of created, updated and unchanged projectors.
+    """
+    scene = scene if scene else bpy.context.scene
+    records = [parse_record(record) for record in records]
+    for record in records:
+        check_record(record)
+        if record.get('source'):
+            record['source'] = os.path.normpath(os.path.join(base_dir, record['source']))
+    existing = projectors_by_id(scene)
+    stats = {'created': 0, 'updated': 0, 'unchanged': 0}
+    with batch_updates(bpy.context):
+        new_records = [record for record in records if record.get('id') not in existing]
+        created = create_projectors([_spec(record) for record in new_records], scene=scene)
+        for projector, record in zip(created, new_records):
+            if record.get('id'):
+                projector[PROJECTOR_ID] = record['id']
+            _apply(projector, record, [key for key in record if key not in SETTINGS + ('id',)])
+        stats['created'] = len(created)
+
+        for record in records:
+            projector = existing.get(record.get('id'))
+            if projector is None:
+                continue
+            current = projector_record(projector)
+            changes = [key for key in record if key != 'id' and _changed(current[key], record[key])]
+            if changes:
+                _apply(projector, record, changes)
+                stats['updated'] += 1
+            else:
+                stats['unchanged'] += 1
+    return stats
+
+
+def export_rig(scene=None):
+    """ Return the records of all projectors of a scene. """
+    scene = scene if scene else bpy.context.scene
+    return [projector_record(projector) for projector in projectors_by_id(scene).values()]
+
+
+def write_rig(filepath, records):
+    """ Write records to a JSON or, by the file extension, a CSV file. """
+    if filepath.lower().endswith('.csv'):
+        with open(filepath, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=[name for name, _ in FIELDS])
+            writer.writeheader()
+            writer.writerows(records)
+    else:
+        with open(filepath, 'w') as f:
+            json.dump({'version': RIG_VERSION, 'projectors': records}, f, indent=2)
+
+
+def read_rig(filepath):
+    """ Return the records of a JSON or CSV rig file. """
+    with open(filepath, newline='') as f:
+        if filepath.lower().endswith('.csv'):
+            return list(csv.DictReader(f))
+        return json.load(f)['projectors']
+
+
+class PROJECTOR_OT_export_rig(Operator, ExportHelper):
+    """ Export the projectors of the scene with their transforms and settings. """
+    bl_idname = 'projector.export_rig'
+    bl_label = 'Export Projector Rig'
+
+    filename_ext = '.json'
+    filter_glob: StringProperty(default='*.json;*.csv', options={'HIDDEN'})
+    use_csv: BoolProperty(name='CSV', description='Write a CSV file instead of JSON', default=False)
+
+    def execute(self, context):
+        filepath = self.filepath
+        if self.use_csv:
+            filepath = os.path.splitext(filepath)[0] + '.csv'
+        records = export_rig(context.scene)
+        write_rig(filepath, records)
+        self.report({'INFO'}, f'Exported {len(records)} projector(s).')
+        return {'FINISHED'}
+
+
+class PROJECTOR_OT_import_rig(Operator, ImportHelper):
+    """ Create or update projectors from a JSON or CSV rig file. Projectors are matched by their ID. """
+    bl_idname = 'projector.import_rig'
+    bl_label = 'Import Projector Rig'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    filter_glob: StringProperty(default='*.json;*.csv', options={'HIDDEN'})
+
+    def execute(self, context):
+        try:
+            records = read_rig(self.filepath)
+            stats = import_rig(records, context.scene, base_dir=os.path.dirname(self.filepath))
+        except (OSError, ValueError, KeyError) as e:
+            self.report({'ERROR'}, f'Could not import the rig: {e}')
+            return {'CANCELLED'}
+        self.report({'INFO'}, 'Created {created}, updated {updated}, unchanged {unchanged} projector(s).'.format(**stats))
+        return {'FINISHED'}
+
+
+def menu_export(self, context):
+    self.layout.operator(PROJECTOR_OT_export_rig.bl_idname, text='Projector Rig (.json/.csv)')
+
+
+def menu_import(self, context):
+    self.layout.operator(PROJECTOR_OT_import_rig.bl_idname, text='Projector Rig (.json/.csv)')
+
+
+def register():
+    bpy.utils.register_class(PROJECTOR_OT_export_rig)
+    bpy.utils.register_class(PROJECTOR_OT_import_rig)
+    bpy.types.TOPBAR_MT_file_export.append(menu_export)
+    bpy.types.TOPBAR_MT_file_import.append(menu_import)
+
+
+def unregister():
+    bpy.types.TOPBAR_MT_file_import.remove(menu_import)
+    bpy.types.TOPBAR_MT_file_export.remove(menu_export)
+    bpy.utils.unregister_class(PROJECTOR_OT_import_rig)
+    bpy.utils.unregister_class(PROJECTOR_OT_export_rig)
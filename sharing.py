@@ -0,0 +1,278 @@
+import hashlib
+import logging
+import os
+
+import bpy
+from bpy.app.handlers import persistent
+from bpy.types import Operator
+
+from .drivers import add_drivers, retarget_drivers
+from .helper import get_projectors, is_projector, scene_projectors
+from .image_probe import packed_data
+from .projector import (PROXY_SOURCE_SIZE, Dirty, _remove_with_dependencies, batch_updates, copy_settings,
+                        image_memory, is_instanced, mark_projector_dirty, projector_instances, projector_nodes)
+from .proxies import PROXY_SOURCE
+
+log = logging.getLogger(name=__file__)
+
+# Hash of the packed data by (image name, packed size), hashing large packed files on every check is too slow.
+_packed_hashes = {}
+
+
+def image_identity(image):
+    """ Return a key which is equal for images showing the same pixels in the same way, None for generated images.
+    File images are identified by their resolved path, packed images by a hash of their packed data.
+    """
+    if image.source == 'GENERATED' or image.get(PROXY_SOURCE_SIZE):
+        return None
+    if image.packed_file:
+        stamp = (image.name_full, image.packed_file.size)
+        if stamp not in _packed_hashes:
+            _packed_hashes[stamp] = hashlib.sha1(packed_data(image.packed_file)).hexdigest()
+        origin = ('packed', _packed_hashes[stamp])
+    else:
+        filepath = bpy.path.abspath(image.filepath_from_user(), library=image.library)
+        origin = ('file', os.path.normcase(os.path.normpath(filepath)))
+    return (*origin, image.source, image.colorspace_settings.name, image.alpha_mode)
+
+
+def _source_slots(projector):
+    """ Return (struct, key) of the places a projector keeps its custom image: the Image Texture node
+    and, while a proxy is projected, the custom property of the light holding the source.
+    Damaged projectors have none, sharing does not repair them.
+    """
+    nodes = projector_nodes(projector, repair=False)
+    if nodes is None:
+        return []
+    slots = [(nodes.image_texture, 'image')]
+    if nodes.spot.data.get(PROXY_SOURCE):
+        slots.append((nodes.spot.data, PROXY_SOURCE))
+    return slots
+
+
+def _get_slot(struct, key):
+    return struct[key] if isinstance(struct, bpy.types.ID) else getattr(struct, key)
+
+
+def _set_slot(struct, key, image):
+    if isinstance(struct, bpy.types.ID):
+        struct[key] = image
+    else:
+        setattr(struct, key, image)
+
+
+def projection_sources(scene):
+    """ Return the custom images of all projectors in the scene, including the sources of projected proxies. """
+    images = set()
+    for projector in scene_projectors(scene):
+        for struct, key in _source_slots(projector):
+            image = _get_slot(struct, key)
+            if image:
+                images.add(image)
+    return images
+
+
+def share_projection_sources(scene, projectors=None, remove=True):
+    """ Let the projectors in the scene, or only the given ones, use one image for each file they project.
+    Only the images of the projectors are reassigned, other users of a duplicate, e.g. materials, keep it.
+    Duplicates nothing uses anymore are removed unless remove is False.
+    Return the number of removed images and the bytes of their decoded pixels which were or can be freed.
+    """
+    shared = {}
+    for image in sorted(projection_sources(scene), key=lambda image: (len(image.name), image.name)):
+        identity = image_identity(image)
+        # Keep the image with the original name, image before image.001.
+        if identity is not None:
+            shared.setdefault(identity, image)
+
+    duplicates = set()
+    for projector in scene_projectors(scene) if projectors is None else projectors:
+        for struct, key in _source_slots(projector):
+            image = _get_slot(struct, key)
+            identity = image_identity(image) if image else None
+            if identity is not None and shared[identity] != image:
+                _set_slot(struct, key, shared[identity])
+                duplicates.add(image)
+
+    reclaimed = sum(image_memory(image) for image in duplicates)
+    removed = [image for image in duplicates if image.users == 0]
+    if remove and removed:
+        bpy.data.batch_remove(removed)
+    return len(removed), reclaimed
+
+
+class PROJECTOR_OT_share_sources(Operator):
+    """ Let all projectors which project the same image file share one image. """
+    bl_idname = 'projector.share_sources'
+    bl_label = 'Share Projection Sources'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        removed, reclaimed = share_projection_sources(context.scene)
+        self.report({'INFO'}, f'Merged {removed} duplicate image(s), reclaimed {reclaimed / 2**20:.1f} MB.')
+        return {'FINISHED'}
+
+
+def instance_projectors(source, projectors):
+    """ Let projectors share the camera and light data of the source projector, they take over its settings.
+    Their own data is removed unless something else uses it. Return the number of linked projectors.
+    """
+    light = projector_nodes(source).spot.data
+    replaced = set()
+    linked = 0
+    with batch_updates(bpy.context):
+        for projector in projectors:
+            if projector.data == source.data:
+                continue
+            spot = projector_nodes(projector).spot
+            replaced.update((projector.data, spot.data))
+            projector.data = source.data
+            spot.data = light
+            copy_settings(source.proj_settings, projector.proj_settings)
+            linked += 1
+    _remove_with_dependencies(set(), replaced)
+    # The projectors project through other node trees now.
+    _tree_projectors.clear()
+    return linked
+
+
+def make_single_projectors(projectors):
+    """ Give instanced projectors their own copy of the camera and light data. Return the number of copied projectors.
+    The last projector of a group keeps the original data.
+    """
+    copied = 0
+    with batch_updates(bpy.context):
+        for projector in projectors:
+            if not is_instanced(projector):
+                continue
+            spot = projector_nodes(projector).spot
+            others = [instance for instance in projector_instances(projector) if instance != projector]
+            projector.data = projector.data.copy()
+            spot.data = spot.data.copy()
+            # The copied drivers still read the settings of the projector they were added for,
+            # the shared ones may read this projector.
+            if projector.proj_settings.use_drivers:
+                add_drivers(projector)
+                retarget_drivers(others[0])
+            # The copied light still shows the warp map of the original one, it bakes its own.
+            if projector.proj_settings.warp_mode != 'NONE':
+                mark_projector_dirty(projector, projector.proj_settings, Dirty.WARP)
+            copied += 1
+    _tree_projectors.clear()
+    return copied
+
+
+class PROJECTOR_OT_link_instances(Operator):
+    """ Let the selected projectors share the camera and light data of the active projector.
+    They take over its settings, changing the settings of one changes all of them. """
+    bl_idname = 'projector.link_instances'
+    bl_label = 'Link Projector Instances'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return is_projector(context.active_object) and len(get_projectors(context, only_selected=True)) > 1
+
+    def execute(self, context):
+        linked = instance_projectors(context.active_object, get_projectors(context, only_selected=True))
+        self.report({'INFO'}, f'Linked {linked} projector(s) to {context.active_object.name}.')
+        return {'FINISHED'}
+
+
+class PROJECTOR_OT_make_single(Operator):
+    """ Give the selected instanced projectors their own camera and light data. """
+    bl_idname = 'projector.make_single'
+    bl_label = 'Make Single Projector'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return any(is_instanced(projector) for projector in get_projectors(context, only_selected=True))
+
+    def execute(self, context):
+        make_single_projectors(get_projectors(context, only_selected=True))
+        return {'FINISHED'}
+
+
+# Image Texture image of every projector when the handler last looked: projector pointer -> image pointer.
+_projected_images = {}
+# Projectors by the node tree of their spot light: scene pointer -> {node tree pointer: [projector]}.
+# Rebuilt when objects are linked or unlinked, instanced projectors share one node tree.
+_tree_projectors = {}
+
+
+def _projectors_by_tree(scene):
+    by_tree = _tree_projectors.get(scene.as_pointer())
+    if by_tree is None:
+        by_tree = _tree_projectors[scene.as_pointer()] = {}
+        for projector in scene_projectors(scene):
+            nodes = projector_nodes(projector, repair=False)
+            if nodes is not None:
+                by_tree.setdefault(nodes.tree.as_pointer(), []).append(projector)
+    return by_tree
+
+
+def _projected_image(projector):
+    nodes = projector_nodes(projector, repair=False)
+    return nodes.image_texture.image if nodes is not None else None
+
+
+@persistent
+def _on_depsgraph_update(scene, depsgraph=None):
+    """ Share an image assigned to a projector right away if another projector already projects the same file.
+    Only the projectors of the updated node trees are looked at, the duplicate is left to Blender's orphan purge.
+    """
+    if depsgraph is None:
+        return
+    updated = [update.id.original for update in depsgraph.updates
+               if isinstance(update.id, (bpy.types.NodeTree, bpy.types.Collection))]
+    if not updated:
+        return
+    if any(isinstance(id_data, bpy.types.Collection) for id_data in updated):
+        _tree_projectors.pop(scene.as_pointer(), None)
+    by_tree = _projectors_by_tree(scene)
+    changed = []
+    for id_data in updated:
+        for projector in by_tree.get(id_data.as_pointer(), ()):
+            image = _projected_image(projector)
+            pointer = image.as_pointer() if image else None
+            if _projected_images.get(projector.as_pointer()) != pointer:
+                _projected_images[projector.as_pointer()] = pointer
+                if image:
+                    changed.append(projector)
+    if not changed:
+        return
+    _, reclaimed = share_projection_sources(scene, changed, remove=False)
+    if reclaimed:
+        log.info(f'Shared a duplicate image, {reclaimed / 2**20:.1f} MB can be reclaimed.')
+    for projector in changed:
+        image = _projected_image(projector)
+        _projected_images[projector.as_pointer()] = image.as_pointer() if image else None
+
+
+@persistent
+def _drop_projected_images(*args):
+    _projected_images.clear()
+    _tree_projectors.clear()
+
+
+def register():
+    bpy.utils.register_class(PROJECTOR_OT_share_sources)
+    bpy.utils.register_class(PROJECTOR_OT_link_instances)
+    bpy.utils.register_class(PROJECTOR_OT_make_single)
+    bpy.app.handlers.depsgraph_update_post.append(_on_depsgraph_update)
+    for handlers in (bpy.app.handlers.load_post, bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+        handlers.append(_drop_projected_images)
+
+
+def unregister():
+    for handlers in (bpy.app.handlers.load_post, bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+        if _drop_projected_images in handlers:
+            handlers.remove(_drop_projected_images)
+    _projected_images.clear()
+    _tree_projectors.clear()
+    if _on_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(_on_depsgraph_update)
+    bpy.utils.unregister_class(PROJECTOR_OT_make_single)
+    bpy.utils.unregister_class(PROJECTOR_OT_link_instances)
+    bpy.utils.unregister_class(PROJECTOR_OT_share_sources)
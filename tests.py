@@ -1,9 +1,47 @@
+import argparse
+import importlib
+import json
+import math
+import operator
+import os
+import sys
+import tempfile
+import time
 import unittest
 import bpy
+import numpy as np
 from bpy.app.handlers import persistent
 from bpy.types import Operator
 
 
+def addon_module(name):
+    """ Return a submodule of the add-on, independent of the name of the add-on directory. """
+    for module_name, module in list(sys.modules.items()):
+        if getattr(module, '__dict__', {}).get('bl_info', {}).get('name') == 'Projector':
+            return importlib.import_module(f'{module_name}.{name}')
+
+
+# Math node operations used by the shared projector node group.
+MATH_OPERATIONS = {'ADD': operator.add, 'SUBTRACT': operator.sub, 'MULTIPLY': operator.mul,
+                   'DIVIDE': operator.truediv}
+
+
+def group_output(group, node_name):
+    """ Return x and y of a Combine XYZ node inside the node group of a group node.
+    The math nodes are evaluated as they are wired for the inputs of the group node, not by a copy of their formula.
+    """
+    def value(socket):
+        if not socket.is_linked:
+            return socket.default_value
+        link = socket.links[0]
+        node = link.from_node
+        if node.type == 'GROUP_INPUT':
+            return group.inputs[link.from_socket.name].default_value
+        return MATH_OPERATIONS[node.operation](value(node.inputs[0]), value(node.inputs[1]))
+    combine = group.node_tree.nodes[node_name]
+    return value(combine.inputs[0]), value(combine.inputs[1])
+
+
 class TestAddon(unittest.TestCase):
     def test_existenc_of_operators(self):
         pass
@@ -40,31 +78,57 @@ class TestProjector(unittest.TestCase):
         self.assertIn('resolution', self.c.proj_settings)
         self.assertIn('use_custom_texture_res', self.c.proj_settings)
 
+    def mapping_scale(self):
+        """ Texture scale the shared projector node group computes from the group node inputs. """
+        return group_output(self.nodes['Group'], 'Scale')
+
+    def mapping_location(self):
+        """ Texture translation the shared projector node group computes from the group node inputs. """
+        return group_output(self.nodes['Group'], 'Location')
+
+    def test_projection_math(self):
+        """ The bpy-free projection math matches the outputs the projectors compute, the node group included. """
+        projector = addon_module('projector')
+        projection = addon_module('projection')
+        settings = [(0.5, -10, 5, '1920x1080'), (1.2, 20, -15, '1024x768'), (2.5, 0, 30, '800x600')]
+        created = projector.create_projectors([{'throw_ratio': tr, 'h_shift': hs, 'v_shift': vs, 'resolution': res}
+                                               for tr, hs, vs, res in settings])
+        throw_ratios, h_shifts, v_shifts, resolutions = zip(*settings)
+        widths, heights = zip(*(projection.parse_resolution(res) for res in resolutions))
+        outputs = projection.projector_outputs_array(throw_ratios, np.array(h_shifts) / 100, np.array(v_shifts) / 100,
+                                                     widths, heights)
+        for i, cam in enumerate(created):
+            group = cam.children[0].data.node_tree.nodes['Group']
+            throw_ratio, h_shift, v_shift = throw_ratios[i], h_shifts[i] / 100, v_shifts[i] / 100
+            inverted = projection.inverted_aspect_ratio(widths[i], heights[i])
+            scale = group_output(group, 'Scale')
+            location = group_output(group, 'Location')
+            np.testing.assert_allclose(scale, projection.texture_scale(throw_ratio, inverted), rtol=1e-6)
+            np.testing.assert_allclose(location, projection.texture_translation(h_shift, v_shift, throw_ratio,
+                                                                                inverted), rtol=1e-6, atol=1e-7)
+            np.testing.assert_allclose(scale, (outputs['scale_x'][i], outputs['scale_y'][i]), rtol=1e-6)
+            np.testing.assert_allclose(location, (outputs['translation_x'][i], outputs['translation_y'][i]),
+                                       rtol=1e-6, atol=1e-7)
+            self.assertAlmostEqual(cam.data.angle, outputs['angle'][i], places=5)
+            self.assertAlmostEqual(cam.data.shift_x, outputs['shift_x'][i], places=5)
+            self.assertAlmostEqual(cam.data.shift_y, outputs['shift_y'][i], places=5)
+        projector.delete_projectors(bpy.context.scene, created)
+
     def test_update_throw_ratio(self):
         self.c.proj_settings.throw_ratio = 1
         self.assertEqual(self.c.proj_settings.throw_ratio, 1)
         self.assertAlmostEqual(self.c.data.angle, 0.9272952180016123, places=6)
-        # Test if mapping nodes was updated correctly
-        mapping_node = self.s.data.node_tree.nodes['Group'].node_tree.nodes['Mapping.001']
-        if bpy.app.version < (2, 81):
-            self.assertEqual(mapping_node.scale[0], 1)
-            self.assertAlmostEqual(mapping_node.scale[1], 0.5625)
-        else:
-            self.assertEqual(mapping_node.inputs['Scale'].default_value[0], 1)
-            self.assertAlmostEqual(
-                mapping_node.inputs['Scale'].default_value[1], 0.5625)
+        # Test if the mapping inputs were updated correctly
+        scale = self.mapping_scale()
+        self.assertEqual(scale[0], 1)
+        self.assertAlmostEqual(scale[1], 0.5625)
         # Test 2
         self.c.proj_settings.throw_ratio = 0.8
         self.assertAlmostEqual(self.c.proj_settings.throw_ratio, 0.8)
         self.assertAlmostEqual(self.c.data.angle, 1.1171986306871249, places=6)
-        if bpy.app.version < (2, 81):
-            self.assertEqual(mapping_node.scale[0], 1.250)
-            self.assertAlmostEqual(mapping_node.scale[1], 0.703125)
-        else:
-            self.assertEqual(
-                mapping_node.inputs['Scale'].default_value[0], 1.250)
-            self.assertAlmostEqual(
-                mapping_node.inputs['Scale'].default_value[1], 0.703125)
+        scale = self.mapping_scale()
+        self.assertAlmostEqual(scale[0], 1.250)
+        self.assertAlmostEqual(scale[1], 0.703125)
 
     def test_update_lens_shift(self):
         self.c.proj_settings.throw_ratio = 1
@@ -75,16 +139,10 @@ class TestProjector(unittest.TestCase):
         # y shift
         self.c.proj_settings.v_shift = shift
         self.assertAlmostEqual(self.c.data.shift_y, 0.1)
-        # Check correct update of mapping node
-        mapping_node = self.s.data.node_tree.nodes['Group'].node_tree.nodes['Mapping.001']
-        if bpy.app.version < (2, 81):
-            self.assertAlmostEqual(mapping_node.translation[0], 0.1)
-            self.assertAlmostEqual(mapping_node.translation[1], 0.1)
-        else:
-            self.assertAlmostEqual(
-                mapping_node.inputs['Location'].default_value[0], 0.1)
-            self.assertAlmostEqual(
-                mapping_node.inputs['Location'].default_value[1], 0.1)
+        # Check correct update of the mapping inputs
+        location = self.mapping_location()
+        self.assertAlmostEqual(location[0], 0.1)
+        self.assertAlmostEqual(location[1], 0.1)
 
     def test_pixel_gird_on_off(self):
         # Turn Pixel Grid on
@@ -108,40 +166,792 @@ class TestProjector(unittest.TestCase):
             self.assertIn(('Emission', 'Light Output'), links_as_node_names)
 
     def test_pixel_grid_resolution(self):
-        nodes = self.s.data.node_tree.nodes['pixel_grid'].node_tree.nodes
+        inputs = self.nodes['pixel_grid'].inputs
         # Check Pixel Grid default resolution
         width, height = self.c.proj_settings.resolution.split('x')
-        self.assertEqual(
-            nodes['_width'].outputs[0].default_value, float(width))
-        self.assertEqual(
-            nodes['_height'].outputs[0].default_value, float(height))
+        self.assertEqual(inputs['Width'].default_value, float(width))
+        self.assertEqual(inputs['Height'].default_value, float(height))
         # Check Pixel Grid resolution update
         x, y = 1024, 768
         self.c.proj_settings.resolution = f'{x}x{y}'
-        self.assertEqual(
-            nodes['_width'].outputs[0].default_value, float(x))
-        self.assertEqual(
-            nodes['_height'].outputs[0].default_value, float(y))
-        
+        self.assertEqual(inputs['Width'].default_value, float(x))
+        self.assertEqual(inputs['Height'].default_value, float(y))
+
+    def render(self):
+        """ Render the scene and return the pixels. """
+        bpy.ops.render.render()
+        with tempfile.TemporaryDirectory() as tempdir:
+            filepath = os.path.join(tempdir, 'render.png')
+            bpy.data.images['Render Result'].save_render(filepath)
+            image = bpy.data.images.load(filepath)
+            pixels = np.array(image.pixels[:])
+            bpy.data.images.remove(image)
+        return pixels
+
+    def test_baked_pixel_grid(self):
+        scene = bpy.context.scene
+        engine, camera = scene.render.engine, scene.camera
+        scene.render.engine = 'CYCLES'
+        scene.cycles.samples = 16
+        scene.render.resolution_x, scene.render.resolution_y = 160, 90
+        self.c.location = (0, 0, 10)
+        self.c.proj_settings.resolution = '800x600'
+        self.c.proj_settings.show_pixel_grid = True
+        bpy.ops.mesh.primitive_plane_add(size=4, location=(0, 0, 8))
+        wall = bpy.context.object
+        render_camera = bpy.data.objects.new('Render Camera', bpy.data.cameras.new('Render Camera'))
+        # Zoomed in far enough that every grid cell covers several render pixels.
+        render_camera.data.type = 'ORTHO'
+        render_camera.data.ortho_scale = 0.1
+        render_camera.location = (0.3, 0, 12)
+        scene.collection.objects.link(render_camera)
+        scene.camera = render_camera
+
+        procedural = self.render()
+        self.c.proj_settings.bake_pixel_grid = True
+        self.assertEqual(self.nodes['pixel_grid'].node_tree.name, '_Projectors-Addon_BakedPixelGrid.v1')
+        self.assertEqual(self.nodes['pixel_grid'].inputs['Width'].default_value, 800)
+        # The render times are compared by benchmarks.bench_pixel_grid.
+        baked = self.render()
+        self.assertLess(np.abs(baked - procedural).mean(), 0.01)
+
+        scene.render.engine, scene.camera = engine, camera
+        bpy.data.objects.remove(render_camera)
+        bpy.data.objects.remove(wall)
+
+    def test_shared_node_groups(self):
+        bpy.ops.projector.create()
+        other = bpy.context.object
+        other_nodes = other.children[0].data.node_tree.nodes
+        self.assertIs(other_nodes['Group'].node_tree, self.nodes['Group'].node_tree)
+        self.assertIs(other_nodes['pixel_grid'].node_tree, self.nodes['pixel_grid'].node_tree)
+        # Per projector values live on the group node.
+        other.proj_settings.throw_ratio = 2
+        self.assertAlmostEqual(other_nodes['Group'].inputs['Throw Ratio'].default_value, 2)
+        self.assertAlmostEqual(self.nodes['Group'].inputs['Throw Ratio'].default_value, 0.8)
+        bpy.ops.projector.delete()
+
+    def test_registry(self):
+        scene = bpy.context.scene
+        helper = addon_module('helper')
+        registered = [item.name for item in scene.projector_registry]
+        self.assertIn(self.c.name, registered)
+        self.assertNotIn(self.s.name, registered)
+        # Renamed projectors stay registered.
+        self.c.name = 'Beamer'
+        bpy.context.view_layer.update()
+        registered = [item.name for item in scene.projector_registry]
+        self.assertIn('Beamer', registered)
+        self.assertIn(self.c, helper.scene_projectors(scene))
+        # Rebuilding finds the projector by its tag.
+        scene.projector_registry.clear()
+        bpy.ops.projector.rebuild_registry()
+        registered = [item.name for item in scene.projector_registry]
+        self.assertEqual(registered.count(self.c.name), 1)
+        # Projectors deleted by Blender's delete operator are dropped at once, the registry does not keep them alive.
+        bpy.ops.projector.create()
+        other = bpy.context.object
+        name = other.name
+        spot = other.children[0]
+        bpy.ops.object.select_all(action='DESELECT')
+        other.select_set(True)
+        bpy.ops.object.delete()
+        self.assertNotIn(name, bpy.data.objects)
+        self.assertNotIn(name, [projector.name for projector in helper.scene_projectors(scene)])
+        bpy.context.view_layer.update()
+        registered = [item.name for item in scene.projector_registry]
+        self.assertNotIn(name, registered)
+        # Its spot light is left behind, purging removes it.
+        bpy.ops.projector.purge_orphans()
+        self.assertNotIn(spot, list(bpy.data.objects))
+        self.assertIn(self.c.name, registered)
 
+    def test_update_writes(self):
+        projector = addon_module('projector')
+        trace = projector.update_trace
+        # A throw ratio change recomputes the FOV and the mapping scale once.
+        trace.reset()
+        self.c.proj_settings.throw_ratio = 1.2
+        self.assertEqual(trace.flushes, 1)
+        self.assertEqual(trace.outputs[projector.Dirty.FOV], 1)
+        self.assertEqual(trace.outputs[projector.Dirty.MAPPING_SCALE], 1)
+        self.assertEqual(trace.writes, 6)
+        # A resolution change recomputes every resolution dependent output once.
+        trace.reset()
+        self.c.proj_settings.resolution = '1024x768'
+        self.assertEqual(trace.flushes, 1)
+        self.assertEqual(set(trace.outputs.values()), {1})
+        self.assertNotIn(projector.Dirty.FOV, trace.outputs)
+        self.assertEqual(trace.writes, 7)
 
+    def test_lazy_projection_textures(self):
+        # Only the projected color grid resolution is created.
+        self.assertIsNone(bpy.data.images.get('_proj.tex.3840x2160'))
+        self.c.proj_settings.projected_texture = 'color_grid_texture'
+        image = bpy.data.images.get('_proj.tex.1920x1080')
+        self.assertIsNotNone(image)
+        self.assertFalse(image.use_fake_user)
+        self.assertIsNone(bpy.data.images.get('_proj.tex.3840x2160'))
+        # Switching the resolution releases the unused image.
+        self.c.proj_settings.resolution = '1024x768'
+        self.assertIsNone(bpy.data.images.get('_proj.tex.1920x1080'))
+        self.assertIsNotNone(bpy.data.images.get('_proj.tex.1024x768'))
+        report = addon_module('projector').texture_memory_report()
+        self.assertLess(report['total'], report['eager_total'])
+
+    def test_driven_projector(self):
+        settings = self.c.proj_settings
+        settings.use_drivers = True
+        drivers = addon_module('drivers').get_drivers(self.c)
+        self.assertTrue(drivers)
+        for driver in drivers:
+            self.assertTrue(driver.is_simple_expression)
+        # Animated settings propagate without update callbacks.
+        scene = bpy.context.scene
+        settings.throw_ratio = 1
+        settings.h_shift = 0
+        settings.keyframe_insert('throw_ratio', frame=1)
+        settings.keyframe_insert('h_shift', frame=1)
+        settings.throw_ratio = 0.8
+        settings.h_shift = 20
+        settings.keyframe_insert('throw_ratio', frame=10)
+        settings.keyframe_insert('h_shift', frame=10)
+        scene.frame_set(1)
+        self.assertAlmostEqual(self.nodes['Group'].inputs['Throw Ratio'].default_value, 1)
+        # The camera follows as well, looking through the projector shows the projection.
+        self.assertAlmostEqual(self.c.data.angle, math.atan(1 / 1 * .5) * 2, places=5)
+        self.assertAlmostEqual(self.c.data.shift_x, 0, places=5)
+        scene.frame_set(10)
+        self.assertAlmostEqual(self.nodes['Group'].inputs['Throw Ratio'].default_value, 0.8)
+        self.assertAlmostEqual(self.c.data.angle, math.atan(1 / 0.8 * .5) * 2, places=5)
+        self.assertAlmostEqual(self.c.data.shift_x, 0.2, places=5)
+        settings.use_drivers = False
+        self.assertFalse(addon_module('drivers').get_drivers(self.c))
+
+    def test_animated_projector(self):
+        animation = addon_module('animation')
+        settings = self.c.proj_settings
+        scene = bpy.context.scene
+        settings.power = 1000
+        settings.keyframe_insert('power', frame=1)
+        settings.power = 2000
+        settings.keyframe_insert('power', frame=10)
+        animation.frame_stats.reset()
+        scene.frame_set(1)
+        self.assertAlmostEqual(self.s.data.energy, 1000, places=2)
+        scene.frame_set(10)
+        self.assertAlmostEqual(self.s.data.energy, 2000, places=2)
+        # Frames past the last keyframe change nothing and write nothing.
+        updated = animation.frame_stats.updated
+        scene.frame_set(11)
+        self.assertEqual(animation.frame_stats.updated, updated)
+        self.assertEqual(animation.frame_stats.frames, 3)
+        # Deleted projectors leave no snapshot behind.
+        bpy.ops.projector.create()
+        other = bpy.context.object
+        other.proj_settings.keyframe_insert('power', frame=1)
+        scene.frame_set(1)
+        key = other.as_pointer()
+        self.assertIn(key, animation._snapshots)
+        addon_module('projector').delete_projectors(scene, [other])
+        scene.frame_set(2)
+        self.assertNotIn(key, animation._snapshots)
+
+    def test_movie_texture(self):
+        animation = addon_module('animation')
+        scene = bpy.context.scene
+        with tempfile.TemporaryDirectory() as tempdir:
+            for i in range(1, 4):
+                image = bpy.data.images.new(f'_test_{i}', 4, 4)
+                image.filepath_raw = os.path.join(tempdir, f'test_{i:03d}.png')
+                image.file_format = 'PNG'
+                image.save()
+                bpy.data.images.remove(image)
+            image = bpy.data.images.load(os.path.join(tempdir, 'test_001.png'))
+            image.source = 'SEQUENCE'
+            node = self.nodes['Image Texture']
+            node.image = image
+            node.image_user.frame_duration = 3
+            self.c.proj_settings.projected_texture = 'custom_texture'
+            scene.frame_set(1)
+            # Blender advances the sequence once auto refresh is enabled, the projector is not recomputed.
+            self.assertTrue(node.image_user.use_auto_refresh)
+            updated = animation.frame_stats.updated
+            for frame in (2, 3):
+                scene.frame_set(frame)
+                light = self.s.evaluated_get(bpy.context.evaluated_depsgraph_get()).data
+                self.assertEqual(light.node_tree.nodes['Image Texture'].image_user.frame_current, frame)
+            self.assertEqual(animation.frame_stats.updated, updated)
+            scene.frame_set(1)
+            bpy.data.images.remove(image)
+
+    def test_profiling(self):
+        profiling = addon_module('profiling')
+        profiling.enable_profiling()
+        try:
+            profiling.profiler.reset()
+            self.c.proj_settings.throw_ratio = 1.2
+            bpy.ops.projector.change_color()
+            timings = profiling.profiler.timings
+            self.assertEqual(timings['update throw_ratio'].calls, 1)
+            self.assertEqual(timings['operator projector.change_color'].calls, 1)
+            # The wrapped callbacks still update the projector.
+            self.assertAlmostEqual(self.c.data.angle, math.atan(1 / 1.2 * .5) * 2, places=5)
+            with tempfile.TemporaryDirectory() as directory:
+                profiling.profiler.dump_json(os.path.join(directory, 'profile.json'))
+                profiling.profiler.dump_stats(os.path.join(directory, 'profile.pstats'))
+                import pstats
+                self.assertTrue(pstats.Stats(os.path.join(directory, 'profile.pstats')).total_calls)
+        finally:
+            profiling.disable_profiling()
+        # Disabled profiling restores the original callbacks.
+        self.c.proj_settings.throw_ratio = 1
+        self.assertEqual(profiling.profiler.timings['update throw_ratio'].calls, 1)
+        self.assertAlmostEqual(self.c.data.angle, 0.9272952180016123, places=6)
+
+    def test_node_handle_repair(self):
+        projector = addon_module('projector')
+        nodes = projector.projector_nodes(self.c)
+        self.assertIs(projector.projector_nodes(self.c), nodes)
+        self.assertEqual(nodes.spot, self.s)
+        # Other children of the projector are not mistaken for the spot light.
+        empty = bpy.data.objects.new('Child', None)
+        bpy.context.collection.objects.link(empty)
+        empty.parent = self.c
+        # A removed node is rebuilt instead of raising a KeyError.
+        self.nodes.remove(self.nodes['Emission'])
+        self.c.proj_settings.power = 1234
+        nodes = projector.projector_nodes(self.c)
+        self.assertEqual(nodes.spot, self.s)
+        self.assertIn('Emission', self.s.data.node_tree.nodes)
+        self.assertAlmostEqual(self.s.data.energy, 1234, places=2)
+        # A removed spot light is replaced by a new one.
+        bpy.data.objects.remove(self.s)
+        self.c.proj_settings.throw_ratio = 1.5
+        spot = projector.projector_nodes(self.c).spot
+        self.assertEqual(spot.parent, self.c)
+        self.assertAlmostEqual(spot.data.energy, 1234, places=2)
+        bpy.data.objects.remove(empty)
+        # Depsgraph updates do not repair, the migrate operator does.
+        self.c.proj_settings.use_custom_texture_res = True
+        self.c.proj_settings.projected_texture = 'custom_texture'
+        tree = spot.data.node_tree
+        tree.nodes.remove(tree.nodes['Emission'])
+        bpy.context.view_layer.update()
+        self.assertNotIn('Emission', tree.nodes)
+        bpy.ops.projector.migrate_node_groups()
+        self.assertIn('Emission', tree.nodes)
+
+    def test_create_projectors(self):
+        projector = addon_module('projector')
+        specs = [{'location': (i, 0, 0), 'throw_ratio': 1, 'resolution': '1024x768'} for i in range(3)]
+        created = projector.create_projectors(specs)
+        self.assertEqual(len(created), 3)
+        # The selection is left alone.
+        self.assertEqual(bpy.context.selected_objects, [self.c])
+        for i, cam in enumerate(created):
+            self.assertEqual(cam.location[0], i)
+            self.assertAlmostEqual(cam.data.angle, 0.9272952180016123, places=6)
+            self.assertEqual(cam.children[0].data.node_tree.nodes['pixel_grid'].inputs['Width'].default_value, 1024)
+        self.assertAlmostEqual(self.c.proj_settings.throw_ratio, 0.8)
+        self.c.select_set(False)
+        for cam in created:
+            cam.select_set(True)
+        bpy.ops.projector.delete()
+
+    def test_create_projector_array(self):
+        registry = bpy.context.scene.projector_registry
+        count = len(registry)
+        bpy.ops.projector.create_array(columns=3, rows=2)
+        self.assertEqual(len(registry), count + 6)
+        self.assertEqual(len(bpy.context.selected_objects), 6)
+        bpy.ops.projector.delete()
+
+    def test_instanced_projectors(self):
+        projector = addon_module('projector')
+        sharing = addon_module('sharing')
+        cameras, lights = len(bpy.data.cameras), len(bpy.data.lights)
+        specs = [{'location': (i, 0, 0), 'throw_ratio': 1} for i in range(4)]
+        created = projector.create_projectors(specs, instanced=True)
+        self.assertEqual((len(bpy.data.cameras), len(bpy.data.lights)), (cameras + 1, lights + 1))
+        self.assertEqual(len({cam.children[0].data for cam in created}), 1)
+        # One edit changes the settings of all instances and writes the shared outputs once.
+        projector.update_trace.reset()
+        created[1].proj_settings.throw_ratio = 2
+        self.assertEqual(projector.update_trace.flushes, 1)
+        self.assertEqual(projector.update_trace.outputs[projector.Dirty.FOV], 1)
+        for cam in created:
+            self.assertAlmostEqual(cam.proj_settings.throw_ratio, 2)
+            self.assertAlmostEqual(cam.data.angle, projector.projection.fov(2), places=6)
+
+        sharing.make_single_projectors([created[0]])
+        created[0].proj_settings.power = 10
+        self.assertEqual(created[0].children[0].data.energy, 10)
+        self.assertEqual(created[1].children[0].data.energy, 1000)
+        self.assertEqual(sharing.instance_projectors(created[1], [created[0]]), 1)
+        self.assertEqual(created[0].proj_settings.power, 1000)
+        self.assertEqual(len(bpy.data.cameras), cameras + 1)
+        # Deleting an instance keeps the data of the others.
+        light = created[0].children[0].data
+        projector.delete_projectors(bpy.context.scene, created[:2])
+        self.assertIn(light, list(bpy.data.lights))
+        projector.delete_projectors(bpy.context.scene, created[2:])
+        self.assertEqual((len(bpy.data.cameras), len(bpy.data.lights)), (cameras, lights))
+
+    def test_driven_instances(self):
+        projector = addon_module('projector')
+        sharing = addon_module('sharing')
+        drivers = addon_module('drivers')
+        specs = [{'location': (i, 0, 0), 'throw_ratio': 1.5, 'use_drivers': True} for i in range(3)]
+        created = projector.create_projectors(specs, instanced=True)
+
+        def reader(cam):
+            """ Return the projector whose settings the drivers of the light of cam read. """
+            targets = {var.targets[0].id for driver in drivers.get_drivers(cam)
+                       for var in driver.variables if var.targets[0].id_type == 'OBJECT'}
+            self.assertEqual(len(targets), 1)
+            return targets.pop()
+
+        # The shared drivers move on to a projector which still shares the light.
+        single = reader(created[0])
+        sharing.make_single_projectors([single])
+        self.assertEqual(reader(single), single)
+        kept = [cam for cam in created if cam != single]
+        deleted = reader(kept[0])
+        self.assertIn(deleted, kept)
+        projector.delete_projectors(bpy.context.scene, [deleted])
+        survivor = next(cam for cam in kept if cam != deleted)
+        self.assertEqual(reader(survivor), survivor)
+        bpy.context.view_layer.update()
+        throw_ratio = survivor.children[0].data.node_tree.nodes['Group'].inputs['Throw Ratio']
+        self.assertAlmostEqual(throw_ratio.default_value, 1.5, places=5)
+        projector.delete_projectors(bpy.context.scene, [single, survivor])
+
+    def test_update_unselected_projectors(self):
+        bpy.ops.projector.create()
+        other = bpy.context.object
+        other_nodes = other.children[0].data.node_tree.nodes
+        # Updates find the projector through the settings, not the selection.
+        bpy.ops.object.select_all(action='DESELECT')
+        self.c.proj_settings.throw_ratio = 1
+        other.proj_settings.throw_ratio = 2
+        self.assertAlmostEqual(self.nodes['Group'].inputs['Throw Ratio'].default_value, 1)
+        self.assertAlmostEqual(other_nodes['Group'].inputs['Throw Ratio'].default_value, 2)
+        # Both projectors are selected, each one updates itself.
+        self.c.select_set(True)
+        other.select_set(True)
+        other.proj_settings.power = 42
+        self.assertEqual(other.children[0].data.energy, 42)
+        self.assertEqual(self.s.data.energy, 1000)
+        # All selected projectors get the same random color.
+        bpy.ops.projector.change_color()
+        self.assertEqual(tuple(self.c.proj_settings.projected_color), tuple(other.proj_settings.projected_color))
+        self.c.select_set(False)
+        bpy.ops.projector.delete()
+
+    def test_custom_texture_resolution(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            images = []
+            for i, (w, h) in enumerate([(64, 32), (40, 30)]):
+                image = bpy.data.images.new(f'_test_{i}', w, h)
+                image.filepath_raw = os.path.join(tempdir, f'test_{i}.png')
+                image.file_format = 'PNG'
+                image.save()
+                bpy.data.images.remove(image)
+                images.append(bpy.data.images.load(os.path.join(tempdir, f'test_{i}.png')))
+            inputs = self.nodes['pixel_grid'].inputs
+            self.nodes['Image Texture'].image = images[0]
+            self.c.proj_settings.projected_texture = 'custom_texture'
+            self.assertEqual((inputs['Width'].default_value, inputs['Height'].default_value), (64, 32))
+            # The size comes from the file header, the image is not decoded.
+            self.assertFalse(images[0].has_data)
+            # A new image is picked up without touching the projector settings.
+            self.nodes['Image Texture'].image = images[1]
+            bpy.context.view_layer.update()
+            self.assertEqual((inputs['Width'].default_value, inputs['Height'].default_value), (40, 30))
+            # Packed images are probed from their data, not from a cached file of the same name.
+            images[0].pack()
+            images[0].name = images[1].name_full + '.packed'
+            self.nodes['Image Texture'].image = images[0]
+            bpy.context.view_layer.update()
+            self.assertFalse(images[0].has_data)
+            self.assertEqual((inputs['Width'].default_value, inputs['Height'].default_value), (64, 32))
+            # The packed data is read in place, a prefix without copying the whole file.
+            packed_file = images[0].packed_file
+            image_probe = addon_module('image_probe')
+            self.assertEqual(bytes(image_probe.packed_data(packed_file, 16)), packed_file.data[:16])
+            self.assertEqual(bytes(image_probe.packed_data(packed_file)), packed_file.data)
+            for image in images:
+                bpy.data.images.remove(image)
+
+    def test_delete_leaves_no_orphans(self):
+        bpy.ops.projector.create()
+        other = bpy.context.object
+        other.proj_settings.projected_texture = 'color_grid_texture'
+        cam_data, light_data = other.data, other.children[0].data
+        bpy.ops.projector.delete()
+        self.assertNotIn(cam_data, list(bpy.data.cameras))
+        self.assertNotIn(light_data, list(bpy.data.lights))
+        self.assertIsNone(bpy.data.images.get('_proj.tex.1920x1080'))
+        # The shared node groups are still used by the remaining projector.
+        self.assertIsNotNone(self.nodes['Group'].node_tree)
+        self.assertGreater(self.nodes['Group'].node_tree.users, 0)
+
+    def test_purge_orphans(self):
+        bpy.ops.projector.create()
+        other = bpy.context.object
+        spot, light_data = other.children[0], other.children[0].data
+        # Delete the camera the way the outliner does.
+        bpy.data.objects.remove(other)
+        bpy.ops.projector.purge_orphans()
+        self.assertNotIn(spot, list(bpy.data.objects))
+        self.assertNotIn(light_data, list(bpy.data.lights))
+        self.assertIn(self.s, list(bpy.data.objects))
+
+        # Projectors from before the projector tag keep their spot.
+        del self.c[addon_module('helper').PROJECTOR_TAG]
+        bpy.ops.projector.purge_orphans()
+        self.assertIn(self.s, list(bpy.data.objects))
+        self.c[addon_module('helper').PROJECTOR_TAG] = True
 
     def test_update_power(self):
         new_power = 30
         self.c.proj_settings.power = new_power
         self.assertEqual(self.s.data.energy, new_power)
 
+    def test_analyze_coverage(self):
+        analysis = addon_module('analysis')
+        self.c.proj_settings.throw_ratio = 1
+        self.c.location = (0, 0, 10)
+        # 0.1m faces 2m in front of the projector, which covers 2m x 1.125m there.
+        bpy.ops.mesh.primitive_grid_add(x_subdivisions=40, y_subdivisions=40, size=4, location=(0, 0, 8))
+        wall = bpy.context.object
+        coverage = analysis.analyze_coverage(wall, [self.c], occlusion=False)
+        self.assertEqual(coverage.projectors[0]['faces'], 20 * 12)
+        self.assertAlmostEqual(coverage.pixel_density.max(), 960, delta=5)
+        self.assertEqual(wall.data.attributes[analysis.COUNT_ATTRIBUTE].domain, 'FACE')
+
+        # A 0.5m plane halfway blocks 1m x 1m on the wall.
+        bpy.ops.mesh.primitive_plane_add(size=0.5, location=(0, 0, 9))
+        blocker = bpy.context.object
+        coverage = analysis.analyze_coverage(wall, [self.c])
+        self.assertEqual(coverage.projectors[0]['faces'], 20 * 12 - 10 * 10)
+        self.assertEqual(int(coverage.count.sum()), 20 * 12 - 10 * 10)
+        bpy.data.objects.remove(blocker)
+        # The faces are read with the modifiers applied, a displacement moves the wall 1m away.
+        displace = wall.modifiers.new('Displace', 'DISPLACE')
+        displace.strength = -2
+        coverage = analysis.analyze_coverage(wall, [self.c])
+        self.assertAlmostEqual(coverage.pixel_density.max(), 640, delta=5)
+        bpy.data.objects.remove(wall)
+
+    def test_photometric_projector(self):
+        photometry = addon_module('photometry')
+        projection = addon_module('projection')
+        settings = self.c.proj_settings
+        settings.throw_ratio = 1
+        settings.lumens = 3000
+        settings.use_lumens = True
+        energy = projection.lumens_energy(3000, 1, 0, 0, 1080 / 1920)
+        self.assertAlmostEqual(self.s.data.energy, energy, places=2)
+        # The same flux in a narrower image is more intense.
+        settings.throw_ratio = 2
+        self.assertGreater(self.s.data.energy, energy)
+        settings.use_drivers = True
+        for driver in addon_module('drivers').get_drivers(self.c):
+            self.assertTrue(driver.is_simple_expression)
+        settings.throw_ratio = 1
+        bpy.context.view_layer.update()
+        self.assertAlmostEqual(self.s.data.energy, energy, places=2)
+        settings.use_drivers = False
+
+        self.c.location = (0, 0, 10)
+        bpy.ops.mesh.primitive_grid_add(x_subdivisions=100, y_subdivisions=100, size=4, location=(0, 0, 8))
+        wall = bpy.context.object
+        estimate = photometry.estimate_illuminance(wall, [self.c], occlusion=False, max_lux=1300)
+        # The wall catches the whole image and so all lumens of the projector.
+        self.assertAlmostEqual(estimate.projectors[0]['lumens'], 3000, delta=60)
+        intensity = projection.luminous_intensity(energy)
+        self.assertAlmostEqual(estimate.illuminance.max(), intensity / 2 ** 2, delta=intensity * 0.01)
+        # The image center gets about 1540 lx, the corners about 1000 lx.
+        self.assertGreater(estimate.total['over_area'], 0)
+        self.assertLess(estimate.total['over_area'], estimate.total['lit_area'])
+        self.assertEqual(wall.data.attributes[photometry.EXPOSURE_ATTRIBUTE].domain, 'FACE')
+        # Overlapping projectors add up.
+        double = photometry.estimate_illuminance(wall, [self.c, self.c], occlusion=False, write_attributes=False)
+        self.assertAlmostEqual(double.illuminance.max(), 2 * estimate.illuminance.max())
+        bpy.data.objects.remove(wall)
+
+    def test_pattern_textures(self):
+        projector = addon_module('projector')
+        self.c.proj_settings.projected_texture = 'crosshair_pattern'
+        image = self.nodes['Color Grid'].image
+        self.assertEqual(image.name, '_proj.tex.crosshair.1920x1080')
+        self.assertEqual(tuple(image.size), (1920, 1080))
+        self.assertTrue(self.nodes['Emission'].inputs['Color'].links[0].from_node == self.nodes['Color Grid'])
+        # Projectors with the same pattern and resolution share the image.
+        other = projector.create_projectors([{'projected_texture': 'crosshair_pattern'}])[0]
+        self.assertEqual(other.children[0].data.node_tree.nodes['Color Grid'].image, image)
+        projector.delete_projectors(bpy.context.scene, [other])
+
+        self.c.proj_settings.projected_texture = 'id_color_pattern'
+        self.assertIsNone(bpy.data.images.get('_proj.tex.crosshair.1920x1080'))
+        self.c.proj_settings.projected_color = (1, 0, 0)
+        image = self.nodes['Color Grid'].image
+        self.assertEqual(image.name, '_proj.tex.id_color.1920x1080.color=(1.0, 0.0, 0.0)')
+        # The center pixel has the color of the projector.
+        center = (540 * 1920 + 960) * 4
+        self.assertEqual(tuple(image.pixels[center:center + 3]), (1, 0, 0))
+        self.c.proj_settings.projected_texture = 'checker_texture'
+        self.assertIsNone(self.nodes['Color Grid'].image)
+
+    def test_proxy_textures(self):
+        proxies = addon_module('proxies')
+        scene = bpy.context.scene
+        with tempfile.TemporaryDirectory() as tempdir:
+            filepath = os.path.join(tempdir, 'still.png')
+            image = bpy.data.images.new('still', width=64, height=32)
+            image.filepath_raw = filepath
+            image.file_format = 'PNG'
+            image.save()
+            bpy.data.images.remove(image)
+            source = bpy.data.images.load(filepath)
+            self.nodes['Image Texture'].image = source
+            self.c.proj_settings.projected_texture = 'custom_texture'
+            self.c.proj_settings.use_custom_texture_res = True
+            # A projector whose file went missing keeps it and does not stop the others.
+            other = addon_module('projector').create_projectors([{'projected_texture': 'custom_texture'}])[0]
+            other_node = other.children[0].data.node_tree.nodes['Image Texture']
+            missing = bpy.data.images.load(filepath)
+            missing.filepath = os.path.join(tempdir, 'missing.png')
+            other_node.image = missing
+
+            scene.projector_texture_quality = 'QUARTER'
+            self.assertEqual(other_node.image, missing)
+            proxy = self.nodes['Image Texture'].image
+            self.assertEqual(tuple(proxy.size), (16, 8))
+            self.assertTrue(os.path.exists(bpy.path.abspath(proxy.filepath)))
+            # The resolution of the projector stays the one of the source.
+            self.assertEqual(self.nodes['pixel_grid'].inputs['Width'].default_value, 64)
+            # Rigs export the source, not the proxy.
+            self.assertEqual(addon_module('rig_io').projector_record(self.c)['source'], os.path.normpath(filepath))
+
+            scene.projector_texture_quality = 'FINAL'
+            self.assertEqual(self.nodes['Image Texture'].image, source)
+            self.assertNotIn(proxy, list(bpy.data.images))
+            self.nodes['Image Texture'].image = None
+            bpy.data.images.remove(source)
+            addon_module('projector').delete_projectors(scene, [other])
+
+    def test_share_projection_sources(self):
+        sharing = addon_module('sharing')
+        projector = addon_module('projector')
+        others = projector.create_projectors([{'projected_texture': 'custom_texture'} for _ in range(2)])
+        with tempfile.TemporaryDirectory() as tempdir:
+            filepath = os.path.join(tempdir, 'still.png')
+            image = bpy.data.images.new('still', width=64, height=32)
+            image.filepath_raw = filepath
+            image.file_format = 'PNG'
+            image.save()
+            bpy.data.images.remove(image)
+            # The same file loaded for every projector.
+            images = [bpy.data.images.load(filepath) for _ in range(3)]
+            for obj, image in zip([self.c, *others], images):
+                obj.children[0].data.node_tree.nodes['Image Texture'].image = image
+            # Only decoded duplicates hold memory.
+            images[2].pixels[0]
+            # A material keeps its image, only the images of the projectors are shared.
+            material = bpy.data.materials.new('Uses Duplicate')
+            material.use_nodes = True
+            material.node_tree.nodes.new('ShaderNodeTexImage').image = images[1]
+            removed, reclaimed = sharing.share_projection_sources(bpy.context.scene)
+            self.assertEqual(removed, 1)
+            self.assertEqual(reclaimed, 64 * 32 * 4)
+            nodes = [obj.children[0].data.node_tree.nodes['Image Texture'] for obj in others]
+            self.assertTrue(all(node.image == self.nodes['Image Texture'].image for node in nodes))
+            self.assertIn(images[1], [node.image for node in material.node_tree.nodes if node.type == 'TEX_IMAGE'])
+
+            # Assigning the file again is shared right away, the duplicate is left to the orphan purge.
+            duplicate = bpy.data.images.load(filepath)
+            nodes[0].image = duplicate
+            bpy.context.view_layer.update()
+            self.assertEqual(nodes[0].image, self.nodes['Image Texture'].image)
+            self.assertEqual(duplicate.users, 0)
+            bpy.data.images.remove(duplicate)
+            bpy.data.materials.remove(material)
+            projector.delete_projectors(bpy.context.scene, others)
+
+    def test_rig_import_export(self):
+        rig_io = addon_module('rig_io')
+        projector = addon_module('projector')
+        others = projector.create_projectors([{'location': (i, 0, 0)} for i in range(3)])
+        with tempfile.TemporaryDirectory() as tempdir:
+            for filename in ('rig.json', 'rig.csv'):
+                filepath = os.path.join(tempdir, filename)
+                rig_io.write_rig(filepath, rig_io.export_rig())
+                records = rig_io.read_rig(filepath)
+                self.assertEqual(len(records), 4)
+                # Reimporting an unchanged rig does not touch any projector.
+                stats = rig_io.import_rig(records)
+                self.assertEqual(stats, {'created': 0, 'updated': 0, 'unchanged': 4})
+
+            record = next(r for r in records if r['id'] == rig_io.projector_id(others[1]))
+            record['throw_ratio'] = '1.5'
+            record['rotation_x'] = '90'
+            records.append({'name': 'New Projector', 'location_z': '3', 'resolution': '1280x720'})
+            stats = rig_io.import_rig(records)
+            self.assertEqual(stats, {'created': 1, 'updated': 1, 'unchanged': 3})
+            self.assertAlmostEqual(others[1].proj_settings.throw_ratio, 1.5)
+            self.assertAlmostEqual(others[1].rotation_euler.x, math.pi / 2)
+            new = bpy.data.objects['New Projector']
+            self.assertEqual(new.location.z, 3)
+            self.assertEqual(new.proj_settings.resolution, '1280x720')
+
+            # An unknown enum value fails the whole import before any projector is written.
+            record['throw_ratio'] = '2'
+            records.append({'name': 'Broken Projector', 'resolution': '123x45'})
+            with self.assertRaisesRegex(ValueError, '123x45'):
+                rig_io.import_rig(records)
+            self.assertAlmostEqual(others[1].proj_settings.throw_ratio, 1.5)
+            self.assertNotIn('Broken Projector', bpy.data.objects)
+        projector.delete_projectors(bpy.context.scene, others + [new])
+
+    def test_edge_blend(self):
+        blending = addon_module('blending')
+        projector = addon_module('projector')
+        other = projector.create_projectors([{'location': (0.5, 0, 10), 'throw_ratio': 1, 'resolution': '800x600'}])[0]
+        self.c.location = (-0.5, 0, 10)
+        self.c.proj_settings.throw_ratio = 1
+        self.c.proj_settings.resolution = '800x600'
+        # Both cover 2m on the wall, the middle meter overlaps.
+        bpy.ops.mesh.primitive_plane_add(size=6, location=(0, 0, 8))
+        wall = bpy.context.object
+        images = blending.edge_blend([self.c, other], wall, ramp='LINEAR')
+        self.assertEqual(tuple(images[0].size), (800, 600))
+        pixels = np.empty(800 * 600 * 4, dtype=np.float32)
+        images[0].pixels.foreach_get(pixels)
+        middle_row = pixels.reshape(600, 800, 4)[300, :, 0]
+        self.assertAlmostEqual(middle_row[100], 1, places=2)
+        self.assertAlmostEqual(middle_row[600], 0.5, delta=0.02)
+        self.assertLess(middle_row[-1], 0.02)
+        strength = self.nodes['Emission'].inputs['Strength']
+        self.assertTrue(strength.is_linked)
+
+        blending.clear_edge_blend([self.c, other])
+        self.assertFalse(strength.is_linked)
+        self.assertIsNone(bpy.data.images.get(blending.BLEND_PREFIX + self.c.name))
+        projector.delete_projectors(bpy.context.scene, [other])
+        bpy.data.objects.remove(wall)
+
+    def test_warp(self):
+        projector = addon_module('projector')
+        warp = addon_module('warp')
+        proj_settings = self.c.proj_settings
+        proj_settings.projected_texture = 'color_grid_texture'
+        proj_settings.warp_mode = 'CORNER_PIN'
+        self.assertEqual(len(proj_settings.corner_pin), 4)
+        warped = self.nodes[projector.WARP_NODE].outputs['Vector']
+        for name in ('Image Texture', 'Color Grid'):
+            self.assertEqual(self.nodes[name].inputs['Vector'].links[0].from_socket, warped)
+        self.assertEqual(self.nodes['pixel_grid'].inputs[1].links[0].from_socket, warped)
+
+        def lookup():
+            image = self.nodes[projector.WARP_MAP_NODE].image
+            pixels = np.empty(warp.MAP_SIZE ** 2 * 4, dtype=np.float32)
+            image.pixels.foreach_get(pixels)
+            return pixels.reshape(warp.MAP_SIZE, warp.MAP_SIZE, 4)[..., :2]
+
+        # Pulling in the top corners narrows the image top, the top corners of the map look up beyond the image.
+        proj_settings.corner_pin[2].offset = (0.1, 0)
+        proj_settings.corner_pin[3].offset = (-0.1, 0)
+        self.assertLess(lookup()[-1, 0, 0], -0.05)
+        self.assertGreater(lookup()[-1, -1, 0], 0.05)
+        self.assertAlmostEqual(lookup()[0, 0, 0], 0, places=2)
+
+        # Moving one control point of a grid bakes only its cells, the result equals a full bake.
+        proj_settings.warp_mode = 'GRID'
+        proj_settings.warp_columns = 5
+        self.assertEqual(len(proj_settings.warp_points), 20)
+        proj_settings.warp_points[6].offset = (0.02, -0.03)
+        offsets = projector.warp_offsets(proj_settings)
+        np.testing.assert_allclose(lookup(), warp.bake(offsets), atol=1e-5)
+        image = self.nodes[projector.WARP_MAP_NODE].image
+        self.assertEqual(image.name, projector.TEXTURE_PREFIX + 'warp.' + self.s.data[projector.WARP_ID])
+
+        # Renaming the light keeps its warp map, a copy of the light gets its own.
+        self.s.data.name = 'Renamed Spot'
+        self.assertEqual(projector.get_warp_texture(self.s.data), image)
+        copy = self.s.data.copy()
+        self.assertNotEqual(projector.get_warp_texture(copy), image)
+        self.assertEqual(projector.get_warp_texture(self.s.data), image)
+        bpy.data.images.remove(projector.get_warp_texture(copy))
+        bpy.data.lights.remove(copy)
+
+        proj_settings.warp_mode = 'NONE'
+        self.assertNotIn(projector.WARP_NODE, self.nodes)
+        self.assertEqual(self.nodes['Color Grid'].inputs['Vector'].links[0].from_node.name, 'Group')
+
     def tearDown(self):
         bpy.ops.object.select_all(action='DESELECT')
         self.c.select_set(True)
         bpy.ops.projector.delete()
 
 
+class RecordingTestResult(unittest.TextTestResult):
+    """ Records the outcome and duration of every test case, the runner in cmd.py collects them as JSON. """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.records = []
+        self._start = time.perf_counter()
+
+    def startTest(self, test):
+        self._start = time.perf_counter()
+        super().startTest(test)
+
+    def _record(self, test, outcome, message=''):
+        # Blender runs the tests as __main__.
+        self.records.append({'id': test.id().replace('__main__.', 'tests.', 1), 'outcome': outcome, 'message': message,
+                             'time': time.perf_counter() - self._start})
+
+    def addSuccess(self, test):
+        super().addSuccess(test)
+        self._record(test, 'passed')
+
+    def addFailure(self, test, err):
+        super().addFailure(test, err)
+        self._record(test, 'failed', self.failures[-1][1])
+
+    def addError(self, test, err):
+        super().addError(test, err)
+        self._record(test, 'error', self.errors[-1][1])
+
+    def addSkip(self, test, reason):
+        super().addSkip(test, reason)
+        self._record(test, 'skipped', reason)
+
+
+def parse_args():
+    """ Parse the arguments after '--', Blender keeps the ones before for itself. """
+    argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+    parser = argparse.ArgumentParser(description='Run the tests of the Projectors add-on inside Blender.')
+    parser.add_argument('--shard', default='0/1',
+                        help='Run only the I-th of N equal parts of the test cases, given as I/N.')
+    parser.add_argument('--output', help='Write the outcome of every test case to this JSON file.')
+    return parser.parse_args(argv)
+
+
 def run_tests():
-    testLoader = unittest.TestLoader()
-    testLoader.testMethodPrefix = "test"
-    all_tests = testLoader.discover(".", pattern="test*")
-    unittest.TextTestRunner(verbosity=1).run(all_tests)
+    args = parse_args()
+    shard, shards = (int(part) for part in args.shard.split('/'))
+    loader = unittest.TestLoader()
+    cases = [test for case in (TestAddon, TestProjector) for test in loader.loadTestsFromTestCase(case)]
+    suite = unittest.TestSuite(cases[shard::shards])
+    result = unittest.TextTestRunner(verbosity=1, resultclass=RecordingTestResult).run(suite)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'blender': bpy.app.version_string, 'tests': result.records}, f, indent=2)
+    return result
 
 
 if __name__ == "__main__":
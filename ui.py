@@ -1,9 +1,15 @@
 from .helper import get_projectors
-from .projector import RESOLUTIONS, Textures
+from .profiling import is_profiling, profiler
+from .projector import RESOLUTIONS, Textures, is_instanced, projector_nodes
 
 import bpy
 from bpy.types import Panel, PropertyGroup, UIList, Operator
 
+# Number of the slowest profiled functions shown in the profiling panel.
+PROFILE_ROWS = 12
+# Labels of the corner pin control points, in their order.
+WARP_CORNERS = ('Bottom Left', 'Bottom Right', 'Top Left', 'Top Right')
+
 
 class PROJECTOR_PT_projector_settings(Panel):
     bl_idname = 'OBJECT_PT_projector_n_panel'
@@ -28,6 +34,14 @@ class PROJECTOR_PT_projector_settings(Panel):
             box.label(text='Image Projection only works in Cycles.', icon='ERROR')
             box.operator('projector.switch_to_cycles')
 
+        layout.prop(context.scene, 'projector_texture_quality', text='Textures')
+        layout.operator('projector.analyze_coverage', icon='VIEWZOOM')
+        layout.operator('projector.estimate_illuminance', icon='LIGHT_SUN')
+        row = layout.row(align=True)
+        row.operator('projector.edge_blend', icon='MOD_MASK')
+        row.operator('projector.clear_edge_blend', text='', icon='X')
+        layout.operator('projector.link_instances', icon='LINKED')
+
         selected_projectors = get_projectors(context, only_selected=True)
         if len(selected_projectors) == 1:
             projector = selected_projectors[0]
@@ -38,7 +52,12 @@ class PROJECTOR_PT_projector_settings(Panel):
             layout.label(text='Projector Settings:')
             box = layout.box()
             box.prop(proj_settings, 'throw_ratio')
-            box.prop(proj_settings, 'power', text='Power')
+            row = box.row(align=True)
+            if proj_settings.use_lumens:
+                row.prop(proj_settings, 'lumens', text='Lumens')
+            else:
+                row.prop(proj_settings, 'power', text='Power')
+            row.prop(proj_settings, 'use_lumens', text='', icon='LIGHT_SUN')
             res_row = box.row()
             res_row.prop(proj_settings, 'resolution',
                          text='Resolution', icon='PRESET')
@@ -56,15 +75,29 @@ class PROJECTOR_PT_projector_settings(Panel):
             layout.prop(proj_settings,
                         'projected_texture', text='Project')
             # Pixel Grid
-            box.prop(proj_settings, 'show_pixel_grid')
+            row = box.row()
+            row.prop(proj_settings, 'show_pixel_grid')
+            sub = row.row()
+            sub.active = proj_settings.show_pixel_grid
+            sub.prop(proj_settings, 'bake_pixel_grid')
+            box.prop(proj_settings, 'use_drivers')
+            if is_instanced(projector):
+                row = box.row()
+                row.label(text=f'Shared by {projector.data.users} projectors', icon='LINKED')
+                row.operator('projector.make_single', text='', icon='UNLINKED')
 
             # Custom Texture
             if proj_settings.projected_texture == Textures.CUSTOM_TEXTURE.value:
                 box = layout.box()
                 box.prop(proj_settings, 'use_custom_texture_res')
-                node = get_projectors(context, only_selected=True)[
-                    0].children[0].data.node_tree.nodes['Image Texture']
-                box.template_image(node, 'image', node.image_user, compact=False)
+                nodes = projector_nodes(projector, repair=False)
+                if nodes is None:
+                    box.label(text='The projector node tree is damaged.', icon='ERROR')
+                    box.operator('projector.migrate_node_groups', text='Repair Projectors')
+                else:
+                    node = nodes.image_texture
+                    box.template_image(node, 'image', node.image_user, compact=False)
+                box.operator('projector.share_sources', icon='LINKED')
 
 
 class PROJECTOR_PT_projected_color(Panel):
@@ -76,9 +109,10 @@ class PROJECTOR_PT_projected_color(Panel):
 
     @classmethod
     def poll(self, context):
-        """ Only show if projected texture is set to  'checker'."""
+        """ Only show if projected texture is set to 'checker' or 'ID color'."""
         projector = context.object
-        return bool(get_projectors(context, only_selected=True)) and projector.proj_settings.projected_texture == Textures.CHECKER.value
+        return (bool(get_projectors(context, only_selected=True))
+                and projector.proj_settings.projected_texture in (Textures.CHECKER.value, Textures.ID_COLOR.value))
 
     def draw(self, context):
         projector = context.object
@@ -91,14 +125,79 @@ class PROJECTOR_PT_projected_color(Panel):
                      icon='MODIFIER_ON', text='Random Color')
 
 
+class PROJECTOR_PT_warp(Panel):
+    bl_label = "Warp"
+    bl_parent_id = "OBJECT_PT_projector_n_panel"
+    bl_options = {'DEFAULT_CLOSED'}
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+
+    @classmethod
+    def poll(self, context):
+        """ Only show for a single selected projector. """
+        return len(get_projectors(context, only_selected=True)) == 1
+
+    def draw(self, context):
+        proj_settings = context.object.proj_settings
+        layout = self.layout
+        layout.use_property_split = True
+        layout.use_property_decorate = False
+        row = layout.row(align=True)
+        row.prop(proj_settings, 'warp_mode')
+        row.operator('projector.reset_warp', text='', icon='LOOP_BACK')
+        if proj_settings.warp_mode == 'NONE':
+            return
+        if proj_settings.projected_texture == Textures.CHECKER.value:
+            layout.label(text='The checker is not warped, project an image.', icon='INFO')
+        col = layout.column(align=True)
+        if proj_settings.warp_mode == 'CORNER_PIN':
+            for point, name in zip(proj_settings.corner_pin, WARP_CORNERS):
+                col.prop(point, 'offset', text=name)
+            return
+        col.prop(proj_settings, 'warp_columns')
+        col.prop(proj_settings, 'warp_rows')
+        col = layout.column(align=True)
+        columns = proj_settings.warp_columns
+        for i, point in enumerate(proj_settings.warp_points):
+            col.prop(point, 'offset', text=f'Row {i // columns + 1}, Column {i % columns + 1}')
+
+
+class PROJECTOR_PT_profiling(Panel):
+    bl_label = "Profiling"
+    bl_parent_id = "OBJECT_PT_projector_n_panel"
+    bl_options = {'DEFAULT_CLOSED'}
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+
+    @classmethod
+    def poll(self, context):
+        """ Only show while profiling is enabled in the add-on preferences. """
+        return is_profiling()
+
+    def draw(self, context):
+        layout = self.layout
+        row = layout.row(align=True)
+        row.operator('projector.dump_profile', icon='EXPORT', text='Dump')
+        row.operator('projector.reset_profile', icon='X', text='Reset')
+        col = layout.column(align=True)
+        for timing in profiler.report()[:PROFILE_ROWS]:
+            row = col.row()
+            row.label(text=timing['name'])
+            row.label(text=f"{timing['calls']}x {timing['total_ms']:.1f} ms, max {timing['max_ms']:.1f} ms")
+
+
 def append_to_add_menu(self, context):
     self.layout.operator('projector.create',
                          text='Projector', icon='CAMERA_DATA')
+    self.layout.operator('projector.create_array',
+                         text='Projector Array', icon='MOD_ARRAY')
 
 
 def register():
     bpy.utils.register_class(PROJECTOR_PT_projector_settings)
     bpy.utils.register_class(PROJECTOR_PT_projected_color)
+    bpy.utils.register_class(PROJECTOR_PT_warp)
+    bpy.utils.register_class(PROJECTOR_PT_profiling)
     # Register create  in the blender add menu.
     bpy.types.VIEW3D_MT_light_add.append(append_to_add_menu)
 
@@ -106,5 +205,7 @@ def register():
 def unregister():
     # Register create in the blender add menu.
     bpy.types.VIEW3D_MT_light_add.remove(append_to_add_menu)
+    bpy.utils.unregister_class(PROJECTOR_PT_profiling)
+    bpy.utils.unregister_class(PROJECTOR_PT_warp)
     bpy.utils.unregister_class(PROJECTOR_PT_projected_color)
     bpy.utils.unregister_class(PROJECTOR_PT_projector_settings)
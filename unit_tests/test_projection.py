@@ -0,0 +1,146 @@
+""" Tests of the projection math which run without Blender: pytest unit_tests
+Not python -m pytest from the add-on directory, there cmd.py shadows the cmd module of the standard library.
+The add-on package imports bpy, so the tested modules are imported by their path.
+"""
+import importlib.util
+import math
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+ADDON_DIR = Path(__file__).resolve().parent.parent
+
+
+def load_module(name):
+    spec = importlib.util.spec_from_file_location(name, ADDON_DIR / f'{name}.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+projection = load_module('projection')
+
+# Random projector settings for the property checks, in the soft ranges of the projector settings.
+rng = np.random.default_rng(2020)
+SAMPLES = 500
+THROW_RATIOS = rng.uniform(0.4, 3, SAMPLES)
+SHIFTS = rng.uniform(-1, 1, (SAMPLES, 2))
+RESOLUTIONS = rng.integers(100, 8000, (SAMPLES, 2)).astype(float)
+
+
+# Expected values of tests.TestProjector.
+@pytest.mark.parametrize('throw_ratio, angle, scale', [
+    (1, 0.9272952180016123, (1, 0.5625)),
+    (0.8, 1.1171986306871249, (1.25, 0.703125)),
+])
+def test_throw_ratio(throw_ratio, angle, scale):
+    assert projection.fov(throw_ratio) == pytest.approx(angle, abs=1e-6)
+    inverted = projection.inverted_aspect_ratio(*projection.parse_resolution('1920x1080'))
+    assert projection.texture_scale(throw_ratio, inverted) == pytest.approx(scale)
+
+
+def test_lens_shift():
+    h_shift = projection.shift_fraction(10)
+    assert h_shift == pytest.approx(0.1)
+    shift_x, _ = projection.camera_shift(h_shift, 0, 0.5625)
+    assert shift_x == pytest.approx(0.1)
+    translation_x, _ = projection.texture_translation(h_shift, 0, 1, 0.5625)
+    assert translation_x == pytest.approx(0.1)
+
+
+def test_parse_resolution():
+    assert projection.parse_resolution('1024x768') == (1024.0, 768.0)
+
+
+def test_fov_range():
+    for throw_ratio in THROW_RATIOS:
+        assert 0 < projection.fov(throw_ratio) < math.pi
+
+
+def test_fov_image_width():
+    """ At the distance of the camera the image is as wide as distance / throw ratio. """
+    for throw_ratio in THROW_RATIOS:
+        width = 2 * projection.DISTANCE * math.tan(projection.fov(throw_ratio) / 2)
+        assert width == pytest.approx(projection.DISTANCE / throw_ratio)
+
+
+def test_fov_decreases_with_throw_ratio():
+    angles = projection.fov_array(np.sort(THROW_RATIOS))
+    assert np.all(np.diff(angles) <= 0)
+
+
+def test_texture_scale_keeps_aspect_ratio():
+    for throw_ratio, (width, height) in zip(THROW_RATIOS, RESOLUTIONS):
+        scale_x, scale_y = projection.texture_scale(throw_ratio, projection.inverted_aspect_ratio(width, height))
+        assert scale_y / scale_x == pytest.approx(height / width)
+
+
+def test_arrays_match_scalars():
+    outputs = projection.projector_outputs_array(THROW_RATIOS, SHIFTS[:, 0], SHIFTS[:, 1],
+                                                 RESOLUTIONS[:, 0], RESOLUTIONS[:, 1])
+    for i, throw_ratio in enumerate(THROW_RATIOS):
+        h_shift, v_shift = SHIFTS[i]
+        inverted = projection.inverted_aspect_ratio(*RESOLUTIONS[i])
+        assert outputs['angle'][i] == pytest.approx(projection.fov(throw_ratio))
+        assert (outputs['shift_x'][i], outputs['shift_y'][i]) == pytest.approx(
+            projection.camera_shift(h_shift, v_shift, inverted))
+        assert (outputs['scale_x'][i], outputs['scale_y'][i]) == pytest.approx(
+            projection.texture_scale(throw_ratio, inverted))
+        assert (outputs['translation_x'][i], outputs['translation_y'][i]) == pytest.approx(
+            projection.texture_translation(h_shift, v_shift, throw_ratio, inverted))
+
+
+def test_image_directions_round_trip():
+    """ Points along the directions through image coordinates project back onto the same coordinates. """
+    u = np.linspace(-0.5, 0.5, 7)
+    v = np.linspace(-0.5, 0.5, 5)
+    for throw_ratio, (h_shift, v_shift), (width, height) in zip(THROW_RATIOS[:50], SHIFTS, RESOLUTIONS):
+        inverted = projection.inverted_aspect_ratio(width, height)
+        directions = projection.image_directions(u, v, throw_ratio, h_shift, v_shift, inverted)
+        points = directions.reshape(-1, 3) * rng.uniform(0.1, 100)
+        u_back, v_back, depth = projection.image_coordinates(points, throw_ratio, h_shift, v_shift, inverted)
+        np.testing.assert_allclose(u_back, np.tile(u, len(v)), atol=1e-9)
+        np.testing.assert_allclose(v_back, np.repeat(v, len(u)), atol=1e-9)
+        assert np.all(depth > 0)
+
+
+def test_image_edges_match_fov():
+    """ The edges of the unshifted image lie on the edges of the field of view of the camera. """
+    for throw_ratio in THROW_RATIOS:
+        half_angle = projection.fov(throw_ratio) / 2
+        edge = np.array([[math.tan(half_angle), 0, -1]])
+        u, _, _ = projection.image_coordinates(edge, throw_ratio, 0, 0, 0.5625)
+        assert u[0] == pytest.approx(0.5)
+
+
+def test_image_solid_angle_matches_integration():
+    """ The closed form solid angle matches a numeric integration over the image on the plane at distance 1. """
+    n = 400
+    for throw_ratio, (h_shift, v_shift), (width, height) in zip(THROW_RATIOS[:20], SHIFTS, RESOLUTIONS):
+        inverted = projection.inverted_aspect_ratio(width, height)
+        u = (np.arange(n) + 0.5) / n - 0.5
+        directions = projection.image_directions(u, u, throw_ratio, h_shift, v_shift, inverted)
+        # dOmega = dA cos / r^2 = dA / r^3 on the plane z = -1.
+        cell = 1 / throw_ratio / n * inverted / throw_ratio / n
+        integral = (cell / np.linalg.norm(directions, axis=-1) ** 3).sum()
+        solid_angle = projection.image_solid_angle(throw_ratio, h_shift, v_shift, inverted)
+        assert solid_angle == pytest.approx(integral, rel=1e-3)
+
+
+def test_lumens_flux():
+    """ The flux of the spot light over the solid angle of the image equals the lumens, including lens shift. """
+    lumens = rng.uniform(100, 20000, SAMPLES)
+    inverted = RESOLUTIONS[:, 1] / RESOLUTIONS[:, 0]
+    energy = projection.lumens_energy(lumens, THROW_RATIOS, SHIFTS[:, 0], SHIFTS[:, 1], inverted)
+    solid_angle = projection.image_solid_angle(THROW_RATIOS, SHIFTS[:, 0], SHIFTS[:, 1], inverted)
+    np.testing.assert_allclose(projection.luminous_intensity(energy) * solid_angle, lumens)
+
+
+def test_illuminance_at_image_center():
+    """ A narrow image spreads the lumens evenly, the illuminance is the lumens over the image area. """
+    throw_ratio, inverted, distance = 20, 0.5625, 3
+    intensity = projection.luminous_intensity(projection.lumens_energy(1000, throw_ratio, 0, 0, inverted))
+    area = (distance / throw_ratio) ** 2 * inverted
+    assert projection.illuminance(intensity, distance, 1) == pytest.approx(1000 / area, rel=1e-3)
+    assert projection.luminance(math.pi, 0.5) == pytest.approx(0.5)
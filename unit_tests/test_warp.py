@@ -0,0 +1,93 @@
+""" Tests of the warp maps which run without Blender: pytest unit_tests """
+import importlib.util
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+ADDON_DIR = Path(__file__).resolve().parent.parent
+
+
+def load_module(name):
+    spec = importlib.util.spec_from_file_location(name, ADDON_DIR / f'{name}.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+warp = load_module('warp')
+
+rng = np.random.default_rng(2020)
+
+
+def random_grid(columns, rows, amount=0.03):
+    return rng.uniform(-amount, amount, (rows, columns, 2))
+
+
+def test_rest_grid_bakes_identity():
+    for corner_pin, (columns, rows) in ((True, (2, 2)), (False, (5, 4))):
+        lookup = warp.bake(np.zeros((rows, columns, 2)), corner_pin=corner_pin, size=16)
+        np.testing.assert_allclose(lookup, 0, atol=1e-12)
+
+
+def test_interpolate_hits_control_points():
+    offsets = random_grid(5, 4)
+    points = warp.rest_positions(5, 4).reshape(-1, 2)
+    np.testing.assert_allclose(warp.interpolate(offsets, points), offsets.reshape(-1, 2))
+
+
+def test_resample_keeps_bilinear_warp():
+    """ A warp resampled to a finer grid which contains the old points is the same warp. """
+    offsets = random_grid(3, 3)
+    finer = warp.resample(offsets, 5, 5)
+    points = rng.uniform(0, 1, (200, 2))
+    np.testing.assert_allclose(warp.interpolate(finer, points), warp.interpolate(offsets, points))
+
+
+def test_corner_pin_moves_corners():
+    """ The image corner moved by a corner pin is shown at its new position. """
+    offsets = random_grid(2, 2, 0.1)
+    targets = warp.rest_positions(2, 2).reshape(4, 2) + offsets.reshape(4, 2)
+    sources = warp.corner_pin_sources(offsets, targets)
+    np.testing.assert_allclose(sources, warp.rest_positions(2, 2).reshape(4, 2), atol=1e-9)
+
+
+def test_corner_pin_keystone_keeps_lines_straight():
+    """ A keystone correction maps straight lines of the image to straight lines. """
+    offsets = np.zeros((2, 2, 2))
+    offsets[1, :, 0] = (0.1, -0.1)
+    points = np.column_stack((np.linspace(0.1, 0.9, 9), np.full(9, 0.5)))
+    sources = warp.corner_pin_sources(offsets, points)
+    np.testing.assert_allclose(sources[:, 1], sources[0, 1])
+
+
+def test_grid_lookup_inverts_warp():
+    """ Each image position moved by the grid warp is looked up from its new position. """
+    offsets = random_grid(6, 5)
+    image = rng.uniform(0.1, 0.9, (300, 2))
+    shown = image + warp.interpolate(offsets, image)
+    np.testing.assert_allclose(warp.grid_sources(offsets, shown), image, atol=1e-9)
+
+
+@pytest.mark.parametrize('columns, rows', [(4, 4), (7, 5)])
+def test_partial_bake_matches_full_bake(columns, rows):
+    previous = random_grid(columns, rows)
+    lookup = warp.bake(previous, size=32)
+    for _ in range(5):
+        offsets = previous.copy()
+        offsets[rng.integers(rows), rng.integers(columns)] += rng.uniform(-0.03, 0.03, 2)
+        region = warp.affected_region(previous, offsets, size=32)
+        lookup = warp.bake(offsets, size=32, region=region, lookup=lookup)
+        np.testing.assert_allclose(lookup, warp.bake(offsets, size=32), atol=1e-9)
+        previous = offsets
+
+
+def test_affected_region_is_local():
+    offsets = np.zeros((9, 9, 2))
+    assert warp.affected_region(offsets, offsets) is None
+    moved = offsets.copy()
+    moved[4, 4] = (0.01, 0.01)
+    rows, columns = warp.affected_region(offsets, moved, size=64)
+    # The point touches the four cells around it, a quarter of the image each way.
+    assert rows.stop - rows.start < 64 * 0.3
+    assert columns.stop - columns.start < 64 * 0.3
@@ -0,0 +1,114 @@
+""" Keystone and mesh warp of the projected image, without bpy so it can be tested outside of Blender.
+The control points form a grid of shape (rows, columns) over the image, row 0 at the bottom. Their offsets are
+in fractions of the image width and height and move the image: the content at the rest position of a point
+is shown at its rest position + offset. The warp is baked into a lookup map of UV offsets, each texel holds
+the offset from its position to the image position it shows.
+"""
+import numpy as np
+
+# Texels per side of the baked lookup map.
+MAP_SIZE = 64
+# Fixed point iterations which invert a grid warp, enough for warps that do not fold over.
+ITERATIONS = 24
+
+
+def rest_positions(columns, rows):
+    """ Return the rest positions of a grid of control points, shape (rows, columns, 2). """
+    u, v = np.meshgrid(np.linspace(0, 1, columns), np.linspace(0, 1, rows))
+    return np.stack((u, v), axis=-1)
+
+
+def texel_positions(size=MAP_SIZE):
+    """ Return the UV positions of the texel centers of a lookup map, shape (size, size, 2), bottom row first. """
+    centers = (np.arange(size) + 0.5) / size
+    u, v = np.meshgrid(centers, centers)
+    return np.stack((u, v), axis=-1)
+
+
+def resample(offsets, columns, rows):
+    """ Return the offsets of a grid bilinearly resampled to another number of columns and rows. """
+    return interpolate(offsets, rest_positions(columns, rows).reshape(-1, 2)).reshape(rows, columns, 2)
+
+
+def interpolate(offsets, points):
+    """ Return the bilinearly interpolated offsets of a grid at UV points of shape (n, 2).
+    Points outside the image get the offsets of the closest edge.
+    """
+    rows, columns = offsets.shape[:2]
+    x = np.clip(points[:, 0], 0, 1) * (columns - 1)
+    y = np.clip(points[:, 1], 0, 1) * (rows - 1)
+    x0 = np.minimum(x.astype(np.int64), columns - 2)
+    y0 = np.minimum(y.astype(np.int64), rows - 2)
+    fx = (x - x0)[:, None]
+    fy = (y - y0)[:, None]
+    bottom = offsets[y0, x0] * (1 - fx) + offsets[y0, x0 + 1] * fx
+    top = offsets[y0 + 1, x0] * (1 - fx) + offsets[y0 + 1, x0 + 1] * fx
+    return bottom * (1 - fy) + top * fy
+
+
+def homography(source, target):
+    """ Return the 3x3 projective transform which maps four source points of shape (4, 2) to four target points. """
+    a = np.zeros((8, 8))
+    b = np.asarray(target, dtype=float).ravel()
+    for i, ((x, y), (u, v)) in enumerate(zip(source, target)):
+        a[2 * i] = (x, y, 1, 0, 0, 0, -u * x, -u * y)
+        a[2 * i + 1] = (0, 0, 0, x, y, 1, -v * x, -v * y)
+    return np.append(np.linalg.solve(a, b), 1).reshape(3, 3)
+
+
+def corner_pin_sources(offsets, points):
+    """ Return the image positions shown at UV points of shape (n, 2) for a corner pin, a 2x2 grid.
+    A corner pin is the projective transform of a keystone correction, it is inverted exactly.
+    """
+    rest = rest_positions(2, 2).reshape(4, 2)
+    inverse = homography(rest + offsets.reshape(4, 2), rest)
+    mapped = np.column_stack((points, np.ones(len(points)))) @ inverse.T
+    return mapped[:, :2] / mapped[:, 2:]
+
+
+def grid_sources(offsets, points, iterations=ITERATIONS):
+    """ Return the image positions shown at UV points of shape (n, 2) for a bilinear mesh warp.
+    The warp moves each image position s to s + offset(s), it is inverted by the fixed point iteration
+    s = point - offset(s).
+    """
+    sources = points.copy()
+    for _ in range(iterations):
+        sources = points - interpolate(offsets, sources)
+    return sources
+
+
+def bake(offsets, corner_pin=False, size=MAP_SIZE, region=None, lookup=None):
+    """ Return the lookup map of a warp, shape (size, size, 2). Only the texels of region, a tuple of slices
+    (rows, columns), are baked into a copy of the previous lookup map, the rest is kept.
+    """
+    lookup = np.zeros((size, size, 2)) if lookup is None or region is None else lookup.copy()
+    region = region if region is not None else (slice(None), slice(None))
+    points = texel_positions(size)[region].reshape(-1, 2)
+    sources = corner_pin_sources(offsets, points) if corner_pin else grid_sources(offsets, points)
+    lookup[region] = (sources - points).reshape(lookup[region].shape)
+    return lookup
+
+
+def affected_region(previous, offsets, size=MAP_SIZE):
+    """ Return the texels of the lookup map which change between two grids of the same shape as a tuple of
+    slices (rows, columns), None if nothing changed. Only the cells next to moved control points change.
+    Their texels lie within the bounds of these cells before and after the move.
+    """
+    moved = np.any(previous != offsets, axis=-1)
+    if not moved.any():
+        return None
+    rows, columns = offsets.shape[:2]
+    # Cells are indexed by their bottom left control point, a point touches the cells left of and below it.
+    cells = np.zeros((rows - 1, columns - 1), dtype=bool)
+    for dy in (0, 1):
+        for dx in (0, 1):
+            cells |= moved[dy:rows - 1 + dy, dx:columns - 1 + dx]
+    corners = np.zeros((rows, columns), dtype=bool)
+    for dy in (0, 1):
+        for dx in (0, 1):
+            corners[dy:rows - 1 + dy, dx:columns - 1 + dx] |= cells
+    rest = rest_positions(columns, rows)[corners]
+    positions = np.concatenate((rest + previous[corners], rest + offsets[corners]))
+    low = np.clip(np.floor(positions.min(axis=0) * size).astype(int) - 1, 0, size)
+    high = np.clip(np.ceil(positions.max(axis=0) * size).astype(int) + 1, 0, size)
+    return slice(low[1], high[1]), slice(low[0], high[0])